@@ -1,16 +1,46 @@
 # app/__init__.py
 from __future__ import annotations
 
+import queue
+from functools import partial
 from typing import Any, Dict, Optional
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, stream_with_context
 from flask_cors import CORS
+from graphql.error import GraphQLSyntaxError
+from sqlalchemy import create_engine
 
-from app.extensions import db, migrate
+from app import events, outbox
+from app.extensions import db, migrate, use_session
+from app.db_pool import configure_engine, engine_options, pool_registry
 from app.graphql.schema import schema
+from app.graphql.documents import PersistedQueryError, document_cache, select_operation
+from app.graphql.loaders import Loaders
+from app.auth import request_role, request_subject
+from app.replicas import ReplicaRouter, WriteWindows
+from app.response_cache import RedisBackend, response_cache
+from app.subscriptions import (
+    MAX_PENDING_EVENTS, SubscriptionError, SubscriptionStream, event_stream, offer, stream_params,
+)
+from app.telemetry import TRACING_HEADER, RequestTrace, install_sql_hooks, operation_label, resolver_timer
 from app.cli import register_cli
 from app.routes.main import api as api_bp
 
+# Browser origins allowed to call /graphql and /api/* (also used by app.asgi).
+FRONTEND_ORIGINS = ["http://localhost:3000"]
+
+
+def graphql_payload(result: Any) -> Dict[str, Any]:
+    """JSON body for an ExecutionResult."""
+    payload: Dict[str, Any] = {}
+    if result.errors:
+        payload["errors"] = [str(err) for err in result.errors]
+    if result.data:
+        payload["data"] = result.data
+    if result.extensions:
+        payload["extensions"] = result.extensions
+    return payload
+
 
 def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
     """Application factory."""
@@ -21,11 +51,49 @@ def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
     if config_override:
         app.config.update(config_override)
 
+    # Pool sizing, pre-ping, recycling and statement timeouts (app/db_pool.py)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+
     # --------------------------------------------------------------------- #
     #  Extensions
     # --------------------------------------------------------------------- #
     db.init_app(app)
     migrate.init_app(app, db)
+    install_sql_hooks()
+    with app.app_context():
+        configure_engine(db.engine, app.config)
+        pool_registry.register("default", db.engine)
+
+    # Change events for subscriptions, sent when the writing transaction
+    # commits, and recorded by that transaction for `flask run-outbox`
+    events.install()
+    outbox.install()
+    outbox.load_handlers(app.config.get("OUTBOX_HANDLER_MODULES") or ())
+    events.configure(
+        app.config.get("EVENTS_DATABASE_URL") or app.config["SQLALCHEMY_DATABASE_URI"],
+        app.config.get("EVENT_BUS", "auto"),
+    )
+
+    # Read replicas for GraphQL queries (app/replicas.py)
+    replica_engines = [
+        create_engine(url, **app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        for url in app.config.get("SQLALCHEMY_REPLICA_URIS") or ()
+    ]
+    for index, engine in enumerate(replica_engines):
+        configure_engine(engine, app.config)
+        pool_registry.register(f"replica-{index}", engine)
+    sticky_seconds = app.config.get("READ_YOUR_WRITES_SECONDS", 5)
+    replicas = app.extensions["replicas"] = ReplicaRouter(
+        replica_engines,
+        sticky_seconds=sticky_seconds,
+        check_interval=app.config.get("REPLICA_CHECK_INTERVAL", 10),
+        retry_after=app.config.get("REPLICA_RETRY_AFTER", 30),
+        # shared by all workers when the response cache is on Redis
+        windows=WriteWindows(
+            sticky_seconds,
+            client=response_cache.backend.client if isinstance(response_cache.backend, RedisBackend) else None,
+        ),
+    )
 
     # --------------------------------------------------------------------- #
     #  CORS – allow React dev server to reach /graphql and /api/*
@@ -33,11 +101,11 @@ def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
     CORS(
         app,
         resources={
-            r"/graphql": {"origins": ["http://localhost:3000"]},
-            r"/api/*":   {"origins": ["http://localhost:3000"]},
+            r"/graphql": {"origins": FRONTEND_ORIGINS},
+            r"/api/*":   {"origins": FRONTEND_ORIGINS},
         },
         supports_credentials=True,
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", TRACING_HEADER],
         expose_headers=["Content-Type"],
         max_age=86400,          # cache pre-flight for a day
         send_wildcard=False,    # return the exact origin, not '*'
@@ -65,19 +133,102 @@ def create_app(config_override: Optional[Dict[str, Any]] = None) -> Flask:
          #   return "", 200
 
         data = request.get_json(silent=True) or {}
-        result = schema.execute(
-            data.get("query"),
-            variable_values=data.get("variables"),
-            operation_name=data.get("operationName"),
-            context_value={"session": db.session, "request": request},
+
+        # Automatic Persisted Queries: the body may carry only a hash.
+        try:
+            query = document_cache.resolve(data.get("query"), data.get("extensions"))
+        except PersistedQueryError as err:
+            return jsonify({"errors": [err.as_dict()]}), 200
+
+        # Parsed and validated documents are cached by query text.
+        document = None
+        if isinstance(query, str):
+            try:
+                document = document_cache.document_from_string(schema, query)
+            except GraphQLSyntaxError:
+                pass  # reported by schema.execute below
+
+        # Apollo-style resolver timings in extensions.tracing, on request.
+        tracing = bool(app.config.get("GRAPHQL_TRACING") and request.headers.get(TRACING_HEADER))
+
+        # Read-only queries over rarely changing data are served whole from
+        # the response cache; writers invalidate by entity tag.
+        plan = None if tracing else response_cache.plan(
+            schema, query, data.get("variables"), data.get("operationName"), request_role(),
+            document=document.document_ast if document is not None else None,
         )
+        if plan is not None:
+            cached = response_cache.get(plan)
+            if cached is not None:
+                return app.response_class(cached, mimetype="application/json", headers={"X-Cache": "HIT"})
+
+        def execute(session):
+            with use_session(session):
+                return schema.execute(
+                    query,
+                    backend=document_cache,
+                    variable_values=data.get("variables"),
+                    operation_name=data.get("operationName"),
+                    context_value={
+                        "session": session,
+                        "request": request,
+                        "loaders": Loaders(session),
+                    },
+                    middleware=[resolver_timer],
+                )
+
+        operation = None
+        if document is not None:
+            operation = select_operation(document.document_ast, data.get("operationName"))
+
+        # Queries go to a read replica unless the caller just wrote, or the
+        # response is about to be cached right after an invalidation (see
+        # app/replicas.py).
+        # Development: log statement shapes that repeat within the request.
+        repeats = app.config.get("N_PLUS_ONE_WARN_THRESHOLD", 0) if app.debug else 0
 
-        payload: Dict[str, Any] = {}
-        if result.errors:
-            payload["errors"] = [str(err) for err in result.errors]
-        if result.data:
-            payload["data"] = result.data
-        return jsonify(payload), 200
+        subject = request_subject() if replicas.engines else None
+        with RequestTrace(tracing, fingerprints=bool(repeats)) as trace:
+            if operation is not None and operation.operation == "query":
+                result = replicas.run_query(execute, db.session, subject, cacheable=plan is not None)
+            else:
+                result = execute(db.session)
+        tracing_extension = trace.finish(*operation_label(operation), result.errors, warn_repeats=repeats)
+
+        payload = graphql_payload(result)
+        if tracing_extension:
+            payload["extensions"] = {**payload.get("extensions", {}), **tracing_extension}
+        if plan is not None:
+            response_cache.store(plan, payload)
+            response = jsonify(payload)
+            response.headers["X-Cache"] = "MISS"
+        else:
+            response = jsonify(payload)
+        if operation is not None and operation.operation == "mutation":
+            # read-your-writes: this subject's next reads go to the primary
+            replicas.record_write(subject)
+        return response
+
+    @app.route("/graphql/stream", methods=["GET", "POST"])
+    def graphql_stream() -> Any:
+        # Subscriptions over Server-Sent Events (app/subscriptions.py)
+        try:
+            stream = SubscriptionStream(stream_params(request.args, request.get_json(silent=True)))
+        except SubscriptionError as err:
+            return jsonify(err.as_payload()), 400
+
+        inbox: "queue.Queue[events.Event]" = queue.Queue(MAX_PENDING_EVENTS)
+        unsubscribe = events.event_bus.subscribe(partial(offer, inbox))
+        body = event_stream(
+            stream, inbox, app.config.get("SUBSCRIPTION_HEARTBEAT_SECONDS", 15),
+            after_event=db.session.remove,  # don't hold a connection between events
+            close=unsubscribe,
+        )
+        return app.response_class(
+            stream_with_context(body),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     # --------------------------------------------------------------------- #
     return app
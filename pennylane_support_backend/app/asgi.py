@@ -0,0 +1,387 @@
+"""
+ASGI entry point (see asgi.py at the project root).
+
+Requests go to the Flask app through a2wsgi's WSGIMiddleware (a thread
+pool), exactly as under a WSGI server, except:
+
+* Subscription streams (/graphql/stream) are served on the event loop, so
+  an idle stream holds no thread; each event is rendered in a worker thread.
+* With ASGI_ASYNC_QUERIES=1, read-only GraphQL queries run on the event
+  loop: the root list resolvers each get their own AsyncSession (asyncpg /
+  aiosqlite), so sibling fields query the database concurrently, and JWKS
+  downloads for the cache role run in a worker thread.  With read replicas
+  configured, those queries use a replica's async engine (see app.replicas
+  for the routing rules).  The resolvers themselves are still synchronous
+  (AsyncSession.run_sync), and on SQLite this path measured slower than the
+  threaded bridge, so it is off until scripts/bench_asgi.py against
+  PostgreSQL shows a gain.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from urllib.parse import parse_qsl
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+from graphql.error import GraphQLSyntaxError
+from graphql.execution.executors.asyncio import AsyncioExecutor
+from graphql.language import ast
+from promise import Promise
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_cookie
+
+from app import FRONTEND_ORIGINS, create_app, events, graphql_payload
+from app.auth import find_token, token_role, token_subject
+from app.db_pool import async_engine_options, pool_registry
+from app.replicas import ReplicaSet
+from app.extensions import db, use_session
+from app.graphql.documents import PersistedQueryError, document_cache, select_operation
+from app.graphql.eager import field_nodes, fully_eager
+from app.graphql.schema import schema
+from app.response_cache import response_cache
+from app.subscriptions import (
+    HEARTBEAT, MAX_PENDING_EVENTS, OPENING, SubscriptionError, SubscriptionStream, offer, stream_params,
+)
+from app.telemetry import TRACING_HEADER, RequestTrace, operation_label, resolver_timer
+
+# Root Query fields whose resolvers can run on an async session: they take
+# their session from current_session() and eager-load what they return.
+ASYNC_ROOT_FIELDS = frozenset({
+    "challenges",
+    "challenge",
+    "challengesPaged",
+    "conversationsByChallenge",
+    "conversationsPaged",
+    "conversationCategories",
+    "assignedUsers",
+    "tags",
+})
+
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The same database through its async driver (asyncpg / aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _create_engine(config: Any, url: Optional[str] = None) -> AsyncEngine:
+    url, options = async_engine_options(
+        {**config, "SQLALCHEMY_DATABASE_URI": async_database_url(url or config["SQLALCHEMY_DATABASE_URI"])}
+    )
+    return create_async_engine(url, **options)
+
+
+class AsyncRootResolvers:
+    """
+    Graphene middleware: run ASYNC_ROOT_FIELDS resolvers inside
+    AsyncSession.run_sync on a session of their own.  With AsyncioExecutor
+    each one is a task, so sibling root fields run concurrently.
+
+    Requests routed to a replica carry its session factory in the context
+    ("replica_sessions"); a replica that fails with a database
+    error is marked down and the field re-runs on the primary.
+    """
+
+    def __init__(self, sessions: sessionmaker, replicas: Optional[ReplicaSet] = None) -> None:
+        self.sessions = sessions
+        self.replicas = replicas
+
+    def resolve(self, next_, root, info, **args):
+        if info.parent_type is not info.schema.get_query_type() or info.field_name not in ASYNC_ROOT_FIELDS:
+            return next_(root, info, **args)
+        return self._run(next_, root, info, args)
+
+    async def _run(self, next_, root, info, args):
+        replica = info.context.get("replica_sessions")
+        if replica is None:
+            return await self._call(self.sessions, next_, root, info, args)
+        try:
+            return await self._call(replica, next_, root, info, args)
+        except exc.OperationalError:
+            self.replicas.mark_down(replica)
+            return await self._call(self.sessions, next_, root, info, args)
+
+    @staticmethod
+    async def _call(sessions: sessionmaker, next_, root, info, args):
+        def _resolve(sync_session):
+            with use_session(sync_session):
+                return next_(root, info, **args)
+
+        async with sessions() as session:
+            return await session.run_sync(_resolve)
+
+
+def runs_async(document_ast: ast.Document, operation_name: Optional[str]) -> bool:
+    """True for queries whose every root field and relationship the async path covers."""
+    operation = select_operation(document_ast, operation_name)
+    if operation is None or operation.operation != "query":
+        return False
+    fragments = {d.name.value: d for d in document_ast.definitions if isinstance(d, ast.FragmentDefinition)}
+    query_type = schema.get_query_type()
+    roots = field_nodes(operation.selection_set, fragments)
+    if not roots or any(f.name.value not in ASYNC_ROOT_FIELDS for f in roots):
+        return False
+    return fully_eager(query_type, operation.selection_set, fragments)
+
+
+class GraphQLASGIApp:
+    """ASGI 3 application wrapping the Flask app; see the module docstring."""
+
+    def __init__(self, flask_app: Flask, engine: Any = None) -> None:
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config["ASGI_WSGI_THREADS"])
+        self.async_queries = bool(flask_app.config.get("ASGI_ASYNC_QUERIES"))
+        self.engine = engine or _create_engine(flask_app.config)
+        pool_registry.register("async", self.engine.sync_engine)
+        self.sessions = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.replica_engines = [
+            _create_engine(flask_app.config, url) for url in flask_app.config.get("SQLALCHEMY_REPLICA_URIS") or ()
+        ]
+        for index, replica in enumerate(self.replica_engines):
+            pool_registry.register(f"async-replica-{index}", replica.sync_engine)
+        self.replicas = ReplicaSet(
+            [sessionmaker(e, class_=AsyncSession, expire_on_commit=False) for e in self.replica_engines],
+            retry_after=flask_app.config.get("REPLICA_RETRY_AFTER", 30),
+        ) if self.replica_engines else None
+        self.middleware = AsyncRootResolvers(self.sessions, self.replicas)
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        if scope["path"] == "/graphql/stream" and scope["method"] in ("GET", "POST"):
+            await self._stream(scope, await _read_body(receive), receive, send)
+            return
+        if scope["path"] == "/graphql" and scope["method"] == "POST" and self.async_queries:
+            body = await _read_body(receive)
+            if await self._graphql(scope, body, send):
+                return
+            receive = _replay(body, receive)
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for engine in [self.engine, *self.replica_engines]:
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------------ #
+    #  Async GraphQL
+    # ------------------------------------------------------------------ #
+    async def _graphql(self, scope: Dict[str, Any], body: bytes, send) -> bool:
+        """Serve the request on the event loop; False leaves it to Flask."""
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return False
+        if not isinstance(data, dict):
+            return False
+
+        headers = _headers(scope)
+        try:
+            query = document_cache.resolve(data.get("query"), data.get("extensions"))
+        except PersistedQueryError as err:
+            await self._json(send, headers, {"errors": [err.as_dict()]})
+            return True
+        if not isinstance(query, str):
+            return False
+        try:
+            document = document_cache.document_from_string(schema, query)
+        except GraphQLSyntaxError:
+            return False
+        operation_name = data.get("operationName")
+        if not runs_async(document.document_ast, operation_name):
+            return False
+
+        # A cold JWKS means a blocking download; keep it off the loop.
+        cookies = parse_cookie(headers.get("Cookie", ""))
+        token = find_token(headers, cookies)
+        role, subject = await asyncio.to_thread(_caller, token) if token else ("anonymous", None)
+        tracing = bool(self.flask_app.config.get("GRAPHQL_TRACING") and headers.get(TRACING_HEADER))
+        plan = None if tracing else response_cache.plan(
+            schema, query, data.get("variables"), operation_name, role, document=document.document_ast,
+        )
+        if plan is not None:
+            cached = response_cache.get(plan)
+            if cached is not None:
+                await self._json(send, headers, cached, cache_state="HIT")
+                return True
+
+        # Same rules as the Flask view (app/replicas.py)
+        replica = None
+        router = self.flask_app.extensions["replicas"]
+        if self.replicas is not None and not router.reads_from_primary(subject, cacheable=plan is not None):
+            replica = self.replicas.pick()
+
+        repeats = self.flask_app.config.get("N_PLUS_ONE_WARN_THRESHOLD", 0) if self.flask_app.debug else 0
+        with RequestTrace(tracing, fingerprints=bool(repeats)) as trace:
+            result = schema.execute(
+                query,
+                backend=document_cache,
+                executor=AsyncioExecutor(loop=asyncio.get_running_loop()),
+                return_promise=True,
+                variable_values=data.get("variables"),
+                operation_name=operation_name,
+                context_value={"request": None, "replica_sessions": replica},
+                middleware=[resolver_timer, self.middleware],
+            )
+            if isinstance(result, Promise):
+                result = await result
+        operation = select_operation(document.document_ast, operation_name)
+        tracing_extension = trace.finish(*operation_label(operation), result.errors, warn_repeats=repeats)
+
+        payload = graphql_payload(result)
+        if tracing_extension:
+            payload["extensions"] = {**payload.get("extensions", {}), **tracing_extension}
+        if plan is not None:
+            await self._json(send, headers, response_cache.store(plan, payload) or payload, cache_state="MISS")
+        else:
+            await self._json(send, headers, payload)
+        return True
+
+    async def _json(self, send, request_headers: Headers, payload: Any, cache_state: Optional[str] = None,
+                    status: int = 200) -> None:
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        headers = [("Content-Type", "application/json")]
+        if cache_state:
+            headers.append(("X-Cache", cache_state))
+        await _respond(send, status, headers + _cors_headers(request_headers), body.encode("utf-8"))
+
+    # ------------------------------------------------------------------ #
+    #  Subscriptions (Server-Sent Events)
+    # ------------------------------------------------------------------ #
+    async def _stream(self, scope: Dict[str, Any], body: bytes, receive, send) -> None:
+        headers = _headers(scope)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        try:
+            args = MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            stream = SubscriptionStream(stream_params(args, data if isinstance(data, dict) else None))
+        except SubscriptionError as err:
+            await self._json(send, headers, err.as_payload(), status=400)
+            return
+
+        loop = asyncio.get_running_loop()
+        inbox: "asyncio.Queue[events.Event]" = asyncio.Queue(MAX_PENDING_EVENTS)
+        unsubscribe = events.event_bus.subscribe(lambda event: loop.call_soon_threadsafe(offer, inbox, event))
+        heartbeat = self.flask_app.config.get("SUBSCRIPTION_HEARTBEAT_SECONDS", 15)
+        disconnected = asyncio.ensure_future(receive())  # the body is read; next comes http.disconnect
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (k.lower().encode("latin-1"), v.encode("latin-1"))
+                    for k, v in [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache"),
+                                 *_cors_headers(headers)]
+                ],
+            })
+            await _send_chunk(send, OPENING)
+            while not disconnected.done():
+                getter = asyncio.ensure_future(inbox.get())
+                done, _ = await asyncio.wait({getter, disconnected}, timeout=heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    if not disconnected.done():
+                        await _send_chunk(send, HEARTBEAT)
+                    continue
+                for frame in await asyncio.to_thread(self._render, stream, getter.result()):
+                    await _send_chunk(send, frame)
+        finally:
+            unsubscribe()
+            stream.close()
+            disconnected.cancel()
+
+    def _render(self, stream: SubscriptionStream, event: events.Event) -> List[str]:
+        with self.flask_app.app_context():
+            try:
+                return stream.push(event)
+            finally:
+                db.session.remove()
+
+
+async def _read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return bytes(body)
+
+
+def _caller(token: str) -> Tuple[str, Optional[str]]:
+    """Cache role and subject of a token (may fetch the JWKS)."""
+    return token_role(token), token_subject(token)
+
+
+def _replay(body: bytes, receive):
+    """`receive` for the WSGI app when this app has already read the request body."""
+    replayed = False
+
+    async def replay() -> Dict[str, Any]:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return replay
+
+
+async def _send_chunk(send, text: str) -> None:
+    await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+
+
+def _headers(scope: Dict[str, Any]) -> Headers:
+    return Headers([(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope.get("headers", ())])
+
+
+def _cors_headers(request_headers: Headers) -> List[Tuple[str, str]]:
+    origin = request_headers.get("Origin")
+    if origin not in FRONTEND_ORIGINS:
+        return []
+    return [
+        ("Access-Control-Allow-Origin", origin),
+        ("Access-Control-Allow-Credentials", "true"),
+        ("Access-Control-Expose-Headers", "Content-Type"),
+        ("Vary", "Origin"),
+    ]
+
+
+async def _respond(send, status: int, headers: Iterable[Tuple[str, str]], body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(config_override: Optional[Dict[str, Any]] = None, engine: Any = None) -> GraphQLASGIApp:
+    """ASGI counterpart of create_app()."""
+    return GraphQLASGIApp(create_app(config_override), engine=engine)
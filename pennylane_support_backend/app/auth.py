@@ -3,8 +3,9 @@ from __future__ import annotations
 import json
 import os
 import ssl
+import time
 from functools import wraps
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from flask import g, request
 from urllib.error import URLError
@@ -13,38 +14,80 @@ from urllib.request import urlopen
 # Use python-jose for JWT handling
 from jose import jwt, JWTError, ExpiredSignatureError
 
+from app.identity import resolve_user_id
+from app.jwks import JWKSCache, parse_max_age
+from app.telemetry import jwks_fetch_seconds, jwt_verify_seconds
+from app.token_cache import VerifiedTokenCache
+
 
 AUTH0_DOMAIN: str = os.getenv("AUTH0_DOMAIN", "")
 API_IDENTIFIER: str = os.getenv("API_IDENTIFIER", "")
 ALGORITHMS: List[str] = os.getenv("ALGORITHMS", "RS256").split(",")
 NAMESPACE: str = os.getenv("AUTH0_NAMESPACE", "https://pennylane.app/")
 SKIP_TLS: bool = os.getenv("FLASK_SKIP_TLS_VERIFY") == "1"
+# Seconds to wait on the identity provider before giving up (cached keys keep serving)
+FETCH_TIMEOUT: float = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
 
 
-def _download_json(url: str) -> Dict[str, Any]:
-    def _open(ctx: Optional[ssl.SSLContext]) -> bytes:
-        return urlopen(url, context=ctx).read()
+def _download(url: str) -> Tuple[bytes, Any]:
+    """Return the response body and headers, with robust SSL handling."""
+    def _open(ctx: Optional[ssl.SSLContext]) -> Tuple[bytes, Any]:
+        with urlopen(url, context=ctx, timeout=FETCH_TIMEOUT) as resp:
+            return resp.read(), resp.headers
 
     try:
         # If SKIP_TLS is set, use an unverified context (for dev only!)
         if SKIP_TLS:
             ctx = ssl._create_unverified_context()  # type: ignore[attr-defined]
-            return json.loads(_open(ctx))
+            return _open(ctx)
         # Try with the default context first
-        return json.loads(_open(None))
+        return _open(None)
     except URLError as err:
         # On macOS the default CA bundle might be missing; retry with certifi
         if isinstance(getattr(err, "reason", None), ssl.SSLCertVerificationError):
             try:
                 import certifi
                 ctx = ssl.create_default_context(cafile=certifi.where())
-                return json.loads(_open(ctx))
+                return _open(ctx)
             except Exception:
                 pass
         # Re-raise if we cannot recover
         raise
 
 
+def _download_json(url: str) -> Dict[str, Any]:
+    body, _headers = _download(url)
+    return json.loads(body)
+
+
+def _download_jwks(url: str) -> Tuple[Dict[str, Any], Optional[int]]:
+    """JWKS fetcher for JWKSCache: the document plus its Cache-Control max-age."""
+    start = time.perf_counter()
+    try:
+        body, headers = _download(url)
+    finally:
+        jwks_fetch_seconds.observe(time.perf_counter() - start)
+    cache_control = headers.get("Cache-Control") if headers is not None else None
+    return json.loads(body), parse_max_age(cache_control)
+
+
+# One key store for the whole process; see app.jwks.JWKSCache.
+jwks_cache = JWKSCache(
+    f"https://{AUTH0_DOMAIN}/.well-known/jwks.json",
+    _download_jwks,
+    default_ttl=float(os.getenv("JWKS_CACHE_TTL", "600")),
+    refresh_ahead=float(os.getenv("JWKS_REFRESH_AHEAD", "60")),
+    min_refetch_interval=float(os.getenv("JWKS_MIN_REFETCH_INTERVAL", "30")),
+    fetch_timeout=FETCH_TIMEOUT,
+)
+
+# Verified-token cache; set TOKEN_CACHE_SIZE=0 to verify every request.
+token_cache = VerifiedTokenCache(
+    max_size=int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+    skew=float(os.getenv("TOKEN_CACHE_SKEW", "30")),
+)
+
+
 class AuthError(Exception):
     """Standardised error raised on authentication/authorization failures."""
     def __init__(self, error: Dict[str, str], status_code: int) -> None:
@@ -61,24 +104,33 @@ def _extract_bearer(header_value: Optional[str]) -> Optional[str]:
         return parts[1]
     return None
 
-def get_token_auth_header() -> str:
+def find_token(headers: Any, cookies: Any) -> Optional[str]:
     """Return the JWT from the Authorization header, an alternate header,
-    or from a cookie.  Raises AuthError if no token can be found."""
+    or from a cookie; None if there is none."""
     # 1) Standard Authorization header
-    token = _extract_bearer(request.headers.get("Authorization"))
+    token = _extract_bearer(headers.get("Authorization"))
     if token:
         return token
 
     # 2) Alternate header names (belt & suspenders)
-    alt = request.headers.get("X-Access-Token") or request.headers.get("x-access-token")
+    alt = headers.get("X-Access-Token") or headers.get("x-access-token")
     if alt and alt.strip():
         return alt.strip()
 
     # 3) Common cookie names (if tokens are stored in cookies)
     for name in ("access_token", "accessToken", "access-token"):
-        cookie_val = request.cookies.get(name)
+        cookie_val = cookies.get(name)
         if cookie_val:
             return cookie_val
+    return None
+
+
+def get_token_auth_header() -> str:
+    """Return the request's JWT (see find_token).  Raises AuthError if no
+    token can be found."""
+    token = find_token(request.headers, request.cookies)
+    if token:
+        return token
 
     # If nothing is found, raise an error
     raise AuthError(
@@ -88,6 +140,102 @@ def get_token_auth_header() -> str:
     )
 
 
+def _verify_token(token: str) -> Dict[str, Any]:
+    """Check the token's signature and claims; return its payload."""
+    # Validate token header and find matching JWK
+    unverified_header = jwt.get_unverified_header(token)
+    kid = unverified_header.get("kid")
+    if not kid:
+        raise AuthError(
+            {"code": "invalid_header",
+             "description": "Invalid token header."},
+            401,
+        )
+    # Keys come from the process-wide cache (refetched on unknown kid)
+    rsa_key = jwks_cache.get_key(kid)
+    if not rsa_key:
+        raise AuthError(
+            {"code": "invalid_header",
+             "description": "Unable to find matching JWKS key."},
+            401,
+        )
+
+    # Validate and decode the JWT using python-jose
+    start = time.perf_counter()
+    try:
+        payload = jwt.decode(
+            token,
+            rsa_key,
+            algorithms=ALGORITHMS,
+            audience=API_IDENTIFIER,
+            issuer=f"https://{AUTH0_DOMAIN}/",
+        )
+    except ExpiredSignatureError:
+        raise AuthError(
+            {"code": "token_expired",
+             "description": "Token expired."},
+            401,
+        )
+    except JWTError as e:
+        # All other JWT errors (invalid claims, bad signature, etc.)
+        raise AuthError(
+            {"code": "invalid_header",
+             "description": str(e)},
+            401,
+        )
+    finally:
+        jwt_verify_seconds.observe(time.perf_counter() - start)
+    return payload
+
+
+def _cached_payload(token: str) -> Dict[str, Any]:
+    """Reuse claims for a token we already verified (bounded LRU, expires at
+    the token's exp and on JWKS rotation)."""
+    payload = token_cache.get(token, jwks_cache.generation)
+    if payload is None:
+        payload = _verify_token(token)
+        token_cache.put(token, payload, jwks_cache.generation)
+    return payload
+
+
+def request_role() -> str:
+    """
+    Coarse caller identity for cache keys: "anonymous" without a valid
+    token, otherwise "user" followed by the caller's sorted roles.
+    Never raises.
+    """
+    return token_role(find_token(request.headers, request.cookies))
+
+
+def token_role(token: Optional[str]) -> str:
+    """request_role() for a token found outside a Flask request.  May fetch
+    the JWKS, so async callers should run it in a thread."""
+    if not token:
+        return "anonymous"
+    try:
+        payload = _cached_payload(token)
+    except Exception:
+        return "anonymous"
+    ns = (NAMESPACE or "https://pennylane.app/").rstrip("/") + "/"
+    return ":".join(["user", *sorted(payload.get(f"{ns}roles", []) or [])])
+
+
+def token_subject(token: Optional[str]) -> Optional[str]:
+    """The verified token's `sub`, or None without a valid token.  Never
+    raises; may fetch the JWKS like token_role()."""
+    if not token:
+        return None
+    try:
+        return _cached_payload(token).get("sub")
+    except Exception:
+        return None
+
+
+def request_subject() -> Optional[str]:
+    """token_subject() for the current Flask request."""
+    return token_subject(find_token(request.headers, request.cookies))
+
+
 def requires_auth(_fn=None, *, required_role: Optional[str] = None):
     """
     Decorator to enforce JWT authentication (and optional role gating).
@@ -101,49 +249,7 @@ def requires_auth(_fn=None, *, required_role: Optional[str] = None):
             # Fetch the bearer token
             token = get_token_auth_header()
 
-            # Fetch JWKS with robust SSL handling
-            jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-            jwks = _download_json(jwks_url)
-
-            # Validate token header and find matching JWK
-            unverified_header = jwt.get_unverified_header(token)
-            kid = unverified_header.get("kid")
-            if not kid:
-                raise AuthError(
-                    {"code": "invalid_header",
-                     "description": "Invalid token header."},
-                    401,
-                )
-            rsa_key = next((k for k in jwks["keys"] if k["kid"] == kid), None)
-            if not rsa_key:
-                raise AuthError(
-                    {"code": "invalid_header",
-                     "description": "Unable to find matching JWKS key."},
-                    401,
-                )
-
-            # Validate and decode the JWT using python-jose
-            try:
-                payload = jwt.decode(
-                    token,
-                    rsa_key,
-                    algorithms=ALGORITHMS,
-                    audience=API_IDENTIFIER,
-                    issuer=f"https://{AUTH0_DOMAIN}/",
-                )
-            except ExpiredSignatureError:
-                raise AuthError(
-                    {"code": "token_expired",
-                     "description": "Token expired."},
-                    401,
-                )
-            except JWTError as e:
-                # All other JWT errors (invalid claims, bad signature, etc.)
-                raise AuthError(
-                    {"code": "invalid_header",
-                     "description": str(e)},
-                    401,
-                )
+            payload = _cached_payload(token)
 
             ns = (NAMESPACE or "https://pennylane.app/").rstrip("/") + "/" 
             g.current_user = {                                        
@@ -162,6 +268,12 @@ def requires_auth(_fn=None, *, required_role: Optional[str] = None):
                     403,
                 )
 
+            # Local User.id for the subject, cached process-wide (app/identity.py);
+            # only authorized callers get a users row
+            if g.current_user["sub"]:
+                g.user_id = resolve_user_id(g.current_user)
+                g.user_sub = g.current_user["sub"]
+
             # Call the wrapped function
             return func(*args, **kwargs)
 
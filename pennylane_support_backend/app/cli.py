@@ -1,9 +1,25 @@
+import hashlib
+import io
 import json
-from datetime import datetime
+import multiprocessing
+import re
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
 import click
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from app import outbox
+from app.counts import count_cache
+from app.response_cache import bulk_tags, response_cache
+from app.services import stats_service
 from app.extensions import db
 from app.models.challenge import (
     Challenge,
@@ -37,160 +53,605 @@ def _parse_iso(ts: str | None):
     except Exception:
         return None
 
-# ---------- core loaders ----------
+_WS = " \t\r\n"
+_NUMBER_TAIL = re.compile(r"[0-9eE.+\-]*\Z")
 
-def _seed_challenges_from_json(path: str, chunk_size: int = 1000):
-    click.echo(f"Loading challenges JSON from: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+class _JSONStream:
+    """
+    Minimal pull reader over a text file: decodes one JSON value at a time
+    with `raw_decode`, refilling the buffer as needed, so only the current
+    value is ever held in memory.
+    """
 
-    items = raw.get("coding_challenges", [])
-    if not items:
-        click.echo("No 'coding_challenges' found. Skipping.")
+    def __init__(self, f, read_size: int = 1 << 16):
+        self._f = f
+        self._read_size = read_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._f.read(self._read_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected {char!r}, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut at the buffer edge ("12" of "12.5e3") decodes fine;
+            # read on until something other than number characters follows.
+            if _NUMBER_TAIL.match(self._buf, end) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+def _iter_json_array(f, key: str, read_size: int = 1 << 16):
+    """
+    Yield the items of the top-level `key` array of a JSON object one by one.
+    Other top-level members are decoded and discarded.
+    """
+    stream = _JSONStream(f, read_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        name = stream.value()
+        stream.expect(":")
+        if name == key and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.expect(",")
+                        continue
+                    stream.expect("]")
+                    break
+        else:
+            stream.value()
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("}")
         return
 
-    # Tags
-    tag_names = set()
-    for c in items:
-        for t in c.get("tags", []):
-            tag_names.add(t.strip())
-
-    if tag_names:
-        tag_rows = [{"name": n} for n in tag_names if n]
-        for batch in _chunks(tag_rows, chunk_size):
-            stmt = pg_insert(Tag.__table__).values(batch)
-            stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
-            db.session.execute(stmt)
+def _content_hash(item) -> str:
+    """Stable digest of one export item (key order and whitespace don't matter)."""
+    canonical = json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _split_changed(records, column, hash_column, force=False):
+    """
+    Drop transformed records whose stored content hash matches.  Returns the
+    remaining records and the keys that already exist (whose imported
+    children must be replaced).
+
+    Rows stored before content hashes existed (hash NULL) only get their
+    hash filled in: they come back marked `keep_children`, so their children
+    are neither deleted nor written again.  --force replaces them as well.
+    """
+    stored = dict(db.session.execute(
+        select(column, hash_column).where(column.in_([r["key"] for r in records]))
+    ).all())
+    changed, existing = [], set()
+    for r in records:
+        if r["key"] not in stored:
+            changed.append(r)
+        elif force or stored[r["key"]] not in (None, r["hash"]):
+            changed.append(r)
+            existing.add(r["key"])
+        elif stored[r["key"]] is None:
+            changed.append(dict(r, keep_children=True))
+    return changed, existing
+
+def _insert(table, dialect_name: str | None = None):
+    """Dialect-specific INSERT supporting ON CONFLICT (PostgreSQL, SQLite)."""
+    if (dialect_name or db.session.get_bind().dialect.name) == "sqlite":
+        return sqlite_insert(table)
+    return pg_insert(table)
+
+ENGINES = ("insert", "copy")
+
+class _LoadStats:
+    """Rows and wall time per table (or phase), reported as rows/sec."""
+
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def add(self, table: str, rows: int, seconds: float) -> None:
+        with self._lock:
+            total_rows, total_seconds = self._tables.get(table, (0, 0.0))
+            self._tables[table] = (total_rows + rows, total_seconds + seconds)
+
+    @contextmanager
+    def timed(self, table: str, rows: int):
+        start = time.perf_counter()
+        yield
+        self.add(table, rows, time.perf_counter() - start)
+
+    def rows(self, table: str) -> int:
+        return self._tables.get(table, (0, 0.0))[0]
+
+    def report(self) -> None:
+        for table, (rows, seconds) in self._tables.items():
+            rate = rows / seconds if seconds > 0 else 0.0
+            click.echo(f"  {table}: {rows} rows in {seconds:.2f}s ({rate:,.0f} rows/s)")
+
+def _copy_field(value) -> str:
+    # COPY csv: unquoted empty is NULL, anything quoted is a value
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _copy_csv(rows, columns) -> io.StringIO:
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(",".join(_copy_field(row.get(c)) for c in columns))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+class _ChildWriter:
+    """
+    Append-only writer for child rows (posts, hints, learning objectives).
 
-    tag_map = dict(db.session.execute(select(Tag.name, Tag.id)).all())
+    engine="insert" runs one executemany INSERT per batch.  engine="copy"
+    streams each batch as CSV into a temporary staging table with COPY FROM
+    STDIN and merges it into the real table with a single INSERT ... SELECT
+    in `finish()`.
 
-    # Challenges
-    challenge_rows = []
+    Posts, hints and learning objectives have no natural key, so reruns stay
+    idempotent because the loaders delete a re-imported parent's children
+    before writing them again.  `ignore_conflicts` is for tables that do
+    have one (challenge_tags).
+
+    By default rows go through the ORM session's transaction.  A `dedicated`
+    writer checks out its own pooled connection and transaction so several
+    writers can load different tables from different threads; it commits in
+    `finish()`.
+    """
+
+    def __init__(self, table, columns, engine: str, stats: _LoadStats, *,
+                 ignore_conflicts: bool = False, dedicated: bool = False):
+        self.table = table
+        self.columns = list(columns)
+        self.engine = engine
+        self.stats = stats
+        self.ignore_conflicts = ignore_conflicts
+        self._staging = f"_stage_{table.name}"
+        self._staged = False
+        self._conn = self._trans = None
+        if dedicated:
+            self._conn = db.engine.connect()
+            self._trans = self._conn.begin()
+
+    def _connection(self):
+        return self._conn if self._conn is not None else db.session.connection()
+
+    def write(self, rows) -> None:
+        if not rows:
+            return
+        start = time.perf_counter()
+        conn = self._connection()
+        if self.engine == "copy":
+            if not self._staged:
+                cols = ", ".join(self.columns)
+                conn.execute(text(
+                    f"CREATE TEMP TABLE {self._staging} ON COMMIT DROP AS "
+                    f"SELECT {cols} FROM {self.table.name} WITH NO DATA"
+                ))
+                self._staged = True
+            with conn.connection.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {self._staging} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT csv)",
+                    _copy_csv(rows, self.columns),
+                )
+        else:
+            stmt = self.table.insert()
+            if self.ignore_conflicts:
+                stmt = _insert(self.table, conn.dialect.name).on_conflict_do_nothing()
+            conn.execute(stmt, rows)
+        self.stats.add(self.table.name, len(rows), time.perf_counter() - start)
+
+    def finish(self) -> None:
+        conn = self._connection()
+        if self._staged:
+            cols = ", ".join(self.columns)
+            on_conflict = " ON CONFLICT DO NOTHING" if self.ignore_conflicts else ""
+            with self.stats.timed(self.table.name, 0):
+                conn.execute(text(
+                    f"INSERT INTO {self.table.name} ({cols}) SELECT {cols} FROM {self._staging}{on_conflict}"
+                ))
+                conn.execute(text(f"DROP TABLE {self._staging}"))
+            self._staged = False
+        if self._trans is not None:
+            self._trans.commit()
+            self._close()
+
+    def abort(self) -> None:
+        if self._trans is not None:
+            self._trans.rollback()
+            self._close()
+
+    def _close(self) -> None:
+        self._conn.close()
+        self._conn = self._trans = None
+
+def _resolve_engine(engine: str) -> str:
+    """COPY is PostgreSQL-only; other databases fall back to INSERT."""
+    if engine == "copy" and db.session.get_bind().dialect.name != "postgresql":
+        click.echo("--engine copy requires PostgreSQL; falling back to insert.")
+        return "insert"
+    return engine
+
+def _concurrent_children(workers: int) -> bool:
+    """Child tables load on separate connections only where writers can run side by side."""
+    return workers > 1 and db.session.get_bind().dialect.name != "sqlite"
+
+# ---------- transform stage (runs in worker processes with --workers) ----------
+
+def _transform_challenges(items):
+    records = []
     for c in items:
-        challenge_rows.append({
-            "public_id": c["challenge_id"],
-            "title": c.get("title"),
-            "description": c.get("description"),
-            "category": c.get("category"),
-            "difficulty": c.get("difficulty"),
-            "points": c.get("points") or 0,
+        digest = _content_hash(c)
+        records.append({
+            "key": c["challenge_id"],
+            "hash": digest,
+            "row": {
+                "public_id": c["challenge_id"],
+                "title": c.get("title"),
+                "description": c.get("description"),
+                "category": c.get("category"),
+                "difficulty": c.get("difficulty"),
+                "points": c.get("points") or 0,
+                "content_hash": digest,
+            },
+            "tags": [t.strip() for t in c.get("tags", []) if t and t.strip()],
+            "learning_objectives": [lo for lo in c.get("learning_objectives", []) if lo],
+            "hints": [h for h in c.get("hints", []) if h],
         })
+    return records
 
-    for batch in _chunks(challenge_rows, chunk_size):
-        stmt = pg_insert(Challenge.__table__).values(batch)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["public_id"],
-            set_={
-                "title": stmt.excluded.title,
-                "description": stmt.excluded.description,
-                "category": stmt.excluded.category,
-                "difficulty": stmt.excluded.difficulty,
-                "points": stmt.excluded.points,
+def _transform_conversations(items):
+    records = []
+    for c in items:
+        digest = _content_hash(c)
+        records.append({
+            "key": c.get("identifier"),
+            "hash": digest,
+            "challenge": c.get("challenge_id"),
+            "row": {
+                "identifier": c.get("identifier"),
+                "topic": c.get("topic"),
+                "category": c.get("category"),
+                "status": c.get("status", "OPEN"),
+                "content_hash": digest,
             },
-        )
-        db.session.execute(stmt)
+            "posts": [{
+                "author_display_name": p.get("user"),
+                "content": p.get("content"),
+                "created_at": _parse_iso(p.get("timestamp")),
+                "imported": True,
+            } for p in c.get("posts", [])],
+        })
+    return records
 
-    chall_map = dict(db.session.execute(select(Challenge.public_id, Challenge.id)).all())
+def _transformed(items, transform, chunk_size: int, workers: int = 1):
+    """
+    Yield `transform(batch)` for each chunk of `items`, in source order.
+    With workers > 1 the transforms run in a process pool with at most
+    2 * workers batches in flight, so memory stays bounded by the chunk size.
+    """
+    batches = _chunks(items, chunk_size)
+    if workers <= 1:
+        for batch in batches:
+            yield transform(batch)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(transform, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-    # Learning objectives & hints
-    lo_rows, hint_rows = [], []
-    for c in items:
-        cid = chall_map.get(c["challenge_id"])
-        if not cid:
-            continue
-        for lo in c.get("learning_objectives", []):
-            if lo:
-                lo_rows.append({"challenge_id": cid, "text": lo})
-        for h in c.get("hints", []):
-            if h:
-                hint_rows.append({"challenge_id": cid, "text": h})
-
-    for batch in _chunks(lo_rows, chunk_size):
-        db.session.execute(LearningObjective.__table__.insert(), batch)
-    for batch in _chunks(hint_rows, chunk_size):
-        db.session.execute(ChallengeHint.__table__.insert(), batch)
-
-    # Challenge-Tag m2m
-    ct_rows = []
-    for c in items:
-        cid = chall_map.get(c["challenge_id"])
-        if not cid:
-            continue
-        for tname in c.get("tags", []):
-            tid = tag_map.get(tname)
-            if tid:
-                ct_rows.append({"challenge_id": cid, "tag_id": tid})
+def _timed_iter(iterable, phases: _LoadStats, phase: str):
+    """Attribute the time spent waiting on `iterable` to `phase`."""
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            batch = next(it)
+        except StopIteration:
+            return
+        phases.add(phase, len(batch), time.perf_counter() - start)
+        yield batch
 
-    for batch in _chunks(ct_rows, chunk_size):
-        stmt = pg_insert(ChallengeTag.__table__).values(batch)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["challenge_id", "tag_id"])
-        db.session.execute(stmt)
+def _run_all(threads, calls) -> None:
+    """Invoke each zero-argument callable; side by side when given a thread pool."""
+    if threads is None:
+        for call in calls:
+            call()
+        return
+    for future in [threads.submit(call) for call in calls]:
+        future.result()
+
+# ---------- core loaders ----------
+
+def _seed_challenges_from_json(path: str, chunk_size: int = 1000, engine: str = "insert",
+                               force: bool = False, workers: int = 1):
+    click.echo(f"Loading challenges JSON from: {path}")
+    engine = _resolve_engine(engine)
+    concurrent = _concurrent_children(workers)
+    stats, phases = _LoadStats(), _LoadStats()
+    writers = [
+        _ChildWriter(LearningObjective.__table__, ["challenge_id", "text"], engine, stats, dedicated=concurrent),
+        _ChildWriter(ChallengeHint.__table__, ["challenge_id", "text"], engine, stats, dedicated=concurrent),
+        _ChildWriter(
+            ChallengeTag.__table__, ["challenge_id", "tag_id"], engine, stats,
+            ignore_conflicts=True, dedicated=concurrent,
+        ),
+    ]
+    lo_writer, hint_writer, ct_writer = writers
+    threads = ThreadPoolExecutor(max_workers=len(writers)) if concurrent else None
+    n_seen = 0
+    tag_names = set()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            batches = _transformed(
+                _iter_json_array(f, "coding_challenges"), _transform_challenges, chunk_size, workers,
+            )
+            for records in _timed_iter(batches, phases, "parse+transform"):
+                n_seen += len(records)
+                with phases.timed("diff", len(records)):
+                    records, existing = _split_changed(records, Challenge.public_id, Challenge.content_hash, force)
+                if not records:
+                    continue
+
+                # Tags
+                batch_tags = {t for r in records for t in r["tags"]}
+                with phases.timed("tags", len(batch_tags)):
+                    if batch_tags:
+                        with stats.timed(Tag.__tablename__, len(batch_tags - tag_names)):
+                            stmt = _insert(Tag.__table__).values([{"name": n} for n in batch_tags])
+                            stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
+                            db.session.execute(stmt)
+                        tag_names |= batch_tags
+                    tag_map = dict(db.session.execute(
+                        select(Tag.name, Tag.id).where(Tag.name.in_(batch_tags))
+                    ).all())
+
+                # Challenges
+                with phases.timed("challenges", len(records)):
+                    challenge_rows = [r["row"] for r in records]
+                    with stats.timed(Challenge.__tablename__, len(challenge_rows)):
+                        stmt = _insert(Challenge.__table__).values(challenge_rows)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["public_id"],
+                            set_={
+                                "title": stmt.excluded.title,
+                                "description": stmt.excluded.description,
+                                "category": stmt.excluded.category,
+                                "difficulty": stmt.excluded.difficulty,
+                                "points": stmt.excluded.points,
+                                "content_hash": stmt.excluded.content_hash,
+                            },
+                        )
+                        db.session.execute(stmt)
+
+                    chall_map = dict(db.session.execute(
+                        select(Challenge.public_id, Challenge.id)
+                        .where(Challenge.public_id.in_([r["key"] for r in records]))
+                    ).all())
+
+                    # Changed challenges get their children replaced wholesale
+                    stale_ids = [chall_map[pid] for pid in existing if pid in chall_map]
+                    if stale_ids:
+                        for child in (LearningObjective, ChallengeHint, ChallengeTag):
+                            db.session.execute(child.__table__.delete().where(child.challenge_id.in_(stale_ids)))
+                    if concurrent:
+                        # children are written on other connections and must see these rows
+                        db.session.commit()
+
+                # Learning objectives, hints & challenge-tag m2m
+                lo_rows, hint_rows, ct_rows = [], [], []
+                for r in records:
+                    cid = chall_map.get(r["key"])
+                    if not cid or r.get("keep_children"):
+                        continue
+                    lo_rows.extend({"challenge_id": cid, "text": lo} for lo in r["learning_objectives"])
+                    hint_rows.extend({"challenge_id": cid, "text": h} for h in r["hints"])
+                    ct_rows.extend(
+                        {"challenge_id": cid, "tag_id": tag_map[t]} for t in r["tags"] if t in tag_map
+                    )
+                with phases.timed("children", len(lo_rows) + len(hint_rows) + len(ct_rows)):
+                    _run_all(threads, [
+                        partial(lo_writer.write, lo_rows),
+                        partial(hint_writer.write, hint_rows),
+                        partial(ct_writer.write, ct_rows),
+                    ])
+
+        with phases.timed("children", 0):
+            _run_all(threads, [writer.finish for writer in writers])
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    finally:
+        if threads is not None:
+            threads.shutdown()
+
+    n_challenges = stats.rows(Challenge.__tablename__)
+    if not n_seen:
+        click.echo("No 'coding_challenges' found. Skipping.")
+        return
 
     db.session.commit()
+    count_cache.invalidate("challenges")
+    response_cache.invalidate(*bulk_tags("Challenge", "Tag", "ChallengeHint", "LearningObjective"))
     click.echo(
-        f"Challenges: {len(challenge_rows)} upserted | Tags: {len(tag_names)} "
-        f"| LOs: {len(lo_rows)} | Hints: {len(hint_rows)}"
+        f"Challenges: {n_challenges} upserted, {n_seen - n_challenges} unchanged | Tags: {len(tag_names)} "
+        f"| LOs: {stats.rows(LearningObjective.__tablename__)} | Hints: {stats.rows(ChallengeHint.__tablename__)}"
     )
+    stats.report()
+    click.echo("Phases:")
+    phases.report()
 
-def _seed_conversations_from_json(path: str, chunk_size: int = 1000):
+def _seed_conversations_from_json(path: str, chunk_size: int = 1000, engine: str = "insert",
+                                  force: bool = False, workers: int = 1):
     click.echo(f"Loading conversations JSON from: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+    engine = _resolve_engine(engine)
+    concurrent = _concurrent_children(workers)
+    stats, phases = _LoadStats(), _LoadStats()
+    # Posts are the bulk of a dump, so on the concurrent path they are sharded
+    # by conversation across `workers` writers, each on its own connection.
+    post_writers = [
+        _ChildWriter(
+            ConversationPost.__table__,
+            ["conversation_id", "author_display_name", "content", "created_at", "imported"],
+            engine, stats, dedicated=concurrent,
+        )
+        for _ in range(workers if concurrent else 1)
+    ]
+    threads = ThreadPoolExecutor(max_workers=len(post_writers)) if concurrent else None
+    n_seen = 0
+    # challenges are few and referenced by every conversation
+    chall_map = dict(db.session.execute(select(Challenge.public_id, Challenge.id)).all())
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            batches = _transformed(
+                _iter_json_array(f, "support_conversations"), _transform_conversations, chunk_size, workers,
+            )
+            for records in _timed_iter(batches, phases, "parse+transform"):
+                _load_conversation_batch(
+                    records, chall_map, post_writers, threads, stats, phases, chunk_size, force, concurrent,
+                )
+                n_seen += len(records)
+
+        with phases.timed("posts", 0):
+            _run_all(threads, [writer.finish for writer in post_writers])
+    except BaseException:
+        for writer in post_writers:
+            writer.abort()
+        raise
+    finally:
+        if threads is not None:
+            threads.shutdown()
 
-    items = raw.get("support_conversations", [])
-    if not items:
+    n_convs = stats.rows(SupportConversation.__tablename__)
+    if not n_seen:
         click.echo("No 'support_conversations' found. Skipping.")
         return
 
-    chall_map = dict(db.session.execute(select(Challenge.public_id, Challenge.id)).all())
-
-    conv_rows = []
-    for c in items:
-        conv_rows.append({
-            "identifier": c.get("identifier"),
-            "topic": c.get("topic"),
-            "category": c.get("category"),
-            "status": c.get("status", "OPEN"),
-            "challenge_id": chall_map.get(c.get("challenge_id")),
-        })
+    db.session.commit()
+    count_cache.invalidate("conversations")
+    response_cache.invalidate(*bulk_tags("SupportConversation", "ConversationPost"))
+    click.echo(
+        f"Conversations: {n_convs} upserted, {n_seen - n_convs} unchanged "
+        f"| Posts: {stats.rows(ConversationPost.__tablename__)} inserted"
+    )
+    stats.report()
+    click.echo("Phases:")
+    phases.report()
 
-    for batch in _chunks(conv_rows, chunk_size):
-        stmt = pg_insert(SupportConversation.__table__).values(batch)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["identifier"],
-            set_={
-                "topic": stmt.excluded.topic,
-                "category": stmt.excluded.category,
-                "status": stmt.excluded.status,
-                "challenge_id": stmt.excluded.challenge_id,
-            },
+def _load_conversation_batch(records, chall_map, post_writers, threads, stats, phases,
+                             chunk_size: int, force: bool, concurrent: bool) -> None:
+    """Upsert one transformed batch of conversations and hand its posts to the writers."""
+    with phases.timed("diff", len(records)):
+        records, existing = _split_changed(
+            records, SupportConversation.identifier, SupportConversation.content_hash, force,
         )
-        db.session.execute(stmt)
+    if not records:
+        return
+
+    with phases.timed("conversations", len(records)):
+        conv_rows = [dict(r["row"], challenge_id=chall_map.get(r["challenge"])) for r in records]
+        with stats.timed(SupportConversation.__tablename__, len(conv_rows)):
+            stmt = _insert(SupportConversation.__table__).values(conv_rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["identifier"],
+                set_={
+                    "topic": stmt.excluded.topic,
+                    "category": stmt.excluded.category,
+                    "status": stmt.excluded.status,
+                    "challenge_id": stmt.excluded.challenge_id,
+                    "content_hash": stmt.excluded.content_hash,
+                },
+            )
+            db.session.execute(stmt)
 
-    conv_map = dict(
-        db.session.execute(
+        conv_map = dict(db.session.execute(
             select(SupportConversation.identifier, SupportConversation.id)
-        ).all()
-    )
+            .where(SupportConversation.identifier.in_([r["key"] for r in records]))
+        ).all())
 
-    posts = []
-    for c in items:
-        conv_id = conv_map.get(c.get("identifier"))
-        if not conv_id:
-            continue
-        for p in c.get("posts", []):
-            posts.append({
-                "conversation_id": conv_id,
-                "author_display_name": p.get("user"),
-                "content": p.get("content"),
-                "created_at": _parse_iso(p.get("timestamp")),
-            })
+        # Replies written in the app are kept; only the export's posts are replaced
+        stale_ids = [conv_map[ident] for ident in existing if ident in conv_map]
+        if stale_ids:
+            db.session.execute(
+                ConversationPost.__table__.delete().where(
+                    ConversationPost.conversation_id.in_(stale_ids),
+                    ConversationPost.imported.is_(True),
+                )
+            )
+        if concurrent:
+            # posts are written on other connections and must see these rows
+            db.session.commit()
 
-    for batch in _chunks(posts, chunk_size):
-        db.session.execute(ConversationPost.__table__.insert(), batch)
+    # A conversation's posts always go to the same writer, so they keep their order
+    shards = [[] for _ in post_writers]
+    for r in records:
+        if r["key"] not in conv_map or r.get("keep_children"):
+            continue
+        conv_id = conv_map[r["key"]]
+        shards[conv_id % len(shards)].extend(dict(p, conversation_id=conv_id) for p in r["posts"])
+    with phases.timed("posts", sum(len(rows) for rows in shards)):
+        _run_all(threads, [
+            partial(_write_chunked, writer, rows, chunk_size)
+            for writer, rows in zip(post_writers, shards)
+        ])
 
-    db.session.commit()
-    click.echo(f"Conversations: {len(conv_rows)} upserted | Posts: {len(posts)} inserted")
+def _write_chunked(writer: _ChildWriter, rows, chunk_size: int) -> None:
+    for batch in _chunks(rows, chunk_size):
+        writer.write(batch)
 
 # ---------- public CLI ----------
 
@@ -198,22 +659,95 @@ def register_cli(app):
     @app.cli.command("seed-challenges")
     @click.argument("challenges_json", type=click.Path(exists=True))
     @click.option("--chunk", default=1000, help="Batch size for bulk operations")
-    def seed_challenges_cmd(challenges_json, chunk):
+    @click.option(
+        "--engine", type=click.Choice(ENGINES), default="insert", show_default=True,
+        help="insert: batched INSERTs; copy: COPY into a staging table, then merge (PostgreSQL)",
+    )
+    @click.option("--force", is_flag=True, help="Re-import every item even if its content hash is unchanged")
+    @click.option(
+        "--workers", default=1, show_default=True, type=click.IntRange(min=1),
+        help="Transform batches in N processes; on PostgreSQL also load hints, learning objectives "
+             "and tags on their own connections (commits per batch instead of once at the end)",
+    )
+    def seed_challenges_cmd(challenges_json, chunk, engine, force, workers):
         with app.app_context():
-            _seed_challenges_from_json(challenges_json, chunk)
+            _seed_challenges_from_json(challenges_json, chunk, engine, force, workers)
 
     @app.cli.command("seed-conversations")
     @click.argument("conversations_json", type=click.Path(exists=True))
     @click.option("--chunk", default=1000, help="Batch size for bulk operations")
-    def seed_conversations_cmd(conversations_json, chunk):
+    @click.option(
+        "--engine", type=click.Choice(ENGINES), default="insert", show_default=True,
+        help="insert: batched INSERTs; copy: COPY into a staging table, then merge (PostgreSQL)",
+    )
+    @click.option("--force", is_flag=True, help="Re-import every item even if its content hash is unchanged")
+    @click.option(
+        "--workers", default=1, show_default=True, type=click.IntRange(min=1),
+        help="Transform batches in N processes; on PostgreSQL also split posts across N connections "
+             "(commits per batch instead of once at the end)",
+    )
+    def seed_conversations_cmd(conversations_json, chunk, engine, force, workers):
         with app.app_context():
-            _seed_conversations_from_json(conversations_json, chunk)
+            _seed_conversations_from_json(conversations_json, chunk, engine, force, workers)
 
     @app.cli.command("seed-json")
     @click.argument("challenges_json", type=click.Path(exists=True))
     @click.argument("conversations_json", type=click.Path(exists=True))
     @click.option("--chunk", default=1000, help="Batch size for bulk operations")
-    def seed_all_cmd(challenges_json, conversations_json, chunk):
+    @click.option(
+        "--engine", type=click.Choice(ENGINES), default="insert", show_default=True,
+        help="insert: batched INSERTs; copy: COPY into a staging table, then merge (PostgreSQL)",
+    )
+    @click.option("--force", is_flag=True, help="Re-import every item even if its content hash is unchanged")
+    @click.option(
+        "--workers", default=1, show_default=True, type=click.IntRange(min=1),
+        help="Transform batches in N processes; on PostgreSQL also load child rows on concurrent "
+             "connections (commits per batch instead of once at the end)",
+    )
+    def seed_all_cmd(challenges_json, conversations_json, chunk, engine, force, workers):
+        with app.app_context():
+            _seed_challenges_from_json(challenges_json, chunk, engine, force, workers)
+            _seed_conversations_from_json(conversations_json, chunk, engine, force, workers)
+
+    @app.cli.command("run-outbox")
+    @click.option("--batch-size", type=click.IntRange(min=1), help="Events claimed per transaction")
+    @click.option("--interval", default=1.0, show_default=True, help="Seconds to wait when the outbox is drained")
+    @click.option("--max-attempts", type=click.IntRange(min=1), help="Deliveries before an event is parked")
+    @click.option("--once", is_flag=True, help="Deliver what is due, then exit")
+    @click.option("--replay-failed", is_flag=True, help="Re-queue parked events before starting")
+    def run_outbox_cmd(batch_size, interval, max_attempts, once, replay_failed):
+        """Deliver outbox events to their handlers (see app/outbox.py)."""
+        with app.app_context():
+            retention_days = app.config.get("OUTBOX_RETENTION_DAYS", 7)
+            dispatcher = outbox.Dispatcher(
+                db.session,
+                batch_size=batch_size or app.config.get("OUTBOX_BATCH_SIZE", 100),
+                max_attempts=max_attempts or app.config.get("OUTBOX_MAX_ATTEMPTS", 10),
+                backoff=app.config.get("OUTBOX_BACKOFF_SECONDS", 2.0),
+                claim_timeout=app.config.get("OUTBOX_CLAIM_TIMEOUT_SECONDS", 300.0),
+                retention=timedelta(days=retention_days) if retention_days else None,
+            )
+            if replay_failed:
+                click.echo(f"Re-queued {outbox.replay_failed(db.session)} parked events")
+            if once:
+                dispatcher.prune()
+                while dispatcher.run_once() == dispatcher.batch_size:
+                    pass
+            else:
+                stop = threading.Event()
+                signal.signal(signal.SIGTERM, lambda *_: stop.set())
+                try:
+                    dispatcher.run(interval, stop)
+                except KeyboardInterrupt:
+                    pass
+            stats = dispatcher.stats
+            click.echo(f"Outbox: {stats['delivered']} delivered, {stats['retried']} retried, {stats['failed']} parked, "
+                       f"{stats['pruned']} pruned")
+
+    @app.cli.command("rebuild-queue-stats")
+    def rebuild_queue_stats_cmd():
+        """Recompute queue_stats and first-response times from scratch (see app/services/stats_service.py)."""
         with app.app_context():
-            _seed_challenges_from_json(challenges_json, chunk)
-            _seed_conversations_from_json(conversations_json, chunk)
+            started = time.perf_counter()
+            rows = stats_service.rebuild(session=db.session)
+            click.echo(f"Queue stats: {rows} rows rebuilt in {time.perf_counter() - started:.2f}s")
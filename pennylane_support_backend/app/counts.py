@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Query, Session
+
+
+class CountCache:
+    """
+    Short-TTL cache of COUNT(*) results keyed by (namespace, filter tuple).
+
+    Writers call `invalidate(namespace)` after committing so queue views see
+    new totals immediately; the TTL only bounds staleness from other workers.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, int]] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get_or_compute(self, namespace: str, key: Hashable, compute: Callable[[], int]) -> int:
+        if self.ttl <= 0:
+            return compute()
+        full_key = (namespace, key)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[full_key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop every entry in `namespace` (or everything when None)."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        return snapshot
+
+
+count_cache = CountCache(ttl=float(os.getenv("COUNT_CACHE_TTL", "5")))
+
+
+def normalize_filters(**filters: Any) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Stable cache key for a set of list filters.  Empty strings mean "no
+    filter" (as in the resolvers) and `search` is case-folded because the
+    full-text match ignores case (`websearch_to_tsquery` against the
+    tsvector columns on PostgreSQL, FTS5 elsewhere; see search_service).
+    """
+    items = []
+    for name, value in sorted(filters.items()):
+        if isinstance(value, str):
+            value = value or None
+            if name == "search" and value is not None:
+                value = value.lower()
+        items.append((name, value))
+    return tuple(items)
+
+
+def estimate_count(session: Session, query: Query, table_name: str, filtered: bool) -> int:
+    """
+    Cheap row estimate from the PostgreSQL planner.
+
+    Unfiltered lists read pg_class.reltuples; filtered ones read the top-level
+    "Plan Rows" of EXPLAIN.  Other databases fall back to an exact count.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return query.order_by(None).count()
+
+    if not filtered:
+        reltuples = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {"name": table_name},
+        ).scalar()
+        # -1 means the table was never analyzed; ask the planner instead.
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# Engine pool defaults per deployment profile; DB_* settings override them.
+#   web     gunicorn/uvicorn workers serving requests: fail fast when saturated
+#   worker  CLI seeders and background jobs: few connections, patient checkouts
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "web": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+    "worker": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 60, "pool_recycle": 1800, "pool_pre_ping": True},
+}
+
+_OVERRIDES = (
+    ("DB_POOL_SIZE", "pool_size"),
+    ("DB_MAX_OVERFLOW", "max_overflow"),
+    ("DB_POOL_TIMEOUT", "pool_timeout"),
+    ("DB_POOL_RECYCLE", "pool_recycle"),
+    ("DB_POOL_PRE_PING", "pool_pre_ping"),
+)
+
+# Checkout latency histogram bounds, in milliseconds.
+BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+# --------------------------------------------------------------------------- #
+#  Engine options
+# --------------------------------------------------------------------------- #
+def _pool_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    profile = config.get("DB_POOL_PROFILE") or "web"
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r}; expected one of {sorted(PROFILES)}")
+    options = dict(PROFILES[profile])
+    for key, option in _OVERRIDES:
+        if config.get(key) is not None:
+            options[option] = config[key]
+    return options
+
+
+def engine_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    SQLite keeps Flask-SQLAlchemy's defaults.  DB_POOL_SIZE=0 disables the
+    app-side pool (NullPool), e.g. when PgBouncer does all the pooling.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options = _pool_options(config)
+    if options["pool_size"] == 0:
+        options = {"poolclass": NullPool, "pool_pre_ping": options["pool_pre_ping"]}
+    else:
+        options["poolclass"] = InstrumentedQueuePool
+
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+    if timeout and url.get_backend_name() == "postgresql" and not config.get("DB_PGBOUNCER"):
+        # PgBouncer rejects startup options; see configure_engine for that mode
+        options["connect_args"] = {"options": f"-c statement_timeout={int(timeout)}"}
+    return options
+
+
+def async_engine_options(config: Mapping[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """(url, options) for the ASGI app's async engine; same pool settings."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return url, {}
+        # file SQLite would otherwise use NullPool, i.e. a new aiosqlite thread per session
+        return url, {"poolclass": InstrumentedAsyncQueuePool}
+
+    options = _pool_options(config)
+    if options["pool_size"] == 0:
+        options = {"poolclass": NullPool, "pool_pre_ping": options["pool_pre_ping"]}
+    else:
+        options["poolclass"] = InstrumentedAsyncQueuePool
+
+    connect_args: Dict[str, Any] = {}
+    if config.get("DB_PGBOUNCER"):
+        # asyncpg prepares every statement; transaction pooling can't keep them
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args["statement_cache_size"] = 0
+    elif config.get("DB_STATEMENT_TIMEOUT_MS"):
+        connect_args["server_settings"] = {"statement_timeout": str(int(config["DB_STATEMENT_TIMEOUT_MS"]))}
+    if connect_args:
+        options["connect_args"] = connect_args
+    return url, options
+
+
+def configure_engine(engine: Engine, config: Mapping[str, Any]) -> None:
+    """Per-engine setup that engine options can't express."""
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+    if timeout and config.get("DB_PGBOUNCER") and engine.dialect.name == "postgresql":
+        # Transaction pooling hands each transaction to any server connection,
+        # so session-level settings don't stick; set the timeout per transaction.
+        statement = f"SET LOCAL statement_timeout = {int(timeout)}"
+
+        @event.listens_for(engine, "begin")
+        def _statement_timeout(conn):
+            conn.exec_driver_sql(statement)
+
+
+# --------------------------------------------------------------------------- #
+#  Instrumentation
+# --------------------------------------------------------------------------- #
+class PoolStats:
+    """Checkout latency, waits, overflow and connection churn for one pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.checkout_max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.wait_max = 0.0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_checkout(self, seconds: float, waited: bool, overflowed: bool) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.checkout_max = max(self.checkout_max, seconds)
+            self.buckets[index] += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.wait_max = max(self.wait_max, seconds)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool: Any) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "checkout_ms_avg": round(self.checkout_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_ms_max": round(self.checkout_max * 1000, 3),
+                "checkout_ms_buckets": {
+                    **{f"le_{bound:g}": n for bound, n in zip(BUCKETS_MS, self.buckets)},
+                    "le_inf": self.buckets[-1],
+                },
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_seconds * 1000, 3),
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+        snapshot["pool"] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            snapshot.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                # negative while the pool has spare capacity below pool_size
+                overflow=pool.overflow(),
+                max_overflow=pool._max_overflow,
+            )
+        return snapshot
+
+
+class _InstrumentedPool:
+    """Mixin timing QueuePool.connect(); `stats` is set by PoolRegistry.register."""
+
+    stats: Optional[PoolStats] = None
+
+    def connect(self):
+        stats = self.stats
+        if stats is None:
+            return super().connect()
+        overflow_before = self._overflow
+        waited = (
+            self._max_overflow > -1
+            and overflow_before >= self._max_overflow
+            and self._pool.qsize() == 0
+        )
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.record_timeout(time.perf_counter() - start)
+            raise
+        stats.record_checkout(
+            time.perf_counter() - start,
+            waited=waited,
+            overflowed=self._overflow > overflow_before and self._overflow > 0,
+        )
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolRegistry:
+    """Process-wide pool statistics, one entry per named engine."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Engine, PoolStats]] = {}
+
+    def register(self, name: str, engine: Engine) -> PoolStats:
+        stats = PoolStats()
+        pool = engine.pool
+        if isinstance(pool, _InstrumentedPool):
+            pool.stats = stats
+        # pool listeners survive engine.dispose() (recreate keeps the dispatch)
+        event.listen(pool, "connect", lambda *_: stats.record_connect())
+        event.listen(pool, "invalidate", lambda *_: stats.record_invalidation())
+        with self._lock:
+            self._entries[name] = (engine, stats)
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = dict(self._entries)
+        return {name: stats.snapshot(engine.pool) for name, (engine, stats) in entries.items()}
+
+
+pool_registry = PoolRegistry()
@@ -0,0 +1,235 @@
+"""
+Conversation change events for real-time subscribers (see app/subscriptions.py).
+
+Services attach events to the session with `publish(session, ...)`; they are
+sent only if the transaction commits.  On PostgreSQL they travel as
+NOTIFY on CHANNEL, inside the committing transaction, and every worker's
+listener thread hands them to its local subscribers; elsewhere (SQLite,
+tests) they are delivered in-process after the commit.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "pennylane_events"
+
+CONVERSATION_UPDATED = "conversation_updated"
+POST_ADDED = "post_added"
+QUEUE_CHANGED = "queue_changed"
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str
+    conversation_id: int
+    status: Optional[str] = None
+    # status before the change, so queue views filtered on it hear about leavers
+    previous_status: Optional[str] = None
+    category: Optional[str] = None
+    post_id: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Event":
+        return cls(**json.loads(payload))
+
+
+def conversation_changed(conv, previous_status: Optional[str] = None) -> List[Event]:
+    """Events for a conversation whose status, assignee or posts changed."""
+    events = [Event(CONVERSATION_UPDATED, conv.id, status=conv.status, category=conv.category)]
+    if previous_status != conv.status:
+        events.append(Event(
+            QUEUE_CHANGED, conv.id, status=conv.status, previous_status=previous_status, category=conv.category,
+        ))
+    return events
+
+
+def publish(session: Session, *events: Event) -> None:
+    """Send `events` when `session` next commits; dropped on rollback."""
+    session.info.setdefault("pending_events", []).extend(events)
+
+
+def pending(session: Session) -> List[Event]:
+    """Events published in `session`'s current transaction."""
+    return session.info.get("pending_events") or []
+
+
+# --------------------------------------------------------------------------- #
+#  Bus
+# --------------------------------------------------------------------------- #
+Subscriber = Callable[[Event], None]
+
+
+class EventBus:
+    """
+    Fan-out to this process's subscribers.  Callbacks run on the publishing
+    thread (or the listener thread) and must not block; subscription streams
+    hand events to their own queue.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscriber] = []
+        self._stats = {"published": 0, "delivered": 0}
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Register `callback`; returns a function that unregisters it."""
+        with self._lock:
+            self._subscribers.append(callback)
+        self._started()
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def deliver(self, events: List[Event]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._stats["delivered"] += len(events) * len(subscribers)
+        for ev in events:
+            for callback in subscribers:
+                try:
+                    callback(ev)
+                except Exception:
+                    logger.exception("Event subscriber failed")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["subscribers"] = len(self._subscribers)
+        return snapshot
+
+    # transaction hooks; see install()
+    def before_commit(self, session: Session, events: List[Event]) -> None:
+        pass
+
+    def after_commit(self, events: List[Event]) -> None:
+        with self._lock:
+            self._stats["published"] += len(events)
+        self.deliver(events)
+
+    def _started(self) -> None:
+        pass
+
+
+class PostgresEventBus(EventBus):
+    """NOTIFY in the writing transaction; one LISTEN connection per process."""
+
+    def __init__(self, url: str, reconnect_delay: float = 1.0) -> None:
+        super().__init__()
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self._listener: Optional[threading.Thread] = None
+
+    def before_commit(self, session: Session, events: List[Event]) -> None:
+        for ev in events:
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": ev.to_json()})
+        with self._lock:
+            self._stats["published"] += len(events)
+
+    def after_commit(self, events: List[Event]) -> None:
+        pass  # the listener delivers, here and in every other worker
+
+    def _started(self) -> None:
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="event-listener", daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        import select
+
+        import psycopg2
+
+        url = make_url(self.url).set(drivername="postgresql")
+        dsn = url.render_as_string(hide_password=False)
+        delay = self.reconnect_delay
+        while True:
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(0)  # autocommit
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                delay = self.reconnect_delay
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    events = []
+                    while conn.notifies:
+                        events.append(Event.from_json(conn.notifies.pop(0).payload))
+                    if events:
+                        self.deliver(events)
+            except Exception:
+                logger.exception("Event listener lost its connection; reconnecting in %.0fs", delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+def bus_for(url: str, mode: str = "auto") -> EventBus:
+    """`postgres` (LISTEN/NOTIFY), `local` (this process only) or `auto`."""
+    if mode == "auto":
+        mode = "postgres" if make_url(url).get_backend_name() == "postgresql" else "local"
+    if mode == "postgres":
+        return PostgresEventBus(url)
+    if mode == "local":
+        return EventBus()
+    raise ValueError(f"Unknown EVENT_BUS {mode!r}")
+
+
+event_bus: EventBus = EventBus()
+
+
+def configure(url: str, mode: str = "auto") -> EventBus:
+    """Select the process-wide bus (called by create_app); kept when unchanged."""
+    global event_bus
+    wanted = bus_for(url, mode)
+    if type(wanted) is not type(event_bus) or getattr(wanted, "url", None) != getattr(event_bus, "url", None):
+        event_bus = wanted
+    return event_bus
+
+
+# --------------------------------------------------------------------------- #
+#  Session hooks
+# --------------------------------------------------------------------------- #
+def _before_commit(session: Session) -> None:
+    events = pending(session)
+    if events:
+        event_bus.before_commit(session, events)
+
+
+def _after_commit(session: Session) -> None:
+    events = session.info.pop("pending_events", None)
+    if events:
+        event_bus.after_commit(events)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop("pending_events", None)
+
+
+def install() -> None:
+    """Hook publish() into every Session's commit (idempotent)."""
+    if not event.contains(Session, "before_commit", _before_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
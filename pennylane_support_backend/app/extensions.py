@@ -1,6 +1,29 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import Session
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()  
+
+# Set while a resolver runs on a session other than db.session (see app.asgi).
+_session_override: ContextVar[Optional[Session]] = ContextVar("session_override", default=None)
+
+
+def current_session() -> Session:
+    """The session resolvers should query with: an override or db.session."""
+    return _session_override.get() or db.session
+
+
+@contextmanager
+def use_session(session: Session) -> Iterator[Session]:
+    """Make `current_session()` return `session` inside the block."""
+    token = _session_override.set(session)
+    try:
+        yield session
+    finally:
+        _session_override.reset(token)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from graphql.error import GraphQLError
+from graphql.language import ast
+from graphql.type import GraphQLList, GraphQLNonNull
+from graphql.type.definition import GraphQLInterfaceType, GraphQLObjectType, GraphQLUnionType
+
+# Arguments that bound the size of a returned list (directly, or of the first
+# list below the field, e.g. conversationsPaged(pageSize) -> items).
+SIZE_ARGUMENTS = ("pageSize", "first", "last", "limit")
+
+# Per-item cost of a field; object fields default to 1 and scalars to 0.
+FIELD_WEIGHTS: Dict[str, int] = {
+    # exact COUNT(*) over the filtered table
+    "PaginatedConversationsType.total": 10,
+    "PaginatedChallengesType.total": 10,
+    "PaginatedConversationsType.totalEstimate": 1,
+    "PaginatedChallengesType.totalEstimate": 1,
+    # ranked full-text / trigram scans
+    "Query.searchConversations": 2,
+    "Query.searchChallenges": 2,
+}
+
+
+class QueryCost(NamedTuple):
+    depth: int
+    cost: int
+
+
+class QueryLimits:
+    """
+    Static depth and cost analysis of an operation.
+
+    A field costs its weight plus the cost of its selections, times the number
+    of items it returns: the value of a SIZE_ARGUMENTS argument when present,
+    otherwise `default_list_size` for lists and 1 for single objects.
+    Introspection fields are free.  A limit of 0 disables that check.
+    """
+
+    def __init__(self, max_depth: int = 10, max_cost: int = 10000, default_list_size: int = 20) -> None:
+        self.max_depth = max_depth
+        self.max_cost = max_cost
+        self.default_list_size = default_list_size
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_depth > 0 or self.max_cost > 0
+
+    def measure(self, schema: Any, document: ast.Document, operation_name: Optional[str] = None,
+                variables: Optional[Dict[str, Any]] = None) -> Optional[QueryCost]:
+        """Depth and cost of the operation that would run, or None if there is none."""
+        operations = [d for d in document.definitions if isinstance(d, ast.OperationDefinition)]
+        if operation_name:
+            operations = [op for op in operations if op.name and op.name.value == operation_name]
+        if len(operations) != 1:
+            return None  # execute() reports the error
+        operation = operations[0]
+        root = {
+            "query": schema.get_query_type,
+            "mutation": schema.get_mutation_type,
+            "subscription": schema.get_subscription_type,
+        }[operation.operation]()
+        if root is None:
+            return None
+
+        walker = _Walker(
+            schema,
+            {d.name.value: d for d in document.definitions if isinstance(d, ast.FragmentDefinition)},
+            _variable_values(operation, variables or {}),
+            FIELD_WEIGHTS,
+            self.default_list_size,
+        )
+        cost, depth = walker.selections(root, operation.selection_set, None, set())
+        return QueryCost(depth=depth, cost=cost)
+
+    def check(self, cost: QueryCost) -> List[GraphQLError]:
+        errors = []
+        if self.max_depth and cost.depth > self.max_depth:
+            errors.append(GraphQLError(
+                f"Query depth {cost.depth} exceeds the maximum of {self.max_depth}"
+            ))
+        if self.max_cost and cost.cost > self.max_cost:
+            errors.append(GraphQLError(
+                f"Query cost {cost.cost} exceeds the maximum of {self.max_cost}"
+            ))
+        return errors
+
+    def extensions(self, cost: QueryCost) -> Dict[str, Any]:
+        """Reported to clients under `extensions.cost`."""
+        return {"cost": {
+            "requested": cost.cost,
+            "maximum": self.max_cost,
+            "depth": cost.depth,
+            "maximumDepth": self.max_depth,
+        }}
+
+
+def _variable_values(operation: ast.OperationDefinition, variables: Dict[str, Any]) -> Dict[str, Any]:
+    values = {}
+    for definition in operation.variable_definitions or ():
+        name = definition.variable.name.value
+        if name in variables:
+            values[name] = variables[name]
+        elif definition.default_value is not None:
+            values[name] = _literal(definition.default_value, {})
+    return values
+
+
+def _literal(node: Any, variables: Dict[str, Any]) -> Any:
+    if isinstance(node, ast.Variable):
+        return variables.get(node.name.value)
+    if isinstance(node, ast.IntValue):
+        return int(node.value)
+    return None
+
+
+def _unwrap(gql_type: Any):
+    """(named type, is_list)"""
+    is_list = False
+    while isinstance(gql_type, (GraphQLNonNull, GraphQLList)):
+        is_list = is_list or isinstance(gql_type, GraphQLList)
+        gql_type = gql_type.of_type
+    return gql_type, is_list
+
+
+class _Walker:
+    def __init__(self, schema: Any, fragments: Dict[str, ast.FragmentDefinition], variables: Dict[str, Any],
+                 weights: Dict[str, int], default_list_size: int) -> None:
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+        self.weights = weights
+        self.default_list_size = default_list_size
+
+    def selections(self, parent_type: Any, selection_set: Optional[ast.SelectionSet],
+                   pending_size: Optional[int], visiting: set):
+        """(cost, depth) of a selection set on `parent_type`."""
+        cost = depth = 0
+        if selection_set is None:
+            return cost, depth
+        for selection in selection_set.selections:
+            inner_visiting = visiting
+            if isinstance(selection, ast.Field):
+                field_cost, field_depth = self.field(parent_type, selection, pending_size, visiting)
+                cost += field_cost
+                depth = max(depth, field_depth)
+                continue
+            if isinstance(selection, ast.FragmentSpread):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visiting:
+                    continue  # invalid documents never get here
+                inner, type_condition = fragment.selection_set, fragment.type_condition
+                inner_visiting = visiting | {name}
+            else:
+                inner, type_condition = selection.selection_set, selection.type_condition
+            fragment_type = parent_type
+            if type_condition is not None:
+                fragment_type = self.schema.get_type(type_condition.name.value) or parent_type
+            inner_cost, inner_depth = self.selections(fragment_type, inner, pending_size, inner_visiting)
+            cost += inner_cost
+            depth = max(depth, inner_depth)
+        return cost, depth
+
+    def field(self, parent_type: Any, node: ast.Field, pending_size: Optional[int], visiting: set):
+        name = node.name.value
+        fields = getattr(parent_type, "fields", None) or {}
+        if name.startswith("__") or name not in fields:
+            return 0, 0
+        definition = fields[name]
+        field_type, is_list = _unwrap(definition.type)
+        composite = isinstance(field_type, (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType))
+
+        size = self._size_argument(definition, node)
+        if is_list:
+            count = size if size is not None else (pending_size if pending_size is not None else self.default_list_size)
+            size = None  # consumed by this list
+        else:
+            count = 1
+            if size is None:
+                size = pending_size if composite else None
+
+        weight = self.weights.get(f"{parent_type.name}.{name}", 1 if composite else 0)
+        if not composite:
+            return count * weight, 1
+        child_cost, child_depth = self.selections(field_type, node.selection_set, size, visiting)
+        return count * (weight + child_cost), child_depth + 1
+
+    def _size_argument(self, definition: Any, node: ast.Field) -> Optional[int]:
+        given = {arg.name.value: arg.value for arg in node.arguments or ()}
+        for arg_name in SIZE_ARGUMENTS:
+            if arg_name not in definition.args:
+                continue
+            value = _literal(given[arg_name], self.variables) if arg_name in given else None
+            if value is None:
+                value = definition.args[arg_name].default_value
+            if isinstance(value, int):
+                return max(0, value)
+        return None
+
+
+query_limits = QueryLimits(
+    max_depth=int(os.getenv("GRAPHQL_MAX_DEPTH", "10")),
+    max_cost=int(os.getenv("GRAPHQL_MAX_COST", "10000")),
+    default_list_size=int(os.getenv("GRAPHQL_DEFAULT_LIST_SIZE", "20")),
+)
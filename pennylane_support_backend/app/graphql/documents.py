@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from graphql.backend.base import GraphQLBackend, GraphQLDocument
+from graphql.execution import ExecutionResult, execute
+from graphql.language import ast
+from graphql.language.parser import parse
+from graphql.language.printer import print_ast
+from graphql.validation import validate
+from promise import Promise
+from rx import Observable
+
+from .complexity import QueryLimits, query_limits
+
+
+def query_hash(query: str) -> str:
+    """SHA-256 hex digest used by Automatic Persisted Queries."""
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryError(Exception):
+    """
+    A persisted-query request that cannot be served.  `message` and `code`
+    follow the Apollo APQ protocol so the client link knows to resend the
+    full query on PersistedQueryNotFound.
+    """
+
+    def __init__(self, message: str, code: str) -> None:
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"message": self.message, "extensions": {"code": self.code}}
+
+
+def select_operation(document_ast: ast.Document, operation_name: Optional[str]) -> Optional[ast.OperationDefinition]:
+    """The operation execute() would run, or None when that is ambiguous."""
+    operations = [d for d in document_ast.definitions if isinstance(d, ast.OperationDefinition)]
+    if operation_name:
+        operations = [op for op in operations if op.name and op.name.value == operation_name]
+    return operations[0] if len(operations) == 1 else None
+
+
+def _execute_validated(schema, document_ast, validation_errors, limits, *args, **kwargs):
+    # Validation ran once when the document was cached.
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+    kwargs.pop("validate", None)
+
+    # Cost depends on variables (page sizes), so it is checked per request,
+    # still before any resolver runs.
+    extensions = None
+    if limits is not None and limits.enabled:
+        cost = limits.measure(schema, document_ast, kwargs.get("operation_name"), kwargs.get("variable_values"))
+        if cost is not None:
+            extensions = limits.extensions(cost)
+            errors = limits.check(cost)
+            if errors:
+                return ExecutionResult(errors=errors, invalid=True, extensions=extensions)
+
+    result = execute(schema, document_ast, *args, **kwargs)
+    # subscriptions (allow_subscriptions=True) hand back an Observable
+    if extensions is None or isinstance(result, Observable):
+        return result
+
+    def _with_extensions(result: ExecutionResult) -> ExecutionResult:
+        result.extensions = {**(result.extensions or {}), **extensions}
+        return result
+
+    # return_promise=True (the ASGI path) hands back a Promise
+    if isinstance(result, Promise):
+        return result.then(_with_extensions)
+    return _with_extensions(result)
+
+
+class DocumentCache(GraphQLBackend):
+    """
+    graphql-core backend that keeps an LRU of parsed and validated documents.
+
+    Pass it as `schema.execute(..., backend=document_cache)`.  Entries are
+    keyed by query text, so repeat requests skip parse() and validate();
+    documents that fail validation are cached with their errors.  Syntax
+    errors are not cached.
+
+    The cache also serves Automatic Persisted Queries (`resolve`): a client
+    may send only `extensions.persistedQuery.sha256Hash` for any document the
+    server has seen.  With an allow-list loaded, only documents from that
+    list are executed and nothing new can be registered.
+
+    `limits` rejects operations over the depth/cost budget before execution.
+    """
+
+    def __init__(self, max_size: int = 512, limits: Optional[QueryLimits] = None) -> None:
+        self.max_size = max_size
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._documents: "OrderedDict[str, GraphQLDocument]" = OrderedDict()
+        # sha256 -> query text for APQ lookups; follows the LRU
+        self._by_hash: Dict[str, str] = {}
+        # allow-listed documents are pinned and never evicted
+        self._allowed: Optional[Dict[str, str]] = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "apq_hits": 0, "apq_misses": 0, "rejected": 0}
+
+    # ------------------------------------------------------------------ #
+    #  GraphQLBackend
+    # ------------------------------------------------------------------ #
+    def document_from_string(self, schema: Any, document_string: Any) -> GraphQLDocument:
+        if isinstance(document_string, ast.Document):
+            document_string = print_ast(document_string)
+        assert isinstance(document_string, str), "The query must be a string"
+
+        with self._lock:
+            document = self._documents.get(document_string)
+            if document is not None and document.schema is schema:
+                self._documents.move_to_end(document_string)
+                self._stats["hits"] += 1
+                return document
+            self._stats["misses"] += 1
+
+        document_ast = parse(document_string)
+        errors = validate(schema, document_ast)
+        document = GraphQLDocument(
+            schema=schema,
+            document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(_execute_validated, schema, document_ast, errors, self.limits),
+        )
+        if self.max_size > 0:
+            self._store(document_string, document)
+        return document
+
+    def _store(self, query: str, document: GraphQLDocument) -> None:
+        with self._lock:
+            self._documents[query] = document
+            self._documents.move_to_end(query)
+            self._by_hash[query_hash(query)] = query
+            while len(self._documents) > self.max_size:
+                evicted, _ = self._documents.popitem(last=False)
+                self._by_hash.pop(query_hash(evicted), None)
+                self._stats["evictions"] += 1
+
+    # ------------------------------------------------------------------ #
+    #  Persisted queries
+    # ------------------------------------------------------------------ #
+    @property
+    def allowlist_only(self) -> bool:
+        return self._allowed is not None
+
+    def load_allowlist(self, queries: Iterable[str]) -> None:
+        """Switch to allow-list mode: only `queries` may be executed."""
+        allowed = {query_hash(q): q for q in queries}
+        with self._lock:
+            self._allowed = allowed
+
+    def resolve(self, query: Optional[str], extensions: Optional[Mapping[str, Any]]) -> Optional[str]:
+        """
+        Return the query text to execute for a request body's `query` and
+        `extensions`, registering hash -> query for later hash-only requests.
+
+        Raises:
+            PersistedQueryError: unknown hash, hash/query mismatch, or a
+                document outside the allow-list.
+        """
+        persisted = (extensions or {}).get("persistedQuery") if isinstance(extensions, Mapping) else None
+        sha = persisted.get("sha256Hash") if isinstance(persisted, Mapping) else None
+
+        if sha is None:
+            if query is not None and self._allowed is not None and query_hash(query) not in self._allowed:
+                self._reject()
+            return query
+
+        if query is None:
+            with self._lock:
+                known = (self._allowed if self._allowed is not None else self._by_hash).get(sha)
+                self._stats["apq_hits" if known is not None else "apq_misses"] += 1
+            if known is None:
+                if self._allowed is not None:
+                    self._reject()
+                raise PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+            return known
+
+        if query_hash(query) != sha:
+            raise PersistedQueryError("provided sha does not match query", "PERSISTED_QUERY_HASH_MISMATCH")
+        if self._allowed is not None and sha not in self._allowed:
+            self._reject()
+        # the document itself is cached (and the hash indexed) on execute
+        return query
+
+    def _reject(self) -> None:
+        with self._lock:
+            self._stats["rejected"] += 1
+        raise PersistedQueryError("Query is not in the allow-list", "PERSISTED_QUERY_NOT_ALLOWED")
+
+    # ------------------------------------------------------------------ #
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._by_hash.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["size"] = len(self._documents)
+        return snapshot
+
+
+def read_allowlist(path: str) -> List[str]:
+    """
+    Query texts from an allow-list file: a JSON list of queries, a
+    {sha256: query} object, or an Apollo persisted-query manifest
+    ({"operations": [{"body": ...}, ...]}).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        return [str(q) for q in manifest]
+    if isinstance(manifest.get("operations"), list):
+        return [op["body"] for op in manifest["operations"]]
+    queries = []
+    for sha, query in manifest.items():
+        if query_hash(query) != sha:
+            raise ValueError(f"Allow-list entry {sha} does not match its query")
+        queries.append(query)
+    return queries
+
+
+document_cache = DocumentCache(
+    max_size=int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "512")),
+    limits=query_limits,
+)
+if os.getenv("GRAPHQL_ALLOWLIST"):
+    document_cache.load_allowlist(read_allowlist(os.environ["GRAPHQL_ALLOWLIST"]))
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from graphql.language import ast
+from graphql.type import GraphQLList, GraphQLNonNull, GraphQLObjectType
+from sqlalchemy.orm import Query, joinedload, load_only, selectinload
+
+from app.models.user import User
+from app.models.challenge import Challenge, ChallengeHint, LearningObjective, Tag
+from app.models.support import SupportConversation, ConversationPost
+
+# GraphQL field -> (relationship attribute, related model, loader strategy).
+# Collections use selectinload (one extra IN query, safe with LIMIT);
+# many-to-one uses joinedload so it rides along with the base query.
+_RELATIONSHIPS: Dict[Any, Dict[str, Tuple[str, Any, str]]] = {
+    SupportConversation: {
+        "posts": ("posts", ConversationPost, "selectin"),
+        "assignedSupport": ("assigned_support", User, "joined"),
+        "challenge": ("challenge", Challenge, "joined"),
+    },
+    Challenge: {
+        "conversations": ("conversations", SupportConversation, "selectin"),
+        "hints": ("hints", ChallengeHint, "selectin"),
+        "learningObjectives": ("learning_objectives", LearningObjective, "selectin"),
+        "tags": ("tags", Tag, "selectin"),
+        "assignedSupport": ("assigned_support", User, "joined"),
+    },
+}
+
+# Columns resolvers rely on even when the client didn't ask for them
+# (foreign keys for loaders/relationships, ordering keys).
+_ALWAYS_LOAD: Dict[Any, Tuple[str, ...]] = {
+    SupportConversation: ("challenge_id", "assigned_to_user_id", "created_at"),
+    Challenge: ("assigned_support_user_id", "points"),
+    ConversationPost: ("conversation_id", "created_at"),
+    ChallengeHint: ("challenge_id",),
+    LearningObjective: ("challenge_id",),
+}
+
+# GraphQL fields backed by more than one column, or by a differently named one.
+_FIELD_COLUMNS: Dict[Any, Dict[str, Tuple[str, ...]]] = {
+    User: {"name": ("name", "username")},
+}
+
+_CAMEL_RE = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def _snake(name: str) -> str:
+    return _CAMEL_RE.sub("_", name).lower()
+
+
+def _selections(selection_set: Optional[ast.SelectionSet], fragments: Dict[str, Any]) -> Iterable[ast.Field]:
+    """Yield the fields of a selection set with fragments flattened in."""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection
+        elif isinstance(selection, ast.FragmentSpread):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _selections(fragment.selection_set, fragments)
+        elif isinstance(selection, ast.InlineFragment):
+            yield from _selections(selection.selection_set, fragments)
+
+
+def _sub_fields(fields: Sequence[ast.Field], name: str, fragments: Dict[str, Any]) -> List[ast.Field]:
+    """Fields selected under `name` across all the given field nodes."""
+    children: List[ast.Field] = []
+    for field in fields:
+        for child in _selections(field.selection_set, fragments):
+            if child.name.value == name:
+                children.append(child)
+    return children
+
+
+def _column_names(model: Any) -> set:
+    return {c.key for c in model.__mapper__.column_attrs}
+
+
+def _plan(model: Any, fields: Sequence[ast.Field], fragments: Dict[str, Any]):
+    """Return (columns to load, {relationship field: child field nodes})."""
+    columns = _column_names(model)
+    wanted = {c.key for c in model.__mapper__.primary_key} | set(_ALWAYS_LOAD.get(model, ()))
+    relations: Dict[str, List[ast.Field]] = {}
+    extra = _FIELD_COLUMNS.get(model, {})
+    rels = _RELATIONSHIPS.get(model, {})
+
+    for field in fields:
+        for child in _selections(field.selection_set, fragments):
+            name = child.name.value
+            if name in rels:
+                relations.setdefault(name, []).append(child)
+            elif name in extra:
+                wanted.update(extra[name])
+            else:
+                column = _snake(name)
+                if column in columns:
+                    wanted.add(column)
+    return [getattr(model, c) for c in sorted(wanted & columns)], relations
+
+
+def _options_for(model: Any, fields: Sequence[ast.Field], fragments: Dict[str, Any], chain=None) -> list:
+    """Build loader options for `model` and, recursively, its relationships."""
+    cols, relations = _plan(model, fields, fragments)
+    options = [chain.load_only(*cols) if chain is not None else load_only(*cols)]
+
+    for name, child_fields in relations.items():
+        attr, child_model, strategy = _RELATIONSHIPS[model][name]
+        rel = getattr(model, attr)
+        if chain is None:
+            child_chain = selectinload(rel) if strategy == "selectin" else joinedload(rel)
+        else:
+            child_chain = chain.selectinload(rel) if strategy == "selectin" else chain.joinedload(rel)
+        options.extend(_options_for(child_model, child_fields, fragments, child_chain))
+    return options
+
+
+def field_nodes(selection_set: Optional[ast.SelectionSet], fragments: Dict[str, Any]) -> List[ast.Field]:
+    """The fields of a selection set with fragments flattened in."""
+    return list(_selections(selection_set, fragments))
+
+
+def fully_eager(gql_type: Any, selection_set: Optional[ast.SelectionSet], fragments: Dict[str, Any]) -> bool:
+    """
+    True when every relationship selected below a field of `gql_type` is one
+    apply_eager_loading loads up front, so resolving the result never falls
+    back to lazy loads or the request loaders.
+    """
+    graphene_type = getattr(gql_type, "graphene_type", None)
+    model = getattr(getattr(graphene_type, "_meta", None), "model", None)
+    for child in _selections(selection_set, fragments):
+        definition = gql_type.fields.get(child.name.value)
+        if definition is None:
+            continue  # __typename
+        child_type = definition.type
+        while isinstance(child_type, (GraphQLNonNull, GraphQLList)):
+            child_type = child_type.of_type
+        if not isinstance(child_type, GraphQLObjectType):
+            continue
+        if model is not None and child.name.value not in _RELATIONSHIPS.get(model, {}):
+            return False
+        if not fully_eager(child_type, child.selection_set, fragments):
+            return False
+    return True
+
+
+def selected_fields(info, path: Sequence[str] = ()) -> set:
+    """Names of the fields the client selected at `path` below the current field."""
+    fragments = getattr(info, "fragments", None) or {}
+    fields: List[ast.Field] = list(getattr(info, "field_asts", None) or [])
+    for name in path:
+        fields = _sub_fields(fields, name, fragments)
+    return {child.name.value for field in fields for child in _selections(field.selection_set, fragments)}
+
+
+def apply_eager_loading(query: Query, model: Any, info, path: Sequence[str] = ()) -> Query:
+    """
+    Add selectinload/joinedload/load_only options to `query` matching what the
+    client selected on the current field.  `path` walks into wrapper types,
+    e.g. ("items",) for the paginated result types.
+
+    Unrequested columns are deferred; unrequested relationships are left to
+    the request-scoped loaders.
+    """
+    fragments = getattr(info, "fragments", None) or {}
+    fields: List[ast.Field] = list(getattr(info, "field_asts", None) or [])
+    for name in path:
+        fields = _sub_fields(fields, name, fragments)
+    if not fields:
+        return query
+    return query.options(*_options_for(model, fields, fragments))
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from promise import Promise
+from promise.dataloader import DataLoader
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.user import User
+from app.models.challenge import Challenge, ChallengeHint, ChallengeTag, LearningObjective, Tag
+from app.models.support import SupportConversation, ConversationPost
+
+
+class _SessionLoader(DataLoader):
+    """DataLoader bound to the request's SQLAlchemy session."""
+
+    def __init__(self, session: Session) -> None:
+        super().__init__()
+        self.session = session
+
+
+class _ByIdLoader(_SessionLoader):
+    """Load rows by primary key; one `IN (...)` query per batch."""
+
+    model: Any = None
+
+    def batch_load_fn(self, keys: List[int]) -> Promise:
+        rows = self.session.query(self.model).filter(self.model.id.in_(keys)).all()
+        by_id = {row.id: row for row in rows}
+        return Promise.resolve([by_id.get(k) for k in keys])
+
+
+class _ChildrenLoader(_SessionLoader):
+    """Load child rows grouped by a foreign key; one `IN (...)` query per batch."""
+
+    model: Any = None
+    foreign_key: str = ""
+
+    def order_by(self) -> tuple:
+        return (self.model.id.asc(),)
+
+    def batch_load_fn(self, keys: List[int]) -> Promise:
+        fk = getattr(self.model, self.foreign_key)
+        rows = self.session.query(self.model).filter(fk.in_(keys)).order_by(*self.order_by()).all()
+        grouped: Dict[int, list] = defaultdict(list)
+        for row in rows:
+            grouped[getattr(row, self.foreign_key)].append(row)
+        return Promise.resolve([grouped.get(k, []) for k in keys])
+
+
+class UserLoader(_ByIdLoader):
+    model = User
+
+
+class ChallengeLoader(_ByIdLoader):
+    model = Challenge
+
+
+class PostsByConversationLoader(_ChildrenLoader):
+    model = ConversationPost
+    foreign_key = "conversation_id"
+
+    def order_by(self) -> tuple:
+        # Same ordering as SupportConversation.posts
+        return (ConversationPost.created_at.asc(), ConversationPost.id.asc())
+
+
+class ConversationsByChallengeLoader(_ChildrenLoader):
+    model = SupportConversation
+    foreign_key = "challenge_id"
+
+
+class HintsByChallengeLoader(_ChildrenLoader):
+    model = ChallengeHint
+    foreign_key = "challenge_id"
+
+
+class LearningObjectivesByChallengeLoader(_ChildrenLoader):
+    model = LearningObjective
+    foreign_key = "challenge_id"
+
+
+class TagsByChallengeLoader(_SessionLoader):
+    def batch_load_fn(self, keys: List[int]) -> Promise:
+        rows = (
+            self.session.query(ChallengeTag.challenge_id, Tag)
+            .join(Tag, Tag.id == ChallengeTag.tag_id)
+            .filter(ChallengeTag.challenge_id.in_(keys))
+            .order_by(Tag.name.asc())
+            .all()
+        )
+        grouped: Dict[int, list] = defaultdict(list)
+        for challenge_id, tag in rows:
+            grouped[challenge_id].append(tag)
+        return Promise.resolve([grouped.get(k, []) for k in keys])
+
+
+class Loaders:
+    """Request-scoped set of batch loaders; build one per GraphQL execution."""
+
+    def __init__(self, session: Session) -> None:
+        self.users = UserLoader(session)
+        self.challenges = ChallengeLoader(session)
+        self.posts_by_conversation = PostsByConversationLoader(session)
+        self.conversations_by_challenge = ConversationsByChallengeLoader(session)
+        self.hints_by_challenge = HintsByChallengeLoader(session)
+        self.learning_objectives_by_challenge = LearningObjectivesByChallengeLoader(session)
+        self.tags_by_challenge = TagsByChallengeLoader(session)
+
+
+def is_loaded(parent: Any, attr: str) -> bool:
+    """True when `attr` was already populated, e.g. by eager-loading options."""
+    return attr not in sa_inspect(parent).unloaded
+
+
+def get_loaders(info) -> Loaders:
+    """
+    Return the loaders stored in the execution context, creating them on first
+    use so callers that build their own context (scripts, tests) still batch.
+    """
+    context = info.context
+    if not isinstance(context, dict):
+        return Loaders(db.session)
+    loaders = context.get("loaders")
+    if loaders is None:
+        loaders = context["loaders"] = Loaders(context.get("session") or db.session)
+    return loaders
@@ -7,12 +7,17 @@ import graphene
 from graphql import GraphQLError
 
 from app.auth import requires_auth, AuthError
+from app.extensions import db
 from app.graphql.types import SupportConversationType, ConversationPostType
 
 from app.services.conversation_service import (
     create_conversation as svc_create_conversation,
     assign_conversation as svc_assign_conversation,
     add_post as svc_add_post,
+    assign_conversations as svc_assign_conversations,
+    update_conversation_status as svc_update_conversation_status,
+    update_conversation_statuses as svc_update_conversation_statuses,
+    add_posts as svc_add_posts,
     ValidationError,
     AuthorizationError,
     NotFoundError,
@@ -56,6 +61,7 @@ class CreateConversation(graphene.Mutation):
         except NotFoundError as e:
             raise GraphQLError(str(e))
         except Exception:
+            db.session.rollback()
             raise GraphQLError("Failed to create conversation")
 
 
@@ -88,6 +94,7 @@ class AssignConversation(graphene.Mutation):
         except NotFoundError as e:
             raise GraphQLError(str(e))
         except Exception:
+            db.session.rollback()
             raise GraphQLError("Failed to assign conversation")
 
 
@@ -101,21 +108,18 @@ class UpdateConversationStatus(graphene.Mutation):
     @requires_auth
     def mutate(self, info, conversation_id: int, status: str):
         roles: list[str] = getattr(g, "roles", [])
-        if "support_admin" not in roles:
-            raise AuthError(
-                {"code": "forbidden", "description": "Only support agents can change status."},
-                403,
-            )
-        from app.models.support import SupportConversation  # imported lazily to avoid circular deps
-        from app.extensions import db
-
-        conv = SupportConversation.query.get(conversation_id)
-        if not conv:
+        try:
+            svc_update_conversation_status(conversation_id, status, roles=roles)
+            return UpdateConversationStatus(ok=True)
+        except AuthorizationError as e:
+            raise AuthError({"code": "forbidden", "description": str(e)}, 403)
+        except ValidationError as e:
+            raise GraphQLError(str(e))
+        except NotFoundError:
             return UpdateConversationStatus(ok=False)
-
-        conv.status = status
-        db.session.commit()
-        return UpdateConversationStatus(ok=True)
+        except Exception:
+            db.session.rollback()
+            raise GraphQLError("Failed to update conversation status")
 
 
 class AddPost(graphene.Mutation):
@@ -148,4 +152,107 @@ class AddPost(graphene.Mutation):
         except NotFoundError as e:
             raise GraphQLError(str(e))
         except Exception:
-            raise GraphQLError("Failed to add reply")
\ No newline at end of file
+            db.session.rollback()
+            raise GraphQLError("Failed to add reply")
+
+
+# --------------------------------------------------------------------------- #
+#  Bulk mutations: one transaction, per-item results in input order
+# --------------------------------------------------------------------------- #
+class ConversationResultType(graphene.ObjectType):
+    conversation_id = graphene.Int()
+    ok = graphene.Boolean()
+    error = graphene.String()
+    conversation = graphene.Field(lambda: SupportConversationType)
+
+
+class PostResultType(graphene.ObjectType):
+    conversation_id = graphene.Int()
+    ok = graphene.Boolean()
+    error = graphene.String()
+    post = graphene.Field(lambda: ConversationPostType)
+
+
+class PostInput(graphene.InputObjectType):
+    conversation_id = graphene.Int(required=True)
+    content = graphene.String(required=True)
+    author_display_name = graphene.String(required=False)
+
+
+def _conversation_results(results):
+    return [
+        ConversationResultType(conversation_id=r.conversation_id, ok=r.ok, error=r.error, conversation=r.conversation)
+        for r in results
+    ]
+
+
+class AssignConversations(graphene.Mutation):
+    """Assign many conversations to the authenticated user (support_admin only)."""
+    class Arguments:
+        conversation_ids = graphene.List(graphene.NonNull(graphene.Int), required=True)
+
+    ok = graphene.Boolean()
+    results = graphene.List(ConversationResultType)
+
+    @requires_auth
+    def mutate(self, info, conversation_ids: list[int]):
+        roles: list[str] = getattr(g, "roles", [])
+        current_user: dict = getattr(g, "current_user", {}) or {}
+        try:
+            results = svc_assign_conversations(conversation_ids, roles=roles, current_user=current_user)
+        except AuthorizationError as e:
+            raise AuthError({"code": "forbidden", "description": str(e)}, 403)
+        except ValidationError as e:
+            raise GraphQLError(str(e))
+        except Exception:
+            db.session.rollback()
+            raise GraphQLError("Failed to assign conversations")
+        return AssignConversations(ok=all(r.ok for r in results), results=_conversation_results(results))
+
+
+class UpdateConversationStatuses(graphene.Mutation):
+    class Arguments:
+        conversation_ids = graphene.List(graphene.NonNull(graphene.Int), required=True)
+        status = graphene.String(required=True)  # OPEN | ASSIGNED | RESOLVED | CLOSED
+
+    ok = graphene.Boolean()
+    results = graphene.List(ConversationResultType)
+
+    @requires_auth
+    def mutate(self, info, conversation_ids: list[int], status: str):
+        roles: list[str] = getattr(g, "roles", [])
+        try:
+            results = svc_update_conversation_statuses(conversation_ids, status, roles=roles)
+        except AuthorizationError as e:
+            raise AuthError({"code": "forbidden", "description": str(e)}, 403)
+        except ValidationError as e:
+            raise GraphQLError(str(e))
+        except Exception:
+            db.session.rollback()
+            raise GraphQLError("Failed to update conversation statuses")
+        return UpdateConversationStatuses(ok=all(r.ok for r in results), results=_conversation_results(results))
+
+
+class AddPosts(graphene.Mutation):
+    class Arguments:
+        inputs = graphene.List(graphene.NonNull(PostInput), required=True)
+
+    ok = graphene.Boolean()
+    results = graphene.List(PostResultType)
+
+    def mutate(self, info, inputs: list[dict]):
+        current_user: dict | None = getattr(g, "current_user", None)
+        try:
+            results = svc_add_posts([dict(item) for item in inputs], current_user=current_user)
+        except ValidationError as e:
+            raise GraphQLError(str(e))
+        except Exception:
+            db.session.rollback()
+            raise GraphQLError("Failed to add replies")
+        return AddPosts(
+            ok=all(r.ok for r in results),
+            results=[
+                PostResultType(conversation_id=r.conversation_id, ok=r.ok, error=r.error, post=r.post)
+                for r in results
+            ],
+        )
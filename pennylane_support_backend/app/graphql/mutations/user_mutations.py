@@ -4,7 +4,9 @@ from __future__ import annotations
 import graphene
 
 from app.extensions import db
+from app.identity import identity_cache
 from app.models.user import User
+from app.response_cache import collection_tags, response_cache, row_tags
 from app.graphql.types import UserType
 
 
@@ -31,6 +33,7 @@ class SyncUser(graphene.Mutation):
         # Look up existing user by email; update or create accordingly
         user = User.query.filter_by(email=email).one_or_none()
         if user:
+            identity_cache.forget(user.auth0_id, auth0_id)
             user.username = username
             user.auth0_id = auth0_id
             user.name = resolved_name
@@ -45,4 +48,5 @@ class SyncUser(graphene.Mutation):
             db.session.add(user)
 
         db.session.commit()
+        response_cache.invalidate(*row_tags("User", user.id), *collection_tags("User"))
         return SyncUser(ok=True, user=user)
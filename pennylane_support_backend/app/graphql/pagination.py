@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from graphql import GraphQLError
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = 12
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for a (created_at, id) keyset position."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise GraphQLError("Invalid cursor")
+
+
+def keyset_page(
+    query: Query,
+    ts_col: Any,
+    id_col: Any,
+    *,
+    first: Optional[int] = None,
+    after: Optional[str] = None,
+    last: Optional[int] = None,
+    before: Optional[str] = None,
+) -> Tuple[List[Any], bool, bool]:
+    """
+    Slice `query` newest-first by (ts_col, id_col) without OFFSET.
+
+    Returns (rows, has_next_page, has_previous_page).  Every page is a range
+    scan on the composite index, so latency doesn't grow with depth.  Like
+    most keyset implementations, the "other direction" flag is approximated
+    from the presence of a cursor instead of costing an extra query.
+    """
+    if first is not None and last is not None:
+        raise GraphQLError("Pass either `first` or `last`, not both")
+    if (first is not None and first < 0) or (last is not None and last < 0):
+        raise GraphQLError("`first` and `last` must be non-negative")
+
+    key = tuple_(ts_col, id_col)
+    if after:
+        query = query.filter(key < tuple_(*decode_cursor(after)))
+    if before:
+        query = query.filter(key > tuple_(*decode_cursor(before)))
+
+    if last is not None:
+        # Walk backwards from `before`, then restore newest-first order.
+        size = min(last, MAX_PAGE_SIZE)
+        rows = query.order_by(ts_col.asc(), id_col.asc()).limit(size + 1).all()
+        has_previous = len(rows) > size
+        rows = list(reversed(rows[:size]))
+        return rows, bool(before), has_previous
+
+    size = min(first if first is not None else DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = query.order_by(ts_col.desc(), id_col.desc()).limit(size + 1).all()
+    has_next = len(rows) > size
+    return rows[:size], has_next, bool(after)
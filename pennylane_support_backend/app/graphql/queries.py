@@ -3,19 +3,63 @@ from __future__ import annotations
 import graphene
 from typing import Optional, List
 
-from app.extensions import db
+from app.counts import count_cache, estimate_count, normalize_filters
+from app.extensions import current_session
 from app.models.challenge import Challenge, Tag
 from app.models.support import SupportConversation
 from app.models.user import User
+from app.services import search_service, stats_service
+from .eager import apply_eager_loading, selected_fields
+from .pagination import encode_cursor, keyset_page
 from .types import (
     ChallengeType,
     SupportConversationType,
     TagType,
     PaginatedConversationsType,
     PaginatedChallengesType,
+    ConversationConnectionType,
+    ConversationEdgeType,
+    ConversationSearchHitType,
+    ChallengeSearchHitType,
+    QueueStatsType,
     UserType,
 )
 
+
+def _filter_conversations(
+    q,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    challenge_public_id: Optional[str] = None,
+    assigned_to_user_id: Optional[int] = None,
+):
+    if status:
+        q = q.filter(SupportConversation.status == status)
+    if category:
+        q = q.filter(SupportConversation.category == category)
+    if challenge_public_id:
+        q = q.join(SupportConversation.challenge).filter(Challenge.public_id == challenge_public_id)
+    if assigned_to_user_id is not None:
+        q = q.filter(SupportConversation.assigned_to_user_id == assigned_to_user_id)
+    if search:
+        q = search_service.filter_conversations(q, search)
+    return q
+
+
+# queueStats fields and the queue_stats dimension each one reads; overall
+# totals are summed from the category buckets
+_STATS_DIMENSIONS = {
+    "conversations": "category",
+    "responded": "category",
+    "avgFirstResponseSeconds": "category",
+    "byStatus": stats_service.STATUS,
+    "byCategory": "category",
+    "byAssignee": "assignee",
+    "byChallenge": "challenge",
+}
+
+
 class Query(graphene.ObjectType):
     
     challenges = graphene.List(ChallengeType, search=graphene.String(), tag=graphene.String())
@@ -37,6 +81,20 @@ class Query(graphene.ObjectType):
         page_size=graphene.Int(default_value=12),
     )
 
+    # Keyset (cursor) pagination; prefer this over conversationsPaged for deep pages
+    conversationsConnection = graphene.Field(
+        ConversationConnectionType,
+        status=graphene.String(),
+        category=graphene.String(),
+        search=graphene.String(),
+        challenge_public_id=graphene.String(),
+        assigned_to_user_id=graphene.Int(),
+        first=graphene.Int(),
+        after=graphene.String(),
+        last=graphene.Int(),
+        before=graphene.String(),
+    )
+
     challengesPaged = graphene.Field(
         PaginatedChallengesType,
         search=graphene.String(),
@@ -45,37 +103,58 @@ class Query(graphene.ObjectType):
         page_size=graphene.Int(default_value=12),
     )
 
+    # Ranked full-text search over topic, category and post bodies
+    searchConversations = graphene.List(
+        ConversationSearchHitType,
+        term=graphene.String(required=True),
+        limit=graphene.Int(default_value=20),
+    )
+
+    # Typo-tolerant challenge lookup by title, public id or tag name
+    searchChallenges = graphene.List(
+        ChallengeSearchHitType,
+        term=graphene.String(required=True),
+        limit=graphene.Int(default_value=10),
+        threshold=graphene.Float(),
+    )
+
     # Distinct categories for pickers/filters
     conversationCategories = graphene.List(graphene.String)
     # Distinct users referenced by assigned_to_user_id (for filter)
     assignedUsers = graphene.List(UserType)
 
+    # Dashboard counts and time-to-first-response from the materialized queue_stats table
+    queueStats = graphene.Field(QueueStatsType)
+
     # ---- resolvers ----
     def resolve_challenges(self, info, search: Optional[str] = None, tag: Optional[str] = None):
-        q = db.session.query(Challenge)
+        q = current_session().query(Challenge)
+        order = [Challenge.points.desc()]
         if search:
-            like = f"%{search}%"
-            q = q.filter((Challenge.title.ilike(like)) | (Challenge.description.ilike(like)))
+            q, rank = search_service.filter_challenges(q, search)
+            order.insert(0, rank.desc())
         if tag:
             q = q.join(Challenge.tags).filter(Tag.name == tag)
-        return q.order_by(Challenge.points.desc()).all()
+        q = apply_eager_loading(q, Challenge, info)
+        return q.order_by(*order).all()
 
     def resolve_challenge(self, info, public_id: str):
-        return db.session.query(Challenge).filter_by(public_id=public_id).first()
+        q = current_session().query(Challenge).filter_by(public_id=public_id)
+        return apply_eager_loading(q, Challenge, info).first()
         
     def resolve_conversation(self, info, id: int):
-        return db.session.query(SupportConversation).get(id)
+        return current_session().query(SupportConversation).get(id)
 
     def resolve_conversationsByChallenge(self, info, challenge_public_id: str):
-        return (
-            db.session.query(SupportConversation)
+        q = (
+            current_session().query(SupportConversation)
             .join(SupportConversation.challenge)
             .filter(Challenge.public_id == challenge_public_id)
-            .all()
         )
+        return apply_eager_loading(q, SupportConversation, info).all()
 
     def resolve_tags(self, info):
-        return db.session.query(Tag).order_by(Tag.name).all()
+        return current_session().query(Tag).order_by(Tag.name).all()
 
     def resolve_conversationsPaged(
         self, info,
@@ -87,49 +166,124 @@ class Query(graphene.ObjectType):
         page: int = 1,
         page_size: int = 12,
     ):
-        q = db.session.query(SupportConversation)
-        if status:
-            q = q.filter(SupportConversation.status == status)
-        if category:
-            q = q.filter(SupportConversation.category == category)
-        if challenge_public_id:
-            q = q.join(SupportConversation.challenge).filter(Challenge.public_id == challenge_public_id)
-        if assigned_to_user_id is not None:
-            q = q.filter(SupportConversation.assigned_to_user_id == assigned_to_user_id)
-        if search:
-            like = f"%{search}%"
-            q = q.filter(SupportConversation.topic.ilike(like))
+        q = _filter_conversations(
+            current_session().query(SupportConversation),
+            status, category, search, challenge_public_id, assigned_to_user_id,
+        )
+        filters = normalize_filters(
+            status=status, category=category, search=search,
+            challenge_public_id=challenge_public_id, assigned_to_user_id=assigned_to_user_id,
+        )
+        wanted = selected_fields(info)
 
-        total = q.count()
-        items = (
+        total = total_estimate = None
+        if "total" in wanted:
+            total = count_cache.get_or_compute("conversations", filters, q.count)
+        if "totalEstimate" in wanted:
+            total_estimate = estimate_count(
+                current_session(), q, SupportConversation.__tablename__,
+                filtered=any(v is not None for _, v in filters),
+            )
+
+        # Fetch one extra row so hasNextPage needs no count
+        page_q = (
             q.order_by(SupportConversation.created_at.desc())
              .offset(max(0, (page - 1) * page_size))
-             .limit(page_size)
-             .all()
+             .limit(page_size + 1)
+        )
+        rows = apply_eager_loading(page_q, SupportConversation, info, path=("items",)).all()
+        return PaginatedConversationsType(
+            items=rows[:page_size],
+            total=total,
+            total_estimate=total_estimate,
+            has_next_page=len(rows) > page_size,
+        )
+
+    def resolve_conversationsConnection(
+        self, info,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        challenge_public_id: Optional[str] = None,
+        assigned_to_user_id: Optional[int] = None,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+    ):
+        q = _filter_conversations(
+            current_session().query(SupportConversation),
+            status, category, search, challenge_public_id, assigned_to_user_id,
+        )
+        q = apply_eager_loading(q, SupportConversation, info, path=("edges", "node"))
+        rows, has_next, has_previous = keyset_page(
+            q, SupportConversation.created_at, SupportConversation.id,
+            first=first, after=after, last=last, before=before,
+        )
+        edges = [
+            ConversationEdgeType(cursor=encode_cursor(r.created_at, r.id), node=r)
+            for r in rows
+        ]
+        return ConversationConnectionType(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                has_next_page=has_next,
+                has_previous_page=has_previous,
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
         )
-        return PaginatedConversationsType(items=items, total=total)
 
     def resolve_challengesPaged(self, info, search: Optional[str] = None, tag: Optional[str] = None,
                                 page: int = 1, page_size: int = 12):
-        q = db.session.query(Challenge)
+        q = current_session().query(Challenge)
+        order = [Challenge.points.desc()]
         if search:
-            like = f"%{search}%"
-            q = q.filter((Challenge.title.ilike(like)) | (Challenge.description.ilike(like)))
+            q, rank = search_service.filter_challenges(q, search)
+            order.insert(0, rank.desc())
         if tag:
             q = q.join(Challenge.tags).filter(Tag.name == tag)
 
-        total = q.count()
-        items = (
-            q.order_by(Challenge.points.desc())
+        filters = normalize_filters(search=search, tag=tag)
+        wanted = selected_fields(info)
+
+        total = total_estimate = None
+        if "total" in wanted:
+            total = count_cache.get_or_compute("challenges", filters, q.count)
+        if "totalEstimate" in wanted:
+            total_estimate = estimate_count(
+                current_session(), q, Challenge.__tablename__,
+                filtered=any(v is not None for _, v in filters),
+            )
+
+        page_q = (
+            q.order_by(*order)
              .offset(max(0, (page - 1) * page_size))
-             .limit(page_size)
-             .all()
+             .limit(page_size + 1)
         )
-        return PaginatedChallengesType(items=items, total=total)
+        rows = apply_eager_loading(page_q, Challenge, info, path=("items",)).all()
+        return PaginatedChallengesType(
+            items=rows[:page_size],
+            total=total,
+            total_estimate=total_estimate,
+            has_next_page=len(rows) > page_size,
+        )
+
+    def resolve_searchConversations(self, info, term: str, limit: int = 20):
+        return [
+            ConversationSearchHitType(conversation=conv, rank=rank, snippet=snippet)
+            for conv, rank, snippet in search_service.search_conversations(term, limit, session=current_session())
+        ]
+
+    def resolve_searchChallenges(self, info, term: str, limit: int = 10, threshold: Optional[float] = None):
+        return [
+            ChallengeSearchHitType(challenge=challenge, score=score)
+            for challenge, score in search_service.fuzzy_challenges(term, limit, threshold, session=current_session())
+        ]
 
     def resolve_conversationCategories(self, info) -> List[str]:
         rows = (
-            db.session.query(SupportConversation.category)
+            current_session().query(SupportConversation.category)
             .distinct()
             .order_by(SupportConversation.category.asc())
             .all()
@@ -138,10 +292,24 @@ class Query(graphene.ObjectType):
 
     def resolve_assignedUsers(self, info):
         rows = (
-            db.session.query(User)
+            current_session().query(User)
             .join(SupportConversation, SupportConversation.assigned_to_user_id == User.id)
             .distinct()
             .order_by(User.username.asc())
             .all()
         )
         return rows
+
+    def resolve_queueStats(self, info):
+        dimensions = {_STATS_DIMENSIONS[f] for f in selected_fields(info) if f in _STATS_DIMENSIONS}
+        buckets = stats_service.queue_stats(dimensions, session=current_session())
+        overall = stats_service.totals(buckets.get("category", ()))
+        return QueueStatsType(
+            conversations=overall.conversations,
+            responded=overall.responded,
+            avg_first_response_seconds=overall.avg_first_response_seconds,
+            by_status=buckets.get(stats_service.STATUS),
+            by_category=buckets.get("category"),
+            by_assignee=buckets.get("assignee"),
+            by_challenge=buckets.get("challenge"),
+        )
@@ -1,11 +1,15 @@
 import graphene
 from .queries import Query
+from .subscriptions import Subscription
 from .mutations.user_mutations import SyncUser
 from .mutations.conversation_mutations import (
     CreateConversation,
     AddPost,
     AssignConversation,
     UpdateConversationStatus,
+    AssignConversations,
+    UpdateConversationStatuses,
+    AddPosts,
 )
 
 class Mutation(graphene.ObjectType):
@@ -14,5 +18,8 @@ class Mutation(graphene.ObjectType):
     addPost = AddPost.Field()
     assignConversation = AssignConversation.Field()        
     updateConversationStatus = UpdateConversationStatus.Field()
+    assignConversations = AssignConversations.Field()
+    updateConversationStatuses = UpdateConversationStatuses.Field()
+    addPosts = AddPosts.Field()
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
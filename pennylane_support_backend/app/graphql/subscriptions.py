@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import graphene
+
+from app.events import CONVERSATION_UPDATED, POST_ADDED, QUEUE_CHANGED
+from app.extensions import current_session
+from app.models.support import ConversationPost, SupportConversation
+from .eager import apply_eager_loading
+from .types import ConversationPostType, QueueChangeType, SupportConversationType
+
+
+def _conversation(info, conversation_id: int, path=()):
+    q = current_session().query(SupportConversation).filter(SupportConversation.id == conversation_id)
+    return apply_eager_loading(q, SupportConversation, info, path).one_or_none()
+
+
+class Subscription(graphene.ObjectType):
+    """
+    Live updates, served over Server-Sent Events at /graphql/stream.
+
+    The root value is the connection's stream of app.events.Event; each
+    field filters it and loads the affected rows when an event matches.
+    """
+
+    conversationUpdated = graphene.Field(SupportConversationType, id=graphene.Int(required=True))
+    postAdded = graphene.Field(ConversationPostType, conversation_id=graphene.Int(required=True))
+    queueChanged = graphene.Field(QueueChangeType, status=graphene.String(), category=graphene.String())
+
+    def resolve_conversationUpdated(events, info, id: int):
+        return (
+            events.filter(lambda e: e.kind == CONVERSATION_UPDATED and e.conversation_id == id)
+            .map(lambda e: _conversation(info, e.conversation_id))
+        )
+
+    def resolve_postAdded(events, info, conversation_id: int):
+        return (
+            events.filter(lambda e: e.kind == POST_ADDED and e.conversation_id == conversation_id)
+            .map(lambda e: current_session().query(ConversationPost).get(e.post_id))
+        )
+
+    def resolve_queueChanged(events, info, status: Optional[str] = None, category: Optional[str] = None):
+        def matches(e) -> bool:
+            # a status filter hears about conversations joining and leaving it
+            return (
+                e.kind == QUEUE_CHANGED
+                and (status is None or status in (e.status, e.previous_status))
+                and (category is None or category == e.category)
+            )
+
+        return events.filter(matches).map(lambda e: QueueChangeType(
+            conversation=_conversation(info, e.conversation_id, ("conversation",)),
+            status=e.status,
+            previous_status=e.previous_status,
+            category=e.category,
+        ))
@@ -2,10 +2,12 @@ import graphene
 from graphene_sqlalchemy import SQLAlchemyObjectType
 from graphene import relay
 
-from app.extensions import db
 from app.models.user import User
 from app.models.challenge import Challenge, ChallengeHint, LearningObjective, Tag
 from app.models.support import SupportConversation, ConversationPost
+from .loaders import get_loaders, is_loaded
+
+
 class UserType(SQLAlchemyObjectType):
 
     class Meta:
@@ -43,46 +45,159 @@ class SupportConversationType(SQLAlchemyObjectType):
 
     class Meta:
         model = SupportConversation
+        exclude_fields = ("search_vector", "content_hash")
 
     posts = graphene.List(lambda: ConversationPostType)
     assigned_support = graphene.Field(lambda: UserType)
+    challenge = graphene.Field(lambda: ChallengeType)
 
-    # resolvers
+    # resolvers – use eager-loaded relationships when present, otherwise
+    # batch per request through app.graphql.loaders
     def resolve_posts(parent, info):
-        return parent.posts
+        if is_loaded(parent, "posts"):
+            return parent.posts
+        return get_loaders(info).posts_by_conversation.load(parent.id)
 
     def resolve_assigned_support(parent, info):
+        if is_loaded(parent, "assigned_support"):
+            return parent.assigned_support
         if parent.assigned_to_user_id: 
-            return db.session.query(User).get(parent.assigned_to_user_id)
+            return get_loaders(info).users.load(parent.assigned_to_user_id)
+        return None
+
+    def resolve_challenge(parent, info):
+        if is_loaded(parent, "challenge"):
+            return parent.challenge
+        if parent.challenge_id:
+            return get_loaders(info).challenges.load(parent.challenge_id)
         return None
 
 
 class ChallengeType(SQLAlchemyObjectType):
     class Meta:
         model = Challenge
+        exclude_fields = ("search_vector", "content_hash")
 
     assigned_support = graphene.Field(UserType)
     conversations = graphene.List(lambda: SupportConversationType)
     hints = graphene.List(lambda: ChallengeHintType)
     learning_objectives = graphene.List(lambda: LearningObjectiveType)
-
+    tags = graphene.List(lambda: TagType)
+
+    # resolvers – use eager-loaded relationships when present, otherwise
+    # batch per request through app.graphql.loaders
+    def resolve_assigned_support(parent: Challenge, info):
+        if is_loaded(parent, "assigned_support"):
+            return parent.assigned_support
+        if parent.assigned_support_user_id:
+            return get_loaders(info).users.load(parent.assigned_support_user_id)
+        return None
 
     def resolve_conversations(parent: Challenge, info):
-        return parent.conversations
+        if is_loaded(parent, "conversations"):
+            return parent.conversations
+        return get_loaders(info).conversations_by_challenge.load(parent.id)
 
     def resolve_hints(parent: Challenge, info):
-        return parent.hints
+        if is_loaded(parent, "hints"):
+            return parent.hints
+        return get_loaders(info).hints_by_challenge.load(parent.id)
 
     def resolve_learning_objectives(parent: Challenge, info):
-        return parent.learning_objectives
+        if is_loaded(parent, "learning_objectives"):
+            return parent.learning_objectives
+        return get_loaders(info).learning_objectives_by_challenge.load(parent.id)
+
+    def resolve_tags(parent: Challenge, info):
+        if is_loaded(parent, "tags"):
+            return parent.tags
+        return get_loaders(info).tags_by_challenge.load(parent.id)
 
 
 
+class ConversationSearchHitType(graphene.ObjectType):
+    conversation = graphene.Field(SupportConversationType)
+    rank = graphene.Float()
+    # Matching fragments wrapped in <mark>…</mark>
+    snippet = graphene.String()
+
+
+class ChallengeSearchHitType(graphene.ObjectType):
+    challenge = graphene.Field(ChallengeType)
+    # Trigram similarity in [0, 1]
+    score = graphene.Float()
+
+
 class PaginatedConversationsType(graphene.ObjectType):
     items = graphene.List(SupportConversationType)
+    # Only computed when selected; total_estimate uses the planner's row estimate
     total = graphene.Int()
+    total_estimate = graphene.Int()
+    has_next_page = graphene.Boolean()
 
 
 class PaginatedChallengesType(graphene.ObjectType):
     items = graphene.List(ChallengeType)
     total = graphene.Int()
+    total_estimate = graphene.Int()
+    has_next_page = graphene.Boolean()
+
+
+class QueueChangeType(graphene.ObjectType):
+    """A conversation entered or left a status queue (queueChanged subscription)."""
+    conversation = graphene.Field(SupportConversationType)
+    status = graphene.String()
+    previous_status = graphene.String()
+    category = graphene.String()
+
+
+class StatusCountType(graphene.ObjectType):
+    status = graphene.String()
+    count = graphene.Int()
+
+
+class QueueStatBucketType(graphene.ObjectType):
+    """Conversations in one status, category, assignee or challenge (see stats_service.Bucket)."""
+    # Status, category name, user id or challenge id; null for "none"
+    key = graphene.String()
+    conversations = graphene.Int()
+    responded = graphene.Int()
+    avg_first_response_seconds = graphene.Float()
+    statuses = graphene.List(StatusCountType)
+    assignee = graphene.Field(UserType)
+    challenge = graphene.Field(ChallengeType)
+
+    def resolve_statuses(parent, info):
+        return [StatusCountType(status=s, count=n) for s, n in sorted(parent.statuses.items())]
+
+    def resolve_assignee(parent, info):
+        if parent.dimension == "assignee" and parent.key:
+            return get_loaders(info).users.load(int(parent.key))
+        return None
+
+    def resolve_challenge(parent, info):
+        if parent.dimension == "challenge" and parent.key:
+            return get_loaders(info).challenges.load(int(parent.key))
+        return None
+
+
+class QueueStatsType(graphene.ObjectType):
+    """Dashboard aggregates read from the materialized queue_stats table."""
+    conversations = graphene.Int()
+    responded = graphene.Int()
+    avg_first_response_seconds = graphene.Float()
+    by_status = graphene.List(QueueStatBucketType)
+    by_category = graphene.List(QueueStatBucketType)
+    by_assignee = graphene.List(QueueStatBucketType)
+    by_challenge = graphene.List(QueueStatBucketType)
+
+
+class ConversationEdgeType(graphene.ObjectType):
+    cursor = graphene.String(required=True)
+    node = graphene.Field(SupportConversationType)
+
+
+class ConversationConnectionType(graphene.ObjectType):
+    """Relay-style connection with keyset cursors over (created_at, id)."""
+    edges = graphene.List(ConversationEdgeType)
+    page_info = graphene.Field(relay.PageInfo, required=True)
@@ -0,0 +1,205 @@
+"""
+Resolved caller identity: Auth0 subject -> local User.id.
+
+`requires_auth` resolves the subject once per request and exposes the id as
+`g.user_id`; services take it from there (or from `user_id_for`) instead of
+looking the user up themselves.  Resolutions are shared by all requests of
+the process through a TTL cache; a miss upserts the User row from the
+token's claims, so claim changes (name, real e-mail) are picked up at most
+IDENTITY_CACHE_TTL seconds late.  The upsert runs in a session of its own,
+so it never commits or rolls back the request's db.session.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Set, Tuple
+
+from flask import g, has_app_context
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.user import User
+
+CLAIMS_NAMESPACE = "https://pennylane.app/"
+
+# Tries at creating a subject's row when concurrent inserts keep taking the
+# username or e-mail it picked
+UPSERT_ATTEMPTS = 3
+
+
+class IdentityCache:
+    """Bounded LRU of subject -> User.id entries that expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = max_size > 0 and ttl > 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, sub: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(sub)
+            if entry is None or entry[0] <= self._clock():
+                self._entries.pop(sub, None)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(sub)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, sub: str, user_id: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[sub] = (self._clock() + self.ttl, user_id)
+            self._entries.move_to_end(sub)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def forget(self, *subs: Optional[str]) -> None:
+        """Drop entries whose mapping changed (e.g. SyncUser moved an auth0_id)."""
+        with self._lock:
+            for sub in subs:
+                self._entries.pop(sub, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        snapshot["max_size"] = self.max_size
+        return snapshot
+
+
+# One cache for the whole process; IDENTITY_CACHE_SIZE=0 resolves every request.
+identity_cache = IdentityCache(
+    max_size=int(os.getenv("IDENTITY_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("IDENTITY_CACHE_TTL", "300")),
+)
+
+
+def _claim(claims: Mapping[str, Any], name: str) -> Optional[str]:
+    return claims.get(name) or claims.get(f"{CLAIMS_NAMESPACE}{name}")
+
+
+def _placeholder_email(sub: str) -> str:
+    return f"{sub.replace('|', '_')}@example.com"
+
+
+def _free_username(session: Session, wanted: str) -> str:
+    """`wanted`, or `wanted-2`, `wanted-3`, ... when another user has it."""
+    base = wanted[:72] or "user"
+    taken: Set[str] = {
+        username for (username,) in session.query(User.username).filter(User.username.startswith(base, autoescape=True))
+    }
+    if base not in taken:
+        return base
+    n = 2
+    while f"{base}-{n}" in taken:
+        n += 1
+    return f"{base}-{n}"
+
+
+def _email_taken(session: Session, email: str) -> bool:
+    return session.query(User.id).filter(User.email == email).first() is not None
+
+
+def _create_user(session: Session, sub: str, claims: Mapping[str, Any]) -> User:
+    name_claim = _claim(claims, "name")
+    email_claim = _claim(claims, "email")
+    username_source = claims.get("nickname") or name_claim or email_claim or sub
+    for _ in range(UPSERT_ATTEMPTS):
+        # username and e-mail are unique too: take free ones, not the first
+        # account's that happens to share a nickname or address
+        user = User(
+            username=_free_username(session, str(username_source).split("@")[0]),
+            email=email_claim if email_claim and not _email_taken(session, email_claim) else _placeholder_email(sub),
+            auth0_id=sub,
+            name=name_claim,
+        )
+        session.add(user)
+        try:
+            session.commit()
+            return user
+        except IntegrityError:
+            session.rollback()
+        # a concurrent request may have created this subject's row first,
+        # or taken the username / e-mail we picked
+        user = session.query(User).filter_by(auth0_id=sub).one_or_none()
+        if user is not None:
+            return user
+    raise RuntimeError(f"Could not create a user for {sub!r} after {UPSERT_ATTEMPTS} attempts")
+
+
+def _refresh_user(session: Session, user: User, claims: Mapping[str, Any]) -> None:
+    name_claim = _claim(claims, "name")
+    email_claim = _claim(claims, "email")
+    if not user.name and name_claim:
+        user.name = name_claim
+    if email_claim:
+        is_placeholder = (not user.email) or user.email.endswith("@example.com")
+        if is_placeholder and user.email != email_claim and not _email_taken(session, email_claim):
+            user.email = email_claim
+    if session.is_modified(user):
+        try:
+            session.commit()
+        except IntegrityError:
+            # someone claimed the e-mail meanwhile; keep the placeholder
+            session.rollback()
+
+
+def upsert_user(claims: Mapping[str, Any], bind: Optional[Engine] = None) -> User:
+    """
+    The User for `claims["sub"]`, created on first sight with a free
+    username and, if the claimed one is taken, a placeholder e-mail; a
+    missing name or placeholder e-mail is filled in from the claims.
+
+    Runs in its own session on `bind` (default: db.engine) and commits
+    there, so the row outlives the caller's transaction whatever becomes of
+    it.  The returned User is detached.
+    """
+    sub = claims["sub"]
+    with Session(bind=bind if bind is not None else db.engine, expire_on_commit=False) as session:
+        user = session.query(User).filter_by(auth0_id=sub).one_or_none()
+        if user is None:
+            return _create_user(session, sub, claims)
+        _refresh_user(session, user, claims)
+        return user
+
+
+def resolve_user_id(claims: Mapping[str, Any], session: Optional[Session] = None) -> int:
+    """Local User.id for verified token claims; cached, upserted on a miss
+    (on `session`'s database, outside its transaction)."""
+    sub = claims["sub"]
+    user_id = identity_cache.get(sub)
+    if user_id is None:
+        user_id = upsert_user(claims, bind=(session or db.session).get_bind()).id
+        identity_cache.put(sub, user_id)
+    return user_id
+
+
+def user_id_for(claims: Optional[Mapping[str, Any]], session: Optional[Session] = None) -> Optional[int]:
+    """
+    User.id for `claims`: the request's `g.user_id` when requires_auth
+    resolved the same subject, otherwise resolve_user_id.  None without a
+    subject.
+    """
+    sub = claims.get("sub") if isinstance(claims, Mapping) else None
+    if not sub:
+        return None
+    if has_app_context() and getattr(g, "user_sub", None) == sub:
+        return g.user_id
+    return resolve_user_id(claims, session)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# A fetcher returns the decoded JWKS document and the max-age (seconds) taken
+# from the response's Cache-Control header, or None when the header is absent.
+Fetcher = Callable[[str], Tuple[Dict[str, Any], Optional[int]]]
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Return the max-age from a Cache-Control header value, if any."""
+    if not cache_control:
+        return None
+    lowered = cache_control.lower()
+    if "no-store" in lowered or "no-cache" in lowered:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else None
+
+
+class JWKSCache:
+    """
+    Process-wide store for the identity provider's signing keys.
+
+    * Keys are kept for the max-age advertised by the provider (falling back
+      to `default_ttl`) and are refreshed in a background thread once they
+      are within `refresh_ahead` seconds of expiring.
+    * Concurrent misses share a single in-flight fetch (single-flight).
+    * An unknown `kid` triggers a refetch, at most once per
+      `min_refetch_interval` seconds, so forged kids can't hammer the provider.
+    * `generation` is bumped whenever the set of kids changes, which lets
+      dependent caches notice key rotation.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fetcher: Fetcher,
+        *,
+        default_ttl: float = 600.0,
+        refresh_ahead: float = 60.0,
+        min_refetch_interval: float = 30.0,
+        fetch_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.url = url
+        self._fetcher = fetcher
+        self.default_ttl = default_ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.fetch_timeout = fetch_timeout
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._inflight: Optional[threading.Event] = None
+        self._keys: Optional[Dict[str, Dict[str, Any]]] = None
+        self._expires_at: float = 0.0
+        self._refresh_at: float = 0.0
+        self._last_fetch_at: Optional[float] = None
+        self._last_error: Optional[BaseException] = None
+        self.generation = 0
+
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "fetches": 0,
+            "background_refreshes": 0,
+            "unknown_kid_refetches": 0,
+            "rate_limited": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    #  Public API
+    # ------------------------------------------------------------------ #
+    def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """Return the JWK for `kid`, fetching or refreshing the set as needed."""
+        now = self._clock()
+        keys = self._keys
+        if keys is None or now >= self._expires_at:
+            self._count("misses")
+            keys = self._refresh()
+        else:
+            self._count("hits")
+            if now >= self._refresh_at:
+                self._refresh_in_background()
+
+        key = keys.get(kid)
+        if key is None and self._may_refetch_unknown_kid():
+            self._count("unknown_kid_refetches")
+            key = self._refresh(force=True).get(kid)
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the hit/miss counters and cache state."""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+        keys = self._keys
+        snapshot["keys"] = len(keys) if keys is not None else 0
+        snapshot["generation"] = self.generation
+        snapshot["expires_in"] = max(0.0, self._expires_at - self._clock()) if keys is not None else 0.0
+        return snapshot
+
+    def clear(self) -> None:
+        """Forget the cached key set (mainly for tests)."""
+        with self._lock:
+            self._keys = None
+            self._expires_at = 0.0
+            self._refresh_at = 0.0
+            self._last_fetch_at = None
+            self._last_error = None
+
+    # ------------------------------------------------------------------ #
+    #  Internals
+    # ------------------------------------------------------------------ #
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def _may_refetch_unknown_kid(self) -> bool:
+        with self._lock:
+            if not self._fetch_allowed_locked():
+                self._stats["rate_limited"] += 1
+                return False
+            return True
+
+    def _fetch_allowed_locked(self) -> bool:
+        last = self._last_fetch_at
+        return last is None or self._clock() - last >= self.min_refetch_interval
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._inflight is not None or not self._fetch_allowed_locked():
+                return
+            self._stats["background_refreshes"] += 1
+        thread = threading.Thread(target=self._refresh_quietly, name="jwks-refresh", daemon=True)
+        thread.start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self._refresh()
+        except Exception:
+            # Errors are counted in _refresh; the current keys keep serving.
+            pass
+
+    def _refresh(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Fetch the key set, sharing one in-flight request between callers."""
+        with self._lock:
+            if not force and self._keys is not None and self._clock() < self._refresh_at:
+                # Another caller refreshed while we were waiting for the lock.
+                return self._keys
+            event = self._inflight
+            leader = event is None
+            if leader:
+                event = self._inflight = threading.Event()
+
+        if not leader:
+            event.wait(self.fetch_timeout)
+            keys = self._keys
+            if keys is None:
+                raise self._last_error or TimeoutError("Timed out waiting for JWKS")
+            return keys
+
+        try:
+            self._count("fetches")
+            document, max_age = self._fetcher(self.url)
+            keys = {k["kid"]: k for k in document.get("keys", []) if k.get("kid")}
+            ttl = self.default_ttl if max_age is None else float(max_age)
+            # Never let a tiny max-age turn every request into a fetch.
+            ttl = max(ttl, self.min_refetch_interval)
+            now = self._clock()
+            with self._lock:
+                if self._keys is None or set(self._keys) != set(keys):
+                    self.generation += 1
+                self._keys = keys
+                self._expires_at = now + ttl
+                self._refresh_at = now + ttl - min(self.refresh_ahead, ttl / 2)
+                self._last_fetch_at = now
+                self._last_error = None
+            return keys
+        except Exception as err:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._last_error = err
+                self._last_fetch_at = self._clock()
+                stale = self._keys
+                if stale is not None:
+                    # Back off before the next attempt instead of retrying per request.
+                    self._expires_at = self._last_fetch_at + self.min_refetch_interval
+                    self._refresh_at = self._expires_at
+            if stale is not None:
+                # Serve the previous key set rather than failing every request.
+                return stale
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+            event.set()
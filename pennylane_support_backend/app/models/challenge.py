@@ -1,10 +1,39 @@
 
 from sqlalchemy import ForeignKey
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateColumn
 from app.extensions import db
 
+# Same expression as migration 5c1e7a9d2b40
+CHALLENGE_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_create_column(element, compiler, **kw):
+    """SQLite has no tsvector functions: create PostgreSQL-only generated columns as plain ones."""
+    column = element.element
+    if column.info.get("postgresql_only_computed"):
+        type_ = compiler.dialect.type_compiler.process(column.type.dialect_impl(compiler.dialect))
+        return f"{compiler.preparer.format_column(column)} {type_}"
+    return compiler.visit_create_column(element, **kw)
+
+
 class Challenge(db.Model):
     __tablename__ = "challenges"
+    __table_args__ = (
+        db.Index("ix_challenges_search_vector", "search_vector", postgresql_using="gin"),
+        # pg_trgm indexes for fuzzy lookup (searchChallenges)
+        db.Index("ix_challenges_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        db.Index(
+            "ix_challenges_public_id_trgm", "public_id",
+            postgresql_using="gin", postgresql_ops={"public_id": "gin_trgm_ops"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(80), unique=True, nullable=False) 
@@ -28,6 +57,16 @@ class Challenge(db.Model):
     tags = db.relationship("Tag", secondary="challenge_tags", back_populates="challenges")
     conversations = db.relationship("SupportConversation", back_populates="challenge")
 
+    # Generated tsvector over title and description (PostgreSQL); never written by the app.
+    # On SQLite it stays NULL and search uses the FTS5 mirror (app/services/search_service.py).
+    search_vector = db.deferred(db.Column(
+        TSVECTOR().with_variant(db.Text(), "sqlite"),
+        db.Computed(CHALLENGE_SEARCH_DOCUMENT, persisted=True),
+        info={"postgresql_only_computed": True},
+    ))
+    # SHA-256 of the source export item; lets re-seeding skip unchanged rows
+    content_hash = db.Column(db.String(64), nullable=True)
+
 class ChallengeHint(db.Model):
     __tablename__ = "challenge_hints"
     id = db.Column(db.Integer, primary_key=True)
@@ -44,6 +83,9 @@ class LearningObjective(db.Model):
 
 class Tag(db.Model):
     __tablename__ = "tags"
+    __table_args__ = (
+        db.Index("ix_tags_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False, index=True)
     challenges = db.relationship("Challenge", secondary="challenge_tags", back_populates="tags")
@@ -0,0 +1,29 @@
+from app.extensions import db
+
+
+class OutboxEvent(db.Model):
+    """
+    A change event waiting for the background dispatcher (app/outbox.py).
+    Rows are written in the same transaction as the change they describe and
+    deleted once every handler for their topic has succeeded; parked rows are
+    pruned after the dispatcher's retention.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The dispatcher's scan: due, not dead-lettered, oldest first
+        db.Index("ix_outbox_events_due", "failed_at", "available_at", "id"),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer(), "sqlite"), primary_key=True)
+    topic = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    # Not delivered before this time (pushed back after each failure, and
+    # by the claim's lease while a dispatcher delivers it)
+    available_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_error = db.Column(db.Text, nullable=True)
+    # When a dispatcher last claimed the row; cleared when a delivery fails
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    # Set when the event ran out of attempts; kept for inspection and replay
+    failed_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,23 @@
+from app.extensions import db
+
+
+class QueueStat(db.Model):
+    """
+    Materialized conversation counts for the support dashboard (queueStats).
+    One row per (dimension, bucket, status); per-status and overall totals
+    are summed from the category rows when read.  Kept current by triggers on
+    support_conversations and rebuilt by `flask rebuild-queue-stats`
+    (app/services/stats_service.py).
+    """
+    __tablename__ = "queue_stats"
+
+    # category | assignee | challenge
+    dimension = db.Column(db.String(16), primary_key=True)
+    # category name, user id or challenge id as text; "" for none
+    bucket = db.Column(db.String(255), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+
+    conversations = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Conversations with a first reply, and the sum of their first_response_seconds
+    responded = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    response_seconds = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
@@ -1,7 +1,14 @@
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
 from app.extensions import db
 
 class SupportConversation(db.Model):
     __tablename__ = "support_conversations"
+    __table_args__ = (
+        # Keyset pagination order for conversationsConnection
+        db.Index("ix_support_conversations_created_at_id", "created_at", "id"),
+        db.Index("ix_support_conversations_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     identifier = db.Column(db.String(32), unique=True, nullable=False, index=True)  # e.g. "CONV_001"
@@ -16,12 +23,23 @@ class SupportConversation(db.Model):
 
     created_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
     assigned_to_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
+    # Read-only view of the assignee; writes go through assigned_to_user_id
+    assigned_support = db.relationship("User", foreign_keys=[assigned_to_user_id], viewonly=True)
 
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now(), nullable=False)
 
     posts = db.relationship("ConversationPost", back_populates="conversation", cascade="all, delete-orphan", order_by="ConversationPost.created_at")
 
+    # Full-text document over topic, category and post bodies; kept current
+    # by database triggers (migration 5c1e7a9d2b40)
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), "sqlite"), nullable=True))
+    # SHA-256 of the source export item; lets re-seeding skip unchanged rows
+    content_hash = db.Column(db.String(64), nullable=True)
+    # Seconds from the opening post to the first reply; maintained by a
+    # trigger on conversation_posts (app/services/stats_service.py)
+    first_response_seconds = db.Column(db.Integer, nullable=True)
+
 class ConversationPost(db.Model):
     __tablename__ = "conversation_posts"
     id = db.Column(db.Integer, primary_key=True)
@@ -32,3 +50,5 @@ class ConversationPost(db.Model):
     author_display_name = db.Column(db.String(120), nullable=True)  # for imported/anonymous posts
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    # Written by the seed import; re-imports replace only these, never in-app replies
+    imported = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
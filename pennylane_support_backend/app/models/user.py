@@ -10,7 +10,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     name     = db.Column(db.String(120)) 
     roles = db.Column(
-        postgresql.ARRAY(db.String),
+        postgresql.ARRAY(db.String).with_variant(db.JSON, "sqlite"),
         nullable=False,
         default=list,
         server_default='{}'
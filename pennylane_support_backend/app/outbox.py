@@ -0,0 +1,235 @@
+"""
+Transactional outbox for slow side effects of conversation changes.
+
+Every app.events.Event published by the service layer whose topic has a
+registered handler is also written to outbox_events by the committing
+transaction itself, so an event exists if and only if its change does.
+Handlers are registered by the modules in OUTBOX_HANDLER_MODULES, which
+create_app() imports in every process.  `flask run-outbox` drains the table
+in batches and calls the handlers registered for each topic; mutations pay
+for one INSERT no matter how many handlers there are.
+
+A dispatcher claims a batch (FOR UPDATE SKIP LOCKED on PostgreSQL, so
+several can run side by side), stamps it claimed_at and leases it by pushing
+available_at `claim_timeout` seconds ahead, and commits before calling any
+handler: slow handlers hold no row locks.  Delivery is at least once: a row
+is deleted only after all its handlers succeed, and rows of a dispatcher
+that dies mid-batch come due again when their lease runs out, so handlers
+must be idempotent.  Failures are retried with exponential backoff until
+`max_attempts`, then parked (failed_at) for inspection, and pruned after
+`retention`.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import events
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[events.Event], Any]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def handler(*topics: str) -> Callable[[Handler], Handler]:
+    """Register the decorated function for events of `topics` (Event.kind)."""
+    def register(fn: Handler) -> Handler:
+        for topic in topics:
+            if fn not in _handlers[topic]:
+                _handlers[topic].append(fn)
+        return fn
+    return register
+
+
+def load_handlers(modules: Iterable[str]) -> None:
+    """Import modules that register handlers (OUTBOX_HANDLER_MODULES)."""
+    for name in modules:
+        importlib.import_module(name)
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+# --------------------------------------------------------------------------- #
+#  Writing
+# --------------------------------------------------------------------------- #
+def _write_pending(session: Session) -> None:
+    # topics nobody handles would only be written to be deleted
+    pending = [ev for ev in events.pending(session) if _handlers.get(ev.kind)]
+    if not pending:
+        return
+    now = _utcnow()
+    session.execute(insert(OutboxEvent.__table__), [
+        {"topic": ev.kind, "payload": ev.as_dict(), "available_at": now, "attempts": 0} for ev in pending
+    ])
+
+
+def install() -> None:
+    """Write published events to the outbox in their transaction (idempotent)."""
+    if not event.contains(Session, "before_commit", _write_pending):
+        event.listen(Session, "before_commit", _write_pending)
+
+
+# --------------------------------------------------------------------------- #
+#  Dispatching
+# --------------------------------------------------------------------------- #
+class Dispatcher:
+    """Drains outbox_events; see the module docstring."""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = 100, max_attempts: int = 10,
+                 backoff: float = 2.0, max_backoff: float = 600.0, claim_timeout: float = 300.0,
+                 retention: Optional[timedelta] = timedelta(days=7), prune_interval: float = 3600.0,
+                 handlers: Optional[Dict[str, List[Handler]]] = None) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.claim_timeout = claim_timeout
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.handlers = _handlers if handlers is None else handlers
+        self.stats = {"delivered": 0, "retried": 0, "failed": 0, "pruned": 0}
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds before attempt `attempts + 1`."""
+        return min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    def run_once(self) -> int:
+        """Deliver one batch of due events; returns how many were claimed."""
+        session = self.session_factory()
+        try:
+            claimed = self._claim(session)
+            delivered: List[int] = []
+            failed: List[Tuple[int, str, int, Exception]] = []
+            for row_id, topic, payload, attempts in claimed:
+                try:
+                    self._deliver(topic, payload)
+                except Exception as err:
+                    failed.append((row_id, topic, attempts + 1, err))
+                else:
+                    delivered.append(row_id)
+            if delivered:
+                session.execute(delete(OutboxEvent.__table__).where(OutboxEvent.id.in_(delivered)))
+                self.stats["delivered"] += len(delivered)
+            for row_id, topic, attempts, err in failed:
+                self._reschedule(session, row_id, topic, attempts, err)
+            session.commit()
+            return len(claimed)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _claim(self, session: Session) -> List[Tuple[int, str, Dict[str, Any], int]]:
+        """Lease a batch of due rows and commit, so handlers run without row locks."""
+        now = _utcnow()
+        rows = session.execute(
+            select(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.attempts)
+            .where(OutboxEvent.failed_at.is_(None), OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if rows:
+            session.execute(
+                update(OutboxEvent.__table__)
+                .where(OutboxEvent.id.in_([row.id for row in rows]))
+                .values(claimed_at=now, available_at=now + timedelta(seconds=self.claim_timeout))
+            )
+        session.commit()
+        return [tuple(row) for row in rows]
+
+    def _deliver(self, topic: str, payload: Dict[str, Any]) -> None:
+        ev = events.Event(**payload)
+        for fn in self.handlers.get(topic, ()):
+            fn(ev)
+
+    def _reschedule(self, session: Session, row_id: int, topic: str, attempts: int, err: Exception) -> None:
+        last_error = f"{type(err).__name__}: {err}"[:2000]
+        values: Dict[str, Any] = {"attempts": attempts, "last_error": last_error, "claimed_at": None}
+        if attempts >= self.max_attempts:
+            values["failed_at"] = _utcnow()
+            self.stats["failed"] += 1
+            logger.error("Outbox event %s (%s) failed %d times; parked: %s", row_id, topic, attempts, last_error)
+        else:
+            values["available_at"] = _utcnow() + timedelta(seconds=self.retry_delay(attempts))
+            self.stats["retried"] += 1
+            logger.warning("Outbox event %s (%s) failed, retry %d: %s", row_id, topic, attempts, last_error)
+        session.execute(update(OutboxEvent.__table__).where(OutboxEvent.id == row_id).values(**values))
+
+    def prune(self) -> int:
+        """Delete events parked for longer than `retention`; returns how many."""
+        if self.retention is None:
+            return 0
+        session = self.session_factory()
+        try:
+            count = prune_parked(session, self.retention)
+        finally:
+            session.close()
+        self.stats["pruned"] += count
+        return count
+
+    def run(self, interval: float = 1.0, stop: Optional[threading.Event] = None) -> None:
+        """
+        Deliver until `stop` is set.  Full batches are followed immediately
+        by the next; otherwise wait up to `interval` seconds, or until this
+        process's event bus reports a commit (with the PostgreSQL bus, any
+        worker's).
+        """
+        stop = stop or threading.Event()
+        wake = threading.Event()
+        unsubscribe = events.event_bus.subscribe(lambda ev: wake.set())
+        pruned_at = float("-inf")
+        try:
+            while not stop.is_set():
+                wake.clear()
+                if time.monotonic() - pruned_at >= self.prune_interval:
+                    pruned_at = time.monotonic()
+                    try:
+                        self.prune()
+                    except Exception:
+                        logger.exception("Outbox pruning failed")
+                try:
+                    claimed = self.run_once()
+                except Exception:
+                    logger.exception("Outbox batch failed")
+                    claimed = 0
+                    stop.wait(interval)
+                if claimed < self.batch_size:
+                    wake.wait(interval)
+        finally:
+            unsubscribe()
+
+
+def replay_failed(session: Session, topic: Optional[str] = None) -> int:
+    """Give parked events a fresh set of attempts; returns how many."""
+    q = session.query(OutboxEvent).filter(OutboxEvent.failed_at.isnot(None))
+    if topic:
+        q = q.filter(OutboxEvent.topic == topic)
+    count = q.update({"failed_at": None, "attempts": 0, "available_at": _utcnow()}, synchronize_session=False)
+    session.commit()
+    return count
+
+
+def prune_parked(session: Session, older_than: timedelta) -> int:
+    """Delete events parked more than `older_than` ago; returns how many."""
+    count = session.execute(
+        delete(OutboxEvent.__table__)
+        .where(OutboxEvent.failed_at.isnot(None), OutboxEvent.failed_at < _utcnow() - older_than)
+    ).rowcount
+    session.commit()
+    return count
@@ -0,0 +1,204 @@
+"""
+Read-replica routing for GraphQL.
+
+Queries run on a session bound to a read replica, picked round-robin among
+the healthy ones; mutations, the service layer and everything outside
+/graphql stay on db.session (the primary).  Two windows of replication lag
+send reads back to the primary:
+
+* read-your-writes: after a mutation, that subject's (token `sub`) queries,
+  recorded server-side in WriteWindows, so the writer sees its own writes
+  whichever worker serves the next request;
+* response-cache misses right after an invalidation, so a lagging
+  replica's answer is not cached for longer than the lag.
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from graphql.execution import ExecutionResult
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.response_cache import response_cache
+
+T = TypeVar("T")
+
+
+class ReplicaSet(Generic[T]):
+    """
+    Round-robin over replicas that are not marked down.
+
+    A replica is marked down when a query on it fails with a connection
+    error, or when `ping` raises; it rejoins the rotation after
+    `retry_after` seconds (probed first when `ping` is given).  Healthy
+    replicas are re-probed every `check_interval` seconds.
+    """
+
+    def __init__(self, replicas: Sequence[T], ping: Optional[Callable[[T], Any]] = None,
+                 check_interval: float = 10.0, retry_after: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.replicas = list(replicas)
+        self.ping = ping
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        self._down_until = [0.0] * len(self.replicas)
+        self._checked_at = [clock()] * len(self.replicas)
+        self._stats = {"reads": 0, "fallbacks": 0, "failures": 0}
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def pick(self) -> Optional[T]:
+        """The next healthy replica, or None when there is none."""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                index = next(self._next) % len(self.replicas)
+                now = self._clock()
+                if self._down_until[index] > now:
+                    continue
+                probe = self.ping is not None and now - self._checked_at[index] >= self.check_interval
+                if probe:
+                    self._checked_at[index] = now  # one prober at a time
+            replica = self.replicas[index]
+            if probe:
+                try:
+                    self.ping(replica)
+                except Exception:
+                    self.mark_down(replica)
+                    continue
+            with self._lock:
+                self._stats["reads"] += 1
+            return replica
+        with self._lock:
+            self._stats["fallbacks"] += 1
+        return None
+
+    def mark_down(self, replica: T) -> None:
+        index = self.replicas.index(replica)
+        with self._lock:
+            self._down_until[index] = self._clock() + self.retry_after
+            self._checked_at[index] = float("-inf")  # probe before reuse
+            self._stats["failures"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["replicas"] = len(self.replicas)
+            snapshot["healthy"] = sum(1 for until in self._down_until if until <= now)
+        return snapshot
+
+
+def ping_engine(engine: Engine) -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+class WriteWindows:
+    """
+    Subjects that wrote within the last `seconds`.
+
+    Kept in this process, or in Redis when `client` is given (anything with
+    redis-py's set/exists) so every worker sees the same windows.  The
+    in-process map holds at most `max_entries` subjects, oldest dropped
+    first.
+    """
+
+    def __init__(self, seconds: float, client: Any = None, prefix: str = "read-primary:",
+                 max_entries: int = 10000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.seconds = seconds
+        self.client = client
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._until: "OrderedDict[str, float]" = OrderedDict()
+
+    def open(self, subject: str) -> None:
+        if self.client is not None:
+            self.client.set(self.prefix + subject, "1", px=max(1, int(self.seconds * 1000)))
+            return
+        with self._lock:
+            now = self._clock()
+            self._until.pop(subject, None)
+            self._until[subject] = now + self.seconds
+            # entries are in expiry order: drop the expired and the overflow
+            while self._until and (next(iter(self._until.values())) <= now or len(self._until) > self.max_entries):
+                self._until.popitem(last=False)
+
+    def is_open(self, subject: str) -> bool:
+        if self.client is not None:
+            return bool(self.client.exists(self.prefix + subject))
+        with self._lock:
+            return self._until.get(subject, 0.0) > self._clock()
+
+
+def replica_failed(result: ExecutionResult) -> bool:
+    """True when a resolver hit a database error, e.g. an unreachable replica."""
+    return any(
+        isinstance(getattr(error, "original_error", None), exc.OperationalError)
+        for error in result.errors or ()
+    )
+
+
+class ReplicaRouter:
+    """Runs read-only GraphQL executions on a replica session."""
+
+    def __init__(self, engines: Sequence[Engine], sticky_seconds: float = 5.0,
+                 check_interval: float = 10.0, retry_after: float = 30.0,
+                 windows: Optional[WriteWindows] = None) -> None:
+        self.engines: List[Engine] = list(engines)
+        self.replicas: ReplicaSet[Engine] = ReplicaSet(
+            self.engines, ping=ping_engine, check_interval=check_interval, retry_after=retry_after,
+        )
+        self.sticky_seconds = sticky_seconds
+        self.windows = windows or WriteWindows(sticky_seconds)
+        self._sessions = {engine: sessionmaker(bind=engine) for engine in self.engines}
+
+    def record_write(self, subject: Optional[str]) -> None:
+        """Open `subject`'s read-your-writes window (after a mutation)."""
+        if self.engines and subject:
+            self.windows.open(subject)
+
+    def reads_from_primary(self, subject: Optional[str], cacheable: bool = False) -> bool:
+        """
+        True while `subject` is in its read-your-writes window, or, for a
+        response about to be cached, while the response cache was
+        invalidated less than the lag window ago.
+        """
+        if subject and self.windows.is_open(subject):
+            return True
+        return cacheable and response_cache.invalidated_within(self.sticky_seconds)
+
+    def run_query(self, execute: Callable[[Session], ExecutionResult], primary: Session,
+                  subject: Optional[str], cacheable: bool = False) -> ExecutionResult:
+        """
+        `execute(session)` on a replica, or on `primary` when there are no
+        healthy replicas or reads_from_primary() says so.  A replica that
+        fails with a database error is marked down and the query re-runs on
+        the primary.
+        """
+        engine = None
+        if self.engines and not self.reads_from_primary(subject, cacheable):
+            engine = self.replicas.pick()
+        if engine is None:
+            return execute(primary)
+
+        session = self._sessions[engine]()
+        try:
+            result = execute(session)
+        finally:
+            session.close()
+        if replica_failed(result):
+            self.replicas.mark_down(engine)
+            return execute(primary)
+        return result
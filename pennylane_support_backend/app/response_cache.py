@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from graphql.error import GraphQLSyntaxError
+from graphql.language import ast
+from graphql.language.parser import parse
+from graphql.language.printer import print_ast
+from graphql.type import GraphQLList, GraphQLNonNull, GraphQLObjectType
+
+# Root query fields whose responses may be cached, and the entity each returns.
+CACHEABLE_FIELDS: Dict[str, str] = {
+    "tags": "Tag",
+    "conversationCategories": "SupportConversation",
+    "challenges": "Challenge",
+    "challenge": "Challenge",
+}
+_COLLECTION_ROOTS = {"tags", "conversationCategories", "challenges"}
+
+
+# --------------------------------------------------------------------------- #
+#  Tags
+# --------------------------------------------------------------------------- #
+#   "Challenge:*"  entry contains some Challenge; dropped by bulk changes (seeds)
+#   "Challenge"    entry lists the Challenge collection (rows added/removed)
+#   "Challenge:7"  entry shows Challenge 7
+#   "Challenge:?"  entry shows a Challenge without selecting its id
+def row_tags(entity: str, *ids: Any) -> List[str]:
+    """Tags to invalidate after changing existing `entity` rows `ids`."""
+    return [f"{entity}:{i}" for i in ids if i is not None] + [f"{entity}:?"]
+
+
+def collection_tags(*entities: str) -> List[str]:
+    """Tags to invalidate after adding or removing `entity` rows."""
+    return list(entities)
+
+
+def bulk_tags(*entities: str) -> List[str]:
+    """Tags to invalidate after arbitrary changes to whole tables."""
+    return [f"{entity}:*" for entity in entities]
+
+
+# --------------------------------------------------------------------------- #
+#  Backends
+# --------------------------------------------------------------------------- #
+class InMemoryBackend:
+    """Process-local LRU with a tag -> keys index."""
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._epoch = 0
+        self._invalidated_at = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float, tags: Iterable[str]) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (self._clock() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            self._epoch += 1
+            self._invalidated_at = time.time()
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.pop(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def epoch(self) -> int:
+        return self._epoch
+
+    def invalidated_at(self) -> float:
+        return self._invalidated_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._invalidated_at = 0.0
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """
+    Shared cache for several workers.  `client` is anything with the redis-py
+    calls used below (get/set/sadd/smembers/expire/delete/incr/scan_iter).
+    `invalidated_at` is wall-clock time, comparable across hosts.
+    """
+
+    def __init__(self, client: Any, prefix: str = "gqlcache:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ttl: float, tags: Iterable[str]) -> None:
+        seconds = max(1, int(ttl))
+        self.client.set(self.prefix + key, value, ex=seconds)
+        for tag in tags:
+            self.client.sadd(self._tag_key(tag), self.prefix + key)
+            # the index only needs to outlive the entries it points at
+            self.client.expire(self._tag_key(tag), seconds)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        self.client.incr(self.prefix + "epoch")
+        self.client.set(self.prefix + "invalidated_at", repr(time.time()))
+        dropped = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            members = self.client.smembers(tag_key)
+            if members:
+                dropped += self.client.delete(*members)
+            self.client.delete(tag_key)
+        return dropped
+
+    def epoch(self) -> int:
+        return int(self.client.get(self.prefix + "epoch") or 0)
+
+    def invalidated_at(self) -> float:
+        return float(self.client.get(self.prefix + "invalidated_at") or 0)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def backend_from_url(url: Optional[str], max_entries: int = 1024):
+    """`memory` (default) or a redis:// / rediss:// URL."""
+    if not url or url == "memory":
+        return InMemoryBackend(max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as exc:  # optional dependency
+            raise RuntimeError("RESPONSE_CACHE_URL points at Redis but the 'redis' package is not installed") from exc
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url!r}")
+
+
+# --------------------------------------------------------------------------- #
+#  Planning and tagging
+# --------------------------------------------------------------------------- #
+class CachePlan:
+    """A cacheable request: its cache key and what to walk for tags."""
+
+    def __init__(self, key: str, schema: Any, operation: ast.OperationDefinition,
+                 fragments: Dict[str, ast.FragmentDefinition], epoch: int) -> None:
+        self.key = key
+        self.schema = schema
+        self.operation = operation
+        self.fragments = fragments
+        self.epoch = epoch
+
+    def tags(self, data: Dict[str, Any]) -> Set[str]:
+        tags: Set[str] = set()
+        query_type = self.schema.get_query_type()
+        for field in _fields(self.operation.selection_set, self.fragments):
+            name = field.name.value
+            root_entity = CACHEABLE_FIELDS[name]
+            tags.add(f"{root_entity}:*")
+            if name in _COLLECTION_ROOTS:
+                tags.add(root_entity)
+            value = data.get(_response_key(field))
+            if value is None:
+                # a lookup that found nothing depends on rows appearing later
+                tags.add(root_entity)
+                continue
+            _tag_value(query_type.fields[name].type, field, value, self.fragments, tags)
+        return tags
+
+
+def _response_key(field: ast.Field) -> str:
+    return field.alias.value if field.alias else field.name.value
+
+
+def _fields(selection_set: Optional[ast.SelectionSet], fragments: Dict[str, ast.FragmentDefinition]):
+    """Field nodes of a selection set with fragments flattened."""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection
+        elif isinstance(selection, ast.InlineFragment):
+            yield from _fields(selection.selection_set, fragments)
+        elif isinstance(selection, ast.FragmentSpread):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _fields(fragment.selection_set, fragments)
+
+
+def _entity_name(gql_type: GraphQLObjectType) -> Optional[str]:
+    graphene_type = getattr(gql_type, "graphene_type", None)
+    model = getattr(getattr(graphene_type, "_meta", None), "model", None)
+    return model.__name__ if model is not None else None
+
+
+def _tag_value(gql_type, field: ast.Field, value: Any, fragments, tags: Set[str]) -> None:
+    while isinstance(gql_type, GraphQLNonNull):
+        gql_type = gql_type.of_type
+    if isinstance(gql_type, GraphQLList):
+        for item in value or ():
+            if item is not None:
+                _tag_value(gql_type.of_type, field, item, fragments, tags)
+        return
+    if not isinstance(gql_type, GraphQLObjectType) or not isinstance(value, dict):
+        return
+
+    entity = _entity_name(gql_type)
+    children = list(_fields(field.selection_set, fragments))
+    if entity is not None:
+        tags.add(f"{entity}:*")
+        id_key = next((_response_key(f) for f in children if f.name.value == "id"), None)
+        if id_key is not None and value.get(id_key) is not None:
+            tags.add(f"{entity}:{value[id_key]}")
+        else:
+            tags.add(f"{entity}:?")
+    for child in children:
+        child_def = gql_type.fields.get(child.name.value)
+        child_value = value.get(_response_key(child))
+        if child_def is not None and child_value is not None:
+            _tag_value(child_def.type, child, child_value, fragments, tags)
+
+
+# --------------------------------------------------------------------------- #
+#  Cache
+# --------------------------------------------------------------------------- #
+class ResponseCache:
+    """
+    Whole-response cache for read-only GraphQL queries.
+
+    Only queries whose root fields are all in CACHEABLE_FIELDS are cached;
+    the key covers the normalized document, operation name, variables and
+    the caller's role.  Writers call `invalidate(*tags)` after committing.
+    """
+
+    def __init__(self, backend: Any, ttl: float = 60.0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "skipped_stale": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def plan(self, schema: Any, query: Optional[str], variables: Optional[Dict[str, Any]],
+             operation_name: Optional[str], role: str,
+             document: Optional[ast.Document] = None) -> Optional[CachePlan]:
+        """
+        Return a CachePlan when this request may be served from/stored in the
+        cache.  Pass `document` when the query has already been parsed.
+        """
+        if not self.enabled or not query:
+            return None
+        if document is None:
+            try:
+                document = parse(query)
+            except GraphQLSyntaxError:
+                return None
+
+        operations = [d for d in document.definitions if isinstance(d, ast.OperationDefinition)]
+        if operation_name:
+            operations = [op for op in operations if op.name and op.name.value == operation_name]
+        if len(operations) != 1 or operations[0].operation != "query":
+            return None
+        operation = operations[0]
+        fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, ast.FragmentDefinition)
+        }
+        root_fields = list(_fields(operation.selection_set, fragments))
+        if not root_fields or any(f.name.value not in CACHEABLE_FIELDS for f in root_fields):
+            return None
+
+        raw = json.dumps(
+            [print_ast(document), operation_name, variables or {}, role],
+            sort_keys=True, separators=(",", ":"), default=str,
+        )
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return CachePlan(key, schema, operation, fragments, self.backend.epoch())
+
+    def get(self, plan: CachePlan) -> Optional[str]:
+        body = self.backend.get(plan.key)
+        with self._lock:
+            self._stats["hits" if body is not None else "misses"] += 1
+        return body
+
+    def store(self, plan: CachePlan, payload: Dict[str, Any]) -> Optional[str]:
+        """Cache a successful response; returns the serialized body."""
+        if payload.get("errors") or "data" not in payload:
+            return None
+        # An invalidation ran while we executed; our result may predate it.
+        if self.backend.epoch() != plan.epoch:
+            with self._lock:
+                self._stats["skipped_stale"] += 1
+            return None
+        body = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+        self.backend.set(plan.key, body, self.ttl, plan.tags(payload["data"]))
+        with self._lock:
+            self._stats["stores"] += 1
+        return body
+
+    def invalidate(self, *tags: str) -> int:
+        if not tags:
+            return 0
+        dropped = self.backend.invalidate(tags)
+        with self._lock:
+            self._stats["invalidations"] += 1
+        return dropped
+
+    def invalidated_within(self, seconds: float) -> bool:
+        """True when the last invalidation was less than `seconds` ago."""
+        return time.time() - self.backend.invalidated_at() < seconds
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+
+response_cache = ResponseCache(
+    backend_from_url(
+        os.getenv("RESPONSE_CACHE_URL", "memory"),
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    ),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "60")),
+)
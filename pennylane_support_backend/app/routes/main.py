@@ -1,7 +1,15 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify
+import hmac
+
+from flask import Blueprint, current_app, jsonify, request
 from app.auth import requires_auth
+from app.counts import count_cache
+from app.db_pool import pool_registry
+from app.graphql.documents import document_cache
+from app.identity import identity_cache
+from app.response_cache import response_cache
+from app.telemetry import gauges, registry
 
 # This blueprint contains REST-style endpoints under /api/*
 api = Blueprint("api", __name__)
@@ -16,3 +24,53 @@ def secure_data():
         JSON payload when the caller is authenticated by @requires_auth.
     """
     return jsonify(message="This is a protected route.")
+
+
+@api.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Connection pool and cache counters for dashboards and alerting.
+
+    Pools report checkout latency (avg / max / histogram in ms), how often and
+    how long checkouts waited for a free connection, overflow checkouts and
+    pool timeouts.  Callers must send METRICS_TOKEN as a bearer token; with
+    no token configured the endpoint is only served in debug or testing.
+    """
+    if not _metrics_authorized():
+        return _metrics_denied()
+    return jsonify(pools=pool_registry.snapshot(), caches=_cache_stats())
+
+
+@api.route("/metrics/prometheus", methods=["GET"])
+def prometheus_metrics():
+    """
+    GraphQL, SQL and auth histograms (app/telemetry.py) plus the pool and
+    cache counters of /api/metrics, in the Prometheus text format.
+    """
+    if not _metrics_authorized():
+        return _metrics_denied()
+    pools = {name: {k: v for k, v in stats.items() if k != "checkout_ms_buckets"}
+             for name, stats in pool_registry.snapshot().items()}
+    body = registry.render() + gauges("db_pool", "pool", pools) + gauges("cache", "cache", _cache_stats())
+    return current_app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
+def _metrics_authorized() -> bool:
+    expected = current_app.config.get("METRICS_TOKEN")
+    if not expected:
+        return current_app.debug or current_app.testing
+    given = request.headers.get("Authorization", "").partition("Bearer ")[2]
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+def _metrics_denied():
+    return jsonify(code="invalid_metrics_token", description="Metrics token required."), 401
+
+
+def _cache_stats():
+    return {
+        "counts": count_cache.stats(),
+        "responses": response_cache.stats(),
+        "documents": document_cache.stats(),
+        "identities": identity_cache.stats(),
+    }
@@ -1,16 +1,19 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
 import uuid
 
 from flask import g
 from sqlalchemy.orm import Session
 
+from app.counts import count_cache
+from app.events import POST_ADDED, Event, conversation_changed, publish
 from app.extensions import db
+from app.identity import user_id_for
+from app.response_cache import collection_tags, response_cache, row_tags
 from app.models.support import SupportConversation, ConversationPost
 from app.models.challenge import Challenge
-from app.models.user import User
 
 
 class ServiceError(Exception):
@@ -124,8 +127,17 @@ def create_conversation(
             author_display_name=display,
         )
         session.add(post)
+        session.flush()
+        publish(session, Event(POST_ADDED, conv.id, post_id=post.id, category=conv.category))
 
+    publish(session, *conversation_changed(conv))
     session.commit()
+    count_cache.invalidate("conversations")
+    # new row in the collection and in its challenge's conversation list
+    response_cache.invalidate(
+        *collection_tags("SupportConversation", "ConversationPost"),
+        *row_tags("Challenge", conv.challenge_id),
+    )
     return conv
 
 
@@ -158,52 +170,34 @@ def assign_conversation(
     if "support_admin" not in roles:
         raise AuthorizationError("Only support agents can assign conversations")
 
-    sub = current_user.get("sub") if isinstance(current_user, dict) else None
-    if not sub:
-        raise AuthorizationError("Missing user context")
-
-    # Ensure the local User row exists or create it
-    user = User.query.filter_by(auth0_id=sub).first()
-
-    ns = "https://pennylane.app/"
-    name_claim  = (current_user.get("name")  or current_user.get(f"{ns}name"))
-    email_claim = (current_user.get("email") or current_user.get(f"{ns}email"))
-    if not user:
-        username_source = current_user.get("nickname") or name_claim or email_claim or sub
-        username = str(username_source).split("@")[0]
-
-        email = email_claim or f"{sub.replace('|', '_')}@example.com"
-
-        user = User(
-            username=username,
-            email=email,
-            auth0_id=sub,
-            name=name_claim,  
-        )
-        session.add(user)
-        session.flush()
-    else:
-        if not getattr(user, "name", None) and name_claim:
-            user.name = name_claim
-        if email_claim:
-            is_placeholder = (not user.email) or user.email.endswith("@example.com")
-            if is_placeholder and user.email != email_claim:
-                exists = session.query(User.id).filter(User.email == email_claim).first()
-                if not exists:
-                    user.email = email_claim
-
-        session.flush()
+    user_id = _user_id(session, current_user)
 
     conv = SupportConversation.query.get(conversation_id)
     if not conv:
         raise NotFoundError("Conversation not found")
 
-    conv.assigned_to_user_id = user.id
+    previous_status = conv.status
+    conv.assigned_to_user_id = user_id
     conv.status = "ASSIGNED"
+    publish(session, *conversation_changed(conv, previous_status))
     session.commit()
+    count_cache.invalidate("conversations")
+    response_cache.invalidate(
+        *row_tags("SupportConversation", conv.id),
+        *row_tags("User", user_id),
+        *collection_tags("User"),
+    )
     return conv
 
 
+def _user_id(session: Session, current_user: dict) -> int:
+    """The caller's User.id, as resolved by requires_auth (see app/identity.py)."""
+    user_id = user_id_for(current_user, session)
+    if user_id is None:
+        raise AuthorizationError("Missing user context")
+    return user_id
+
+
 def add_post(
     conversation_id: int,
     content: str,
@@ -221,7 +215,9 @@ def add_post(
         author_display_name: Optional override for the author display name.  If
                              not provided and the user is authenticated, the
                              user's display name will be used.
-        current_user: Dict representing the JWT payload (may be None).
+        current_user: Dict representing the JWT payload (may be None).  Its
+                      subject becomes the post's author, and a users row is
+                      created for it on first sight (app/identity.py).
         session: Optional SQLAlchemy session for testing.
 
     Returns:
@@ -241,14 +237,6 @@ def add_post(
     if not conv:
         raise NotFoundError("Conversation not found")
 
-    author_user_id: Optional[int] = None
-    if current_user and isinstance(current_user, dict):
-        sub = current_user.get("sub")
-        if sub:
-            user = User.query.filter_by(auth0_id=sub).first()
-            if user:
-                author_user_id = user.id
-
     display = (author_display_name or "").strip()
     if not display and current_user:
         display = _current_user_display_name()
@@ -256,9 +244,231 @@ def add_post(
     post = ConversationPost(
         conversation_id=conversation_id,
         content=content,
-        author_user_id=author_user_id,
+        author_user_id=user_id_for(current_user, session),
         author_display_name=display if display else None,
     )
     session.add(post)
+    session.flush()
+    publish(
+        session,
+        Event(POST_ADDED, conv.id, post_id=post.id, category=conv.category),
+        *conversation_changed(conv, conv.status),
+    )
+    session.commit()
+    count_cache.invalidate("conversations")
+    response_cache.invalidate(
+        *collection_tags("ConversationPost"),
+        *row_tags("SupportConversation", conversation_id),
+    )
+    return post
+
+
+# --------------------------------------------------------------------------- #
+#  Bulk operations
+# --------------------------------------------------------------------------- #
+# Largest batch one call accepts; bigger triage jobs page through the queue.
+MAX_BULK_ITEMS = 500
+
+STATUSES = ("OPEN", "ASSIGNED", "RESOLVED", "CLOSED")
+
+
+class ItemResult(NamedTuple):
+    """Outcome of one item of a bulk call, in input order."""
+    conversation_id: int
+    ok: bool
+    error: Optional[str] = None
+    conversation: Optional[SupportConversation] = None
+    post: Optional[ConversationPost] = None
+
+
+def _check_batch(items: Sequence[Any]) -> None:
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValidationError(f"At most {MAX_BULK_ITEMS} items per call")
+
+
+def _conversations_by_id(session: Session, ids: Sequence[int]) -> Dict[int, SupportConversation]:
+    """Validate every id with one query."""
+    if not ids:
+        return {}
+    rows = session.query(SupportConversation).filter(SupportConversation.id.in_(set(ids))).all()
+    return {conv.id: conv for conv in rows}
+
+
+def _reload(session: Session, model: Any, ids: Sequence[int]) -> None:
+    """Refresh rows the commit expired with one query, not one per row on access."""
+    if ids:
+        session.query(model).filter(model.id.in_(set(ids))).all()
+
+
+def _set_conversations(
+    session: Session,
+    conversation_ids: Sequence[int],
+    values: Dict[str, Any],
+) -> List[ItemResult]:
+    """One UPDATE for every existing conversation; events and results per item."""
+    _check_batch(conversation_ids)
+    found = _conversations_by_id(session, conversation_ids)
+    previous = {conv_id: conv.status for conv_id, conv in found.items()}
+    if found:
+        # "evaluate" applies the same values to the rows already in the session
+        session.query(SupportConversation).filter(SupportConversation.id.in_(list(found))).update(
+            {getattr(SupportConversation, k): v for k, v in values.items()}, synchronize_session="evaluate",
+        )
+        publish(session, *[ev for conv in found.values() for ev in conversation_changed(conv, previous[conv.id])])
+    return [
+        ItemResult(conv_id, True, conversation=found[conv_id]) if conv_id in found
+        else ItemResult(conv_id, False, "Conversation not found")
+        for conv_id in conversation_ids
+    ]
+
+
+def assign_conversations(
+    conversation_ids: Sequence[int],
+    *,
+    roles: list[str],
+    current_user: dict,
+    session: Optional[Session] = None,
+) -> List[ItemResult]:
+    """
+    Assign many conversations to the current user in one transaction.
+
+    Unknown ids are reported per item and do not stop the others.  Same
+    rules as assign_conversation; at most MAX_BULK_ITEMS ids.
+
+    Raises:
+        AuthorizationError: If the user does not have the `support_admin` role.
+        ValidationError: If too many ids are given.
+    """
+    session = session or db.session
+
+    if "support_admin" not in roles:
+        raise AuthorizationError("Only support agents can assign conversations")
+
+    user_id = _user_id(session, current_user)
+    results = _set_conversations(
+        session, conversation_ids, {"assigned_to_user_id": user_id, "status": "ASSIGNED"},
+    )
+    session.commit()
+    updated = [r.conversation_id for r in results if r.ok]
+    _reload(session, SupportConversation, updated)
+    count_cache.invalidate("conversations")
+    response_cache.invalidate(
+        *row_tags("SupportConversation", *updated),
+        *row_tags("User", user_id),
+        *collection_tags("User"),
+    )
+    return results
+
+
+def update_conversation_statuses(
+    conversation_ids: Sequence[int],
+    status: str,
+    *,
+    roles: list[str],
+    session: Optional[Session] = None,
+) -> List[ItemResult]:
+    """
+    Set the status of many conversations in one transaction.
+
+    Raises:
+        AuthorizationError: If the user does not have the `support_admin` role.
+        ValidationError: If `status` is unknown or too many ids are given.
+    """
+    session = session or db.session
+
+    if "support_admin" not in roles:
+        raise AuthorizationError("Only support agents can change status")
+    if status not in STATUSES:
+        raise ValidationError(f"Status must be one of {', '.join(STATUSES)}")
+
+    results = _set_conversations(session, conversation_ids, {"status": status})
     session.commit()
-    return post
\ No newline at end of file
+    updated = [r.conversation_id for r in results if r.ok]
+    _reload(session, SupportConversation, updated)
+    count_cache.invalidate("conversations")
+    response_cache.invalidate(*row_tags("SupportConversation", *updated))
+    return results
+
+
+def update_conversation_status(
+    conversation_id: int,
+    status: str,
+    *,
+    roles: list[str],
+    session: Optional[Session] = None,
+) -> SupportConversation:
+    """
+    Set the status of one conversation; same rules as update_conversation_statuses.
+
+    Raises:
+        AuthorizationError: If the user does not have the `support_admin` role.
+        ValidationError: If `status` is unknown.
+        NotFoundError: If the conversation does not exist.
+    """
+    (result,) = update_conversation_statuses([conversation_id], status, roles=roles, session=session)
+    if not result.ok:
+        raise NotFoundError(result.error)
+    return result.conversation
+
+
+def add_posts(
+    items: Sequence[Dict[str, Any]],
+    *,
+    current_user: Optional[dict] = None,
+    session: Optional[Session] = None,
+) -> List[ItemResult]:
+    """
+    Add many replies in one transaction.
+
+    Each item is a dict with `conversation_id`, `content` and optionally
+    `author_display_name`, validated like add_post; invalid items are
+    reported per item and the rest are inserted.
+
+    Raises:
+        ValidationError: If too many items are given.
+    """
+    session = session or db.session
+    _check_batch(items)
+
+    found = _conversations_by_id(session, [item["conversation_id"] for item in items])
+    author_user_id = user_id_for(current_user, session)
+    default_display = _current_user_display_name() if current_user else ""
+
+    results: List[ItemResult] = []
+    posts: List[ConversationPost] = []
+    for item in items:
+        content = (item.get("content") or "").strip()
+        conv = found.get(item["conversation_id"])
+        if not content:
+            results.append(ItemResult(item["conversation_id"], False, "Reply content cannot be empty"))
+        elif conv is None:
+            results.append(ItemResult(item["conversation_id"], False, "Conversation not found"))
+        else:
+            display = (item.get("author_display_name") or "").strip() or default_display
+            post = ConversationPost(
+                conversation_id=conv.id,
+                content=content,
+                author_user_id=author_user_id,
+                author_display_name=display or None,
+            )
+            posts.append(post)
+            results.append(ItemResult(conv.id, True, conversation=conv, post=post))
+    session.add_all(posts)
+    session.flush()  # one batched INSERT where the driver supports it
+
+    changes = [Event(POST_ADDED, post.conversation_id, post_id=post.id, category=found[post.conversation_id].category)
+               for post in posts]
+    for conv_id in dict.fromkeys(post.conversation_id for post in posts):
+        changes.extend(conversation_changed(found[conv_id], found[conv_id].status))
+    publish(session, *changes)
+    session.commit()
+
+    if posts:
+        _reload(session, ConversationPost, [post.id for post in posts])
+        _reload(session, SupportConversation, [post.conversation_id for post in posts])
+        count_cache.invalidate("conversations")
+        response_cache.invalidate(
+            *collection_tags("ConversationPost"),
+            *row_tags("SupportConversation", *{post.conversation_id for post in posts}),
+        )
+    return results
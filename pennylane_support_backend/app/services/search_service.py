@@ -0,0 +1,340 @@
+"""
+Full-text search over conversations (topic, category, post bodies) and
+challenges (title, description).
+
+PostgreSQL uses the `search_vector` tsvector columns (GIN indexed, kept up
+to date by triggers / a generated column, see migration 5c1e7a9d2b40) with
+`websearch_to_tsquery`, `ts_rank_cd` and `ts_headline`.
+
+SQLite (tests, local dev) falls back to FTS5 tables that mirror the same
+text; they are created alongside the regular tables by `db.create_all()`.
+
+Typo-tolerant challenge lookup (`fuzzy_challenges`) uses pg_trgm trigram
+similarity over title, public_id and tag names (GIN indexes, migration
+7d3f0b8e6a21) and a pure-Python trigram score elsewhere.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import DDL, column, event, false, func, literal, literal_column, select, table, union_all
+from sqlalchemy.orm import Query, Session, selectinload
+
+from app.extensions import db
+from app.models.challenge import Challenge, ChallengeTag, Tag
+from app.models.support import SupportConversation, ConversationPost
+
+TS_CONFIG = "english"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=10, MaxFragments=2"
+FUZZY_THRESHOLD = float(os.getenv("FUZZY_SEARCH_THRESHOLD", "0.3"))
+
+_CONV_FTS = "support_conversations_fts"
+_CHALLENGE_FTS = "challenges_fts"
+
+# --------------------------------------------------------------------------- #
+#  SQLite FTS5 mirror tables
+# --------------------------------------------------------------------------- #
+_POSTS_TEXT = (
+    "(SELECT group_concat(content, ' ') FROM conversation_posts "
+    "WHERE conversation_id = {ref}.conversation_id)"
+)
+
+_SQLITE_CONVERSATION_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {_CONV_FTS} USING fts5(topic, category, posts)",
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_fts_ai AFTER INSERT ON support_conversations BEGIN
+        INSERT INTO {_CONV_FTS}(rowid, topic, category, posts) VALUES (new.id, new.topic, new.category, '');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_fts_au AFTER UPDATE OF topic, category ON support_conversations BEGIN
+        UPDATE {_CONV_FTS} SET topic = new.topic, category = new.category WHERE rowid = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_fts_ad AFTER DELETE ON support_conversations BEGIN
+        DELETE FROM {_CONV_FTS} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_posts_fts_ai AFTER INSERT ON conversation_posts BEGIN
+        UPDATE {_CONV_FTS} SET posts = {_POSTS_TEXT.format(ref="new")} WHERE rowid = new.conversation_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_posts_fts_au AFTER UPDATE ON conversation_posts BEGIN
+        UPDATE {_CONV_FTS} SET posts = {_POSTS_TEXT.format(ref="old")} WHERE rowid = old.conversation_id;
+        UPDATE {_CONV_FTS} SET posts = {_POSTS_TEXT.format(ref="new")} WHERE rowid = new.conversation_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_posts_fts_ad AFTER DELETE ON conversation_posts BEGIN
+        UPDATE {_CONV_FTS} SET posts = coalesce({_POSTS_TEXT.format(ref="old")}, '') WHERE rowid = old.conversation_id;
+    END""",
+]
+
+_SQLITE_CHALLENGE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {_CHALLENGE_FTS} USING fts5(title, description)",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_ai AFTER INSERT ON challenges BEGIN
+        INSERT INTO {_CHALLENGE_FTS}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_au AFTER UPDATE OF title, description ON challenges BEGIN
+        UPDATE {_CHALLENGE_FTS} SET title = new.title, description = new.description WHERE rowid = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS challenges_fts_ad AFTER DELETE ON challenges BEGIN
+        DELETE FROM {_CHALLENGE_FTS} WHERE rowid = old.id;
+    END""",
+]
+
+# conversation_posts is created after support_conversations, so both sets of
+# conversation triggers can be installed once it exists.
+for _stmt in _SQLITE_CONVERSATION_DDL:
+    event.listen(ConversationPost.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in _SQLITE_CHALLENGE_DDL:
+    event.listen(Challenge.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(
+    ConversationPost.__table__, "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {_CONV_FTS}").execute_if(dialect="sqlite"),
+)
+event.listen(
+    Challenge.__table__, "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {_CHALLENGE_FTS}").execute_if(dialect="sqlite"),
+)
+
+_conv_fts = table(_CONV_FTS, column("rowid"), column("topic"), column("category"), column("posts"))
+_challenge_fts = table(_CHALLENGE_FTS, column("rowid"), column("title"), column("description"))
+
+
+# --------------------------------------------------------------------------- #
+#  Query translation
+# --------------------------------------------------------------------------- #
+_TOKEN_RE = re.compile(r'(-?)"([^"]*)"|(-?)(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def to_fts5_query(term: str) -> Optional[str]:
+    """
+    Translate websearch-style input ("quoted phrase", -exclude, or) into an
+    FTS5 MATCH expression with every token quoted, so user input can never
+    inject FTS5 syntax.  Returns None when nothing searchable remains.
+    """
+    groups: List[List[str]] = [[]]
+    excluded: List[str] = []
+    for m in _TOKEN_RE.finditer(term or ""):
+        negate = bool(m.group(1) or m.group(3))
+        text = m.group(2) if m.group(2) is not None else m.group(4)
+        if m.group(4) is not None and text.lower() == "or" and not negate:
+            groups.append([])
+            continue
+        words = _WORD_RE.findall(text)
+        if not words:
+            continue
+        phrase = '"' + " ".join(words) + '"'
+        (excluded if negate else groups[-1]).append(phrase)
+
+    clauses = [" AND ".join(g) for g in groups if g]
+    if not clauses:
+        return None
+    expr = " OR ".join(f"({c})" for c in clauses)
+    for phrase in excluded:
+        expr = f"({expr}) NOT {phrase}"
+    return expr
+
+
+def _is_postgres(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _ts_query(term: str):
+    return func.websearch_to_tsquery(TS_CONFIG, term)
+
+
+# --------------------------------------------------------------------------- #
+#  Filters used by the list resolvers
+# --------------------------------------------------------------------------- #
+def filter_conversations(q: Query, term: str, session: Optional[Session] = None) -> Query:
+    """Restrict `q` to conversations matching `term` (topic, category or posts)."""
+    session = session or q.session or db.session
+    if _is_postgres(session):
+        return q.filter(SupportConversation.search_vector.op("@@")(_ts_query(term)))
+    match = to_fts5_query(term)
+    if match is None:
+        return q.filter(false())
+    ids = select(_conv_fts.c.rowid).where(literal_column(_CONV_FTS).op("MATCH")(match))
+    return q.filter(SupportConversation.id.in_(ids))
+
+
+def filter_challenges(q: Query, term: str, session: Optional[Session] = None) -> Tuple[Query, Any]:
+    """
+    Restrict `q` to challenges matching `term`; returns the query and a rank
+    expression (higher is better) for ordering.
+    """
+    session = session or q.session or db.session
+    if _is_postgres(session):
+        tsq = _ts_query(term)
+        q = q.filter(Challenge.search_vector.op("@@")(tsq))
+        return q, func.ts_rank_cd(Challenge.search_vector, tsq)
+    match = to_fts5_query(term)
+    if match is None:
+        return q.filter(false()), literal_column("0")
+    ranked = (
+        select(_challenge_fts.c.rowid.label("challenge_id"), (-func.bm25(literal_column(_CHALLENGE_FTS))).label("rank"))
+        .where(literal_column(_CHALLENGE_FTS).op("MATCH")(match))
+        .subquery()
+    )
+    q = q.join(ranked, ranked.c.challenge_id == Challenge.id)
+    return q, ranked.c.rank
+
+
+# --------------------------------------------------------------------------- #
+#  Ranked search with highlight snippets
+# --------------------------------------------------------------------------- #
+def search_conversations(
+    term: str,
+    limit: int = 20,
+    *,
+    session: Optional[Session] = None,
+) -> List[Tuple[SupportConversation, float, str]]:
+    """Return (conversation, rank, snippet) tuples, best match first."""
+    session = session or db.session
+    limit = max(1, min(limit, 100))
+
+    if _is_postgres(session):
+        tsq = _ts_query(term)
+        rank = func.ts_rank_cd(SupportConversation.search_vector, tsq).label("rank")
+        top = (
+            select(SupportConversation.id.label("id"), rank)
+            .where(SupportConversation.search_vector.op("@@")(tsq))
+            .order_by(rank.desc(), SupportConversation.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        # ts_headline is expensive, so it only runs over the final page.
+        posts_text = (
+            select(func.string_agg(ConversationPost.content, " "))
+            .where(ConversationPost.conversation_id == top.c.id)
+            .scalar_subquery()
+        )
+        snippet = func.ts_headline(
+            TS_CONFIG, func.concat_ws(" ", SupportConversation.topic, posts_text), tsq, HEADLINE_OPTIONS,
+        )
+        results = (
+            session.query(SupportConversation, top.c.rank, snippet)
+            .join(top, top.c.id == SupportConversation.id)
+            .order_by(top.c.rank.desc(), SupportConversation.id.desc())
+        )
+        return [(conv, float(r or 0), text or "") for conv, r, text in results.all()]
+
+    match = to_fts5_query(term)
+    if match is None:
+        return []
+    fts = literal_column(_CONV_FTS)
+    ranked = (
+        select(
+            _conv_fts.c.rowid.label("conversation_id"),
+            (-func.bm25(fts)).label("rank"),
+            func.snippet(fts, -1, "<mark>", "</mark>", "…", 16).label("snippet"),
+        )
+        .where(fts.op("MATCH")(match))
+        .order_by(func.bm25(fts))
+        .limit(limit)
+        .subquery()
+    )
+    results = (
+        session.query(SupportConversation, ranked.c.rank, ranked.c.snippet)
+        .join(ranked, ranked.c.conversation_id == SupportConversation.id)
+        .order_by(ranked.c.rank.desc(), SupportConversation.id.desc())
+    )
+    return [(conv, float(r or 0), text or "") for conv, r, text in results.all()]
+
+
+# --------------------------------------------------------------------------- #
+#  Fuzzy (trigram) challenge lookup
+# --------------------------------------------------------------------------- #
+_TRGM_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def trigrams(value: str) -> set:
+    """Trigram set of `value` the way pg_trgm builds it (per word, padded)."""
+    grams = set()
+    for word in _TRGM_WORD_RE.findall((value or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    """pg_trgm `similarity()`: shared trigrams over all trigrams."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def word_similarity(term: str, text: str) -> float:
+    """
+    Approximation of pg_trgm `word_similarity()`: best similarity between
+    `term` and any run of consecutive words in `text` of the same length.
+    """
+    words = _TRGM_WORD_RE.findall(text or "")
+    n = max(1, len(_TRGM_WORD_RE.findall(term or "")))
+    if len(words) <= n:
+        return similarity(term, text)
+    return max(similarity(term, " ".join(words[i:i + n])) for i in range(len(words) - n + 1))
+
+
+def fuzzy_challenges(
+    term: str,
+    limit: int = 10,
+    threshold: Optional[float] = None,
+    *,
+    session: Optional[Session] = None,
+) -> List[Tuple[Challenge, float]]:
+    """
+    Return (challenge, score) pairs whose title, public_id or one of its tag
+    names is trigram-similar to `term`, best match first.  `score` is in
+    [0, 1]; rows below `threshold` (default FUZZY_SEARCH_THRESHOLD) are
+    dropped.
+    """
+    session = session or db.session
+    term = (term or "").strip()
+    threshold = FUZZY_THRESHOLD if threshold is None else threshold
+    limit = max(1, min(limit, 100))
+    if not term:
+        return []
+
+    if _is_postgres(session):
+        # The % and <% operators read these settings and are what the GIN
+        # trigram indexes can answer; set_config(..., true) is transaction-local.
+        session.execute(
+            select(
+                func.set_config("pg_trgm.similarity_threshold", str(threshold), True),
+                func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True),
+            )
+        )
+        # One index-backed lookup per field; an OR across them (or across an
+        # outer join) would leave the planner no choice but a sequential scan.
+        candidates = union_all(
+            select(Challenge.id.label("challenge_id"), func.word_similarity(term, Challenge.title).label("score"))
+            .where(literal(term, db.String).op("<%")(Challenge.title)),
+            select(Challenge.id, func.similarity(Challenge.public_id, term))
+            .where(Challenge.public_id.op("%")(term)),
+            select(ChallengeTag.challenge_id, func.similarity(Tag.name, term))
+            .join(ChallengeTag, ChallengeTag.tag_id == Tag.id)
+            .where(Tag.name.op("%")(term)),
+        ).subquery()
+        best = (
+            select(candidates.c.challenge_id, func.max(candidates.c.score).label("score"))
+            .group_by(candidates.c.challenge_id)
+            .subquery()
+        )
+        rows = (
+            session.query(Challenge, best.c.score)
+            .join(best, best.c.challenge_id == Challenge.id)
+            .order_by(best.c.score.desc(), Challenge.id)
+            .limit(limit)
+            .all()
+        )
+        return [(challenge, float(s)) for challenge, s in rows]
+
+    scored = []
+    for challenge in session.query(Challenge).options(selectinload(Challenge.tags)).all():
+        s = max(
+            [word_similarity(term, challenge.title), similarity(term, challenge.public_id)]
+            + [similarity(term, tag.name) for tag in challenge.tags]
+        )
+        if s >= threshold:
+            scored.append((challenge, s))
+    scored.sort(key=lambda pair: (-pair[1], pair[0].id))
+    return scored[:limit]
@@ -0,0 +1,246 @@
+"""
+Materialized queue statistics for the support dashboard (`queueStats`).
+
+`queue_stats` holds one row per (dimension, bucket, status) with the number
+of conversations, how many have had a first reply and the sum of their
+`first_response_seconds`.  Row triggers on support_conversations apply the
+old row's contribution with -1 and the new row's with +1, so every write
+path (services, bulk UPDATEs, seeding) keeps it current and a dashboard
+load is a single primary-key range read.  There is no overall row: every
+write would update the same one per status, so per-status and overall
+totals are summed from the category rows when read.  A trigger on
+conversation_posts maintains `first_response_seconds`: from the opening
+post to the first post by someone else (author user id, else display name).
+
+PostgreSQL gets the triggers from migration d7e3a1b9c5f2; SQLite (tests,
+local dev) gets equivalent ones from `db.create_all()` below.
+`rebuild()` (`flask rebuild-queue-stats`) recomputes everything from the
+conversation and post tables.
+
+Writers that touch the same bucket serialize on its row until they commit;
+the buckets are few, and the service transactions short.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DDL, Integer, String, cast, delete, event, func, insert, literal_column, select, text, update
+from sqlalchemy.orm import Session, aliased
+
+from app.extensions import db
+from app.models.stats import QueueStat
+from app.models.support import SupportConversation, ConversationPost
+
+DIMENSIONS = ("category", "assignee", "challenge")
+# Read-time dimension summed from the category rows
+STATUS = "status"
+
+_conversations = SupportConversation.__table__
+
+# Column each dimension buckets by
+_BUCKET_COLUMNS = {
+    "category": _conversations.c.category,
+    "assignee": _conversations.c.assigned_to_user_id,
+    "challenge": _conversations.c.challenge_id,
+}
+
+# --------------------------------------------------------------------------- #
+#  SQLite triggers (PostgreSQL: migration d7e3a1b9c5f2)
+# --------------------------------------------------------------------------- #
+_SQLITE_BUCKETS = {
+    "category": "coalesce({row}.category, '')",
+    "assignee": "coalesce(CAST({row}.assigned_to_user_id AS TEXT), '')",
+    "challenge": "coalesce(CAST({row}.challenge_id AS TEXT), '')",
+}
+
+
+def _sqlite_bump(row: str, sign: int) -> str:
+    values = ",\n            ".join(
+        f"('{dimension}', {bucket.format(row=row)}, {row}.status, {sign}, "
+        f"{sign} * ({row}.first_response_seconds IS NOT NULL), {sign} * coalesce({row}.first_response_seconds, 0))"
+        for dimension, bucket in _SQLITE_BUCKETS.items()
+    )
+    return f"""INSERT INTO queue_stats (dimension, bucket, status, conversations, responded, response_seconds)
+        VALUES {values}
+        ON CONFLICT (dimension, bucket, status) DO UPDATE SET
+            conversations = queue_stats.conversations + excluded.conversations,
+            responded = queue_stats.responded + excluded.responded,
+            response_seconds = queue_stats.response_seconds + excluded.response_seconds;"""
+
+
+# Who wrote a post, for telling the asker's follow-ups from replies
+_SQLITE_AUTHOR = "coalesce(CAST({p}.author_user_id AS TEXT), {p}.author_display_name, '')"
+
+_SQLITE_FIRST_RESPONSE = f"""
+    UPDATE support_conversations SET first_response_seconds = (
+        SELECT CAST(round((julianday(r.created_at) - julianday(o.created_at)) * 86400) AS INTEGER)
+          FROM (SELECT created_at, {_SQLITE_AUTHOR.format(p="conversation_posts")} AS author
+                  FROM conversation_posts WHERE conversation_id = {{row}}.conversation_id
+                 ORDER BY created_at, id LIMIT 1) AS o
+          JOIN conversation_posts AS r
+            ON r.conversation_id = {{row}}.conversation_id AND {_SQLITE_AUTHOR.format(p="r")} <> o.author
+         ORDER BY r.created_at, r.id LIMIT 1
+    ) WHERE id = {{row}}.conversation_id;"""
+
+_TRACKED = ("status", "category", "assigned_to_user_id", "challenge_id", "first_response_seconds")
+
+_SQLITE_STATS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_queue_stats_ai AFTER INSERT ON support_conversations BEGIN
+        {_sqlite_bump("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_queue_stats_au
+        AFTER UPDATE OF {", ".join(_TRACKED)} ON support_conversations
+        WHEN {" OR ".join(f"old.{c} IS NOT new.{c}" for c in _TRACKED)} BEGIN
+        {_sqlite_bump("old", -1)}
+        {_sqlite_bump("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS support_conversations_queue_stats_ad AFTER DELETE ON support_conversations BEGIN
+        {_sqlite_bump("old", -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_posts_first_response_ai AFTER INSERT ON conversation_posts BEGIN
+        {_SQLITE_FIRST_RESPONSE.format(row="new")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversation_posts_first_response_ad AFTER DELETE ON conversation_posts BEGIN
+        {_SQLITE_FIRST_RESPONSE.format(row="old")}
+    END""",
+]
+
+for _stmt in _SQLITE_STATS_DDL:
+    event.listen(ConversationPost.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+
+
+# --------------------------------------------------------------------------- #
+#  Reads
+# --------------------------------------------------------------------------- #
+@dataclass
+class Bucket:
+    """Totals for one category / assignee / challenge, or for one status (dimension "status")."""
+    dimension: str
+    key: Optional[str]
+    conversations: int = 0
+    responded: int = 0
+    response_seconds: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def avg_first_response_seconds(self) -> Optional[float]:
+        return self.response_seconds / self.responded if self.responded else None
+
+    def add(self, status: str, conversations: int, responded: int, response_seconds: int) -> None:
+        self.conversations += conversations
+        self.responded += responded
+        self.response_seconds += response_seconds
+        self.statuses[status] = self.statuses.get(status, 0) + conversations
+
+
+def _largest_first(buckets: Iterable[Bucket]) -> List[Bucket]:
+    return sorted(buckets, key=lambda b: (-b.conversations, b.key or ""))
+
+
+def queue_stats(dimensions: Iterable[str] = (*DIMENSIONS, STATUS), *,
+                session: Optional[Session] = None) -> Dict[str, List[Bucket]]:
+    """
+    Buckets per requested dimension, largest first.  STATUS buckets (one per
+    status) are summed from the category rows: every conversation is in
+    exactly one category bucket.
+    """
+    session = session or db.session
+    requested = set(dimensions)
+    stored = [d for d in DIMENSIONS if d in requested or (d == "category" and STATUS in requested)]
+    if not stored:
+        return {}
+    result: Dict[str, Dict[Optional[str], Bucket]] = {d: {} for d in (*DIMENSIONS, STATUS) if d in requested}
+    rows = session.execute(
+        select(QueueStat.dimension, QueueStat.bucket, QueueStat.status,
+               QueueStat.conversations, QueueStat.responded, QueueStat.response_seconds)
+        .where(QueueStat.dimension.in_(stored), QueueStat.conversations > 0)
+    )
+    for dimension, bucket, status, conversations, responded, seconds in rows:
+        keys = []
+        if dimension in result:
+            keys.append((dimension, bucket or None))
+        if dimension == "category" and STATUS in result:
+            keys.append((STATUS, status))
+        for dimension, key in keys:
+            buckets = result[dimension]
+            if key not in buckets:
+                buckets[key] = Bucket(dimension, key)
+            buckets[key].add(status, conversations, responded, seconds)
+    return {dimension: _largest_first(buckets.values()) for dimension, buckets in result.items()}
+
+
+def totals(buckets: Iterable[Bucket]) -> Bucket:
+    """Sum of one dimension's `buckets`: the overall totals."""
+    total = Bucket("all", None)
+    for b in buckets:
+        for status, conversations in b.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + conversations
+        total.conversations += b.conversations
+        total.responded += b.responded
+        total.response_seconds += b.response_seconds
+    return total
+
+
+# --------------------------------------------------------------------------- #
+#  Full rebuild
+# --------------------------------------------------------------------------- #
+def _author(post):
+    return func.coalesce(cast(post.author_user_id, String), post.author_display_name, literal_column("''"))
+
+
+def _first_response_expr(dialect: str):
+    """Same rule as the triggers: opening post to the first post by another author."""
+    def first(post, column, *criteria):
+        return (
+            select(column)
+            .where(post.conversation_id == _conversations.c.id, *criteria)
+            .order_by(post.created_at, post.id)
+            .limit(1)
+            .correlate(_conversations)
+            .scalar_subquery()
+        )
+
+    opener, reply = aliased(ConversationPost), aliased(ConversationPost)
+    opened = first(opener, opener.created_at)
+    replied = first(reply, reply.created_at, _author(reply) != first(opener, _author(opener)))
+    if dialect == "postgresql":
+        return cast(func.round(func.date_part("epoch", replied - opened)), Integer)
+    return cast(func.round((func.julianday(replied) - func.julianday(opened)) * 86400), Integer)
+
+
+def rebuild(*, session: Optional[Session] = None) -> int:
+    """
+    Recompute `first_response_seconds` and every queue_stats row from the
+    conversation and post tables, in one transaction.  Returns the number
+    of rows written.
+    """
+    session = session or db.session
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Concurrent writers' trigger upserts wait for the rebuilt table
+        session.execute(text("LOCK TABLE queue_stats IN EXCLUSIVE MODE"))
+
+    session.execute(update(_conversations).values(first_response_seconds=_first_response_expr(dialect)))
+    session.execute(delete(QueueStat.__table__))
+    written = 0
+    for dimension, column in _BUCKET_COLUMNS.items():
+        bucket = func.coalesce(cast(column, String), literal_column("''"))
+        grouped = (
+            select(
+                literal_column(f"'{dimension}'"),
+                bucket,
+                _conversations.c.status,
+                func.count(),
+                func.count(_conversations.c.first_response_seconds),
+                func.coalesce(func.sum(_conversations.c.first_response_seconds), 0),
+            )
+            .group_by(column, _conversations.c.status)
+        )
+        written += session.execute(
+            insert(QueueStat.__table__).from_select(
+                ["dimension", "bucket", "status", "conversations", "responded", "response_seconds"], grouped,
+            )
+        ).rowcount
+    session.commit()
+    return written
@@ -0,0 +1,151 @@
+"""
+GraphQL subscriptions over Server-Sent Events (GET or POST /graphql/stream).
+
+A client opens one stream per subscription operation and receives each
+result as an `event: next` frame, in the "distinct connections" mode of the
+graphql-sse protocol.  The stream is fed by app.events, so with the
+PostgreSQL bus every worker sees every committed change, whichever worker
+made it; a comment line goes out every SUBSCRIPTION_HEARTBEAT_SECONDS so
+proxies keep idle streams open.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from graphql.error import GraphQLSyntaxError
+from graphql.execution import ExecutionResult
+from rx.subjects import Subject
+
+from app import events
+from app.events import Event
+from app.extensions import db
+from app.graphql.documents import PersistedQueryError, document_cache, select_operation
+from app.graphql.loaders import Loaders
+from app.graphql.schema import schema
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for a slow client; past this the stream drops new ones.
+MAX_PENDING_EVENTS = 1000
+
+OPENING = ": ok\n\n"
+HEARTBEAT = ": ping\n\n"
+
+
+class SubscriptionError(Exception):
+    """The request does not describe a runnable subscription."""
+
+    def __init__(self, errors: List[Any]) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+    def as_payload(self) -> Dict[str, Any]:
+        return {"errors": [e if isinstance(e, dict) else str(e) for e in self.errors]}
+
+
+def stream_params(args: Mapping[str, str], body: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Operation parameters from a JSON body (POST) or the query string (GET)."""
+    if body:
+        return dict(body)
+    params: Dict[str, Any] = {k: args.get(k) for k in ("query", "operationName")}
+    for key in ("variables", "extensions"):
+        raw = args.get(key)
+        try:
+            params[key] = json.loads(raw) if raw else None
+        except ValueError:
+            raise SubscriptionError([f"{key} must be JSON"])
+    return params
+
+
+def frame(payload: Dict[str, Any]) -> str:
+    return f"event: next\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+class SubscriptionStream:
+    """
+    One client's subscription: `push` an event, get back the SSE frames it
+    produces (none when the subscription's filter doesn't match).
+
+    Events are resolved on the calling thread, against `current_session()`,
+    so callers push from inside an app context.
+    """
+
+    def __init__(self, params: Mapping[str, Any]) -> None:
+        try:
+            query = document_cache.resolve(params.get("query"), params.get("extensions"))
+        except PersistedQueryError as err:
+            raise SubscriptionError([err.as_dict()])
+        if not isinstance(query, str):
+            raise SubscriptionError(["Must provide query string."])
+        try:
+            document = document_cache.document_from_string(schema, query)
+        except GraphQLSyntaxError as err:
+            raise SubscriptionError([err])
+        operation = select_operation(document.document_ast, params.get("operationName"))
+        if operation is None or operation.operation != "subscription":
+            raise SubscriptionError(["Only subscription operations can be streamed; send queries to /graphql."])
+
+        self._events = Subject()
+        self._context: Dict[str, Any] = {"request": None}
+        result = schema.execute(
+            query,
+            backend=document_cache,
+            root_value=self._events,
+            variable_values=params.get("variables"),
+            operation_name=params.get("operationName"),
+            context_value=self._context,
+            allow_subscriptions=True,
+        )
+        if isinstance(result, ExecutionResult):
+            raise SubscriptionError(result.errors or ["Subscription failed"])
+        self._results: List[ExecutionResult] = []
+        self._subscription = result.subscribe(on_next=self._results.append)
+
+    def push(self, event: Event) -> List[str]:
+        # fresh batch loaders per event: results must not reuse earlier rows
+        self._context["loaders"] = Loaders(db.session)
+        self._events.on_next(event)
+        results, self._results[:] = list(self._results), []
+        frames = []
+        for result in results:
+            payload: Dict[str, Any] = {"data": result.data}
+            if result.errors:
+                payload["errors"] = [str(err) for err in result.errors]
+            frames.append(frame(payload))
+        return frames
+
+    def close(self) -> None:
+        self._subscription.dispose()
+
+
+def offer(inbox: Any, event: Event) -> None:
+    """Bus callback: queue `event` for a stream (queue.Queue or asyncio.Queue)."""
+    try:
+        inbox.put_nowait(event)
+    except (queue.Full, asyncio.QueueFull):
+        logger.warning("Subscription stream is %d events behind; dropping %s", inbox.maxsize, event.kind)
+
+
+def event_stream(stream: SubscriptionStream, inbox: "queue.Queue[Event]", heartbeat: float,
+                 after_event: Callable[[], None], close: Callable[[], None]) -> Iterator[str]:
+    """SSE body for a WSGI response: frames for each event on `inbox`, until the client leaves."""
+    try:
+        yield OPENING
+        while True:
+            try:
+                event = inbox.get(timeout=heartbeat)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            try:
+                frames = stream.push(event)
+            finally:
+                after_event()
+            yield from frames
+    finally:
+        close()
+        stream.close()
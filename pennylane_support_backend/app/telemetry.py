@@ -0,0 +1,440 @@
+"""
+Request telemetry: Prometheus-style counters and histograms for GraphQL
+operations, resolvers, SQL and auth, plus optional Apollo-tracing output.
+
+A RequestTrace is active (in a ContextVar) while the /graphql view executes
+an operation; SQLAlchemy cursor events and the ResolverTimer middleware add
+to it, and `finish()` folds it into the process-wide `registry`, which
+GET /api/metrics/prometheus renders in the text exposition format.
+
+The same cursor events feed N+1 detection: statement fingerprints that
+repeat within one request are logged in development, `query_budget()` caps
+statements per GraphQL request (the tests' `max_queries` marker) and
+`count_queries()` records every statement run inside a block.
+"""
+from __future__ import annotations
+
+import abc
+import collections
+import inspect
+import logging
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from graphql.type import GraphQLEnumType, GraphQLList, GraphQLNonNull, GraphQLScalarType
+from promise import Promise, is_thenable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request header asking for an `extensions.tracing` block in the response.
+TRACING_HEADER = "X-GraphQL-Tracing"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+logger = logging.getLogger(__name__)
+
+# Label values past this many series per metric are reported as "__other__"
+# (operation names come from clients).
+MAX_SERIES = 500
+
+
+# --------------------------------------------------------------------------- #
+#  Metrics
+# --------------------------------------------------------------------------- #
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        if key not in self._series and len(self._series) >= MAX_SERIES:
+            key = ("__other__",) * len(self.labelnames)
+        return key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            for key, value in series:
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    @abc.abstractmethod
+    def _render_series(self, key: Tuple[str, ...], value: Any) -> Iterable[str]:
+        """Exposition lines for one label set."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._series.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0)
+
+    def _render_series(self, key, value):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            key = self._key(labels)
+            counts, total = self._series.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._series.get(tuple(str(labels.get(n, "")) for n in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def _render_series(self, key, value):
+        counts, total = value
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="%s"' % _number(bound)
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+operation_seconds = registry.register(Histogram(
+    "graphql_operation_seconds", "GraphQL operation execution time.", ("operation", "type"),
+))
+field_seconds = registry.register(Histogram(
+    "graphql_field_seconds", "Resolver time per non-scalar field.", ("field",),
+))
+sql_queries = registry.register(Histogram(
+    "graphql_request_sql_queries", "SQL statements executed per GraphQL request.", ("operation",),
+    buckets=COUNT_BUCKETS,
+))
+sql_seconds = registry.register(Histogram(
+    "graphql_request_sql_seconds", "Time spent in SQL per GraphQL request.", ("operation",),
+))
+errors_total = registry.register(Counter(
+    "graphql_errors_total", "GraphQL errors by error class.", ("error",),
+))
+jwks_fetch_seconds = registry.register(Histogram(
+    "auth_jwks_fetch_seconds", "JWKS document downloads.",
+))
+jwt_verify_seconds = registry.register(Histogram(
+    "auth_jwt_verify_seconds", "JWT signature and claim verification (cache misses only).",
+))
+
+
+def gauges(name: str, label: str, snapshots: Dict[str, Dict[str, Any]]) -> str:
+    """Numeric fields of stats() snapshots as `<name>_<field>{<label>=...}` gauges."""
+    by_field: Dict[str, List[Tuple[str, Any]]] = {}
+    for owner, snapshot in sorted(snapshots.items()):
+        for field, value in snapshot.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                by_field.setdefault(field, []).append((owner, value))
+    lines: List[str] = []
+    for field, values in sorted(by_field.items()):
+        metric = f"{name}_{field}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(f'{metric}{{{label}="{_escape(owner)}"}} {_number(value)}' for owner, value in values)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+# --------------------------------------------------------------------------- #
+#  Per-request trace
+# --------------------------------------------------------------------------- #
+_current: ContextVar[Optional["RequestTrace"]] = ContextVar("graphql_trace", default=None)
+
+
+class RequestTrace:
+    """SQL and resolver timings of one GraphQL request."""
+
+    def __init__(self, tracing: bool = False, fingerprints: bool = False) -> None:
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.resolvers: Optional[List[Dict[str, Any]]] = [] if tracing else None
+        # statement fingerprint -> executions; kept for N+1 checks only
+        self.statements: Optional[collections.Counter] = (
+            collections.Counter() if fingerprints or _budgets else None
+        )
+        self._token = None
+
+    def __enter__(self) -> "RequestTrace":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._token)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints executed more than `threshold` times, most frequent first."""
+        if not self.statements:
+            return []
+        return [(fp, n) for fp, n in self.statements.most_common() if n > threshold]
+
+    def finish(self, operation: str, operation_type: str, errors: Optional[Iterable[Any]],
+               warn_repeats: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Record the request; returns the `tracing` extension when tracing.
+        With `warn_repeats`, statement shapes run more often than that are
+        logged as N+1 suspects.
+        """
+        elapsed = time.perf_counter() - self.start
+        operation_seconds.observe(elapsed, operation=operation, type=operation_type)
+        sql_queries.observe(self.sql_count, operation=operation)
+        sql_seconds.observe(self.sql_seconds, operation=operation)
+        for error in errors or ():
+            errors_total.inc(error=error_class(error))
+        if warn_repeats:
+            for fp, n in self.repeated(warn_repeats):
+                logger.warning("Possible N+1 in %s: %d x %s", operation, n, fp)
+        for budget in list(_budgets):
+            budget.check(operation, self)
+        if self.resolvers is None:
+            return None
+        return {"tracing": {
+            "version": 1,
+            "startTime": self.started_at.isoformat().replace("+00:00", "Z"),
+            "endTime": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "duration": int(elapsed * 1e9),
+            "execution": {"resolvers": sorted(self.resolvers, key=lambda r: r["startOffset"])},
+            "sql": {"queries": self.sql_count, "duration": int(self.sql_seconds * 1e9)},
+        }}
+
+
+def error_class(error: Any) -> str:
+    """Class of the exception behind a GraphQL error (GraphQLError for query errors)."""
+    return type(getattr(error, "original_error", None) or error).__name__
+
+
+def operation_label(operation: Any) -> Tuple[str, str]:
+    """(name, type) labels for a parsed OperationDefinition (or None)."""
+    if operation is None:
+        return "unknown", "unknown"
+    return (operation.name.value if operation.name else "anonymous"), operation.operation
+
+
+# --------------------------------------------------------------------------- #
+#  SQL
+# --------------------------------------------------------------------------- #
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*\)")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Statement shape: whitespace collapsed, literals and IN-lists folded."""
+    shape = " ".join(statement.split())
+    shape = _PARAM_LISTS.sub("(...)", shape)
+    return _LITERALS.sub("?", shape)
+
+
+class QueryCounter:
+    """Statements executed while `count_queries()` is active."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def selects(self) -> List[str]:
+        return [s for s in self.statements if s.lstrip().upper().startswith("SELECT")]
+
+    def fingerprints(self) -> collections.Counter:
+        return collections.Counter(fingerprint(s) for s in self.statements)
+
+
+class QueryBudget:
+    """At most `limit` SQL statements per GraphQL request; see query_budget()."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.violations: List[str] = []
+
+    def check(self, operation: str, trace: RequestTrace) -> None:
+        if trace.sql_count <= self.limit:
+            return
+        shapes = "\n".join(f"    {n} x {fp}" for fp, n in (trace.statements or collections.Counter()).most_common(5))
+        self.violations.append(
+            f"GraphQL operation {operation} ran {trace.sql_count} SQL statements (budget {self.limit}):\n{shapes}"
+        )
+
+    def report(self) -> str:
+        return "\n".join(self.violations)
+
+
+_counters: List[QueryCounter] = []
+_budgets: List[QueryBudget] = []
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Record every statement any engine executes inside the block."""
+    install_sql_hooks()
+    counter = QueryCounter()
+    _counters.append(counter)
+    try:
+        yield counter
+    finally:
+        _counters.remove(counter)
+
+
+@contextmanager
+def query_budget(limit: int) -> Iterator[QueryBudget]:
+    """Collect GraphQL requests that exceed `limit` statements inside the block."""
+    budget = QueryBudget(limit)
+    _budgets.append(budget)
+    try:
+        yield budget
+    finally:
+        _budgets.remove(budget)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._telemetry_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in _counters:
+        counter.statements.append(statement)
+    trace = _current.get()
+    start = getattr(context, "_telemetry_start", None)
+    if trace is not None and start is not None:
+        trace.sql_count += 1
+        trace.sql_seconds += time.perf_counter() - start
+        if trace.statements is not None:
+            trace.statements[fingerprint(statement)] += 1
+
+
+def install_sql_hooks() -> None:
+    """Count SQL for every engine (idempotent; called by create_app)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --------------------------------------------------------------------------- #
+#  Resolvers
+# --------------------------------------------------------------------------- #
+def _is_leaf(gql_type: Any) -> bool:
+    while isinstance(gql_type, (GraphQLNonNull, GraphQLList)):
+        gql_type = gql_type.of_type
+    return isinstance(gql_type, (GraphQLScalarType, GraphQLEnumType))
+
+
+class ResolverTimer:
+    """
+    Graphene middleware timing resolvers of non-scalar fields (every field
+    when the request is traced).  Promise and awaitable results are timed
+    until they resolve.
+    """
+
+    def resolve(self, next_, root, info, **args):
+        trace = _current.get()
+        if trace is None or (trace.resolvers is None and _is_leaf(info.return_type)):
+            return next_(root, info, **args)
+
+        start = time.perf_counter()
+        result = next_(root, info, **args)
+        if is_thenable(result):
+            return Promise.resolve(result).then(lambda value: self._done(trace, info, start, value))
+        if inspect.isawaitable(result):
+            return self._await(trace, info, start, result)
+        return self._done(trace, info, start, result)
+
+    async def _await(self, trace, info, start, awaitable):
+        return self._done(trace, info, start, await awaitable)
+
+    @staticmethod
+    def _done(trace: RequestTrace, info, start: float, value):
+        end = time.perf_counter()
+        field = f"{info.parent_type.name}.{info.field_name}"
+        if not _is_leaf(info.return_type):
+            field_seconds.observe(end - start, field=field)
+        if trace.resolvers is not None:
+            trace.resolvers.append({
+                "path": list(info.path or ()),
+                "parentType": info.parent_type.name,
+                "fieldName": info.field_name,
+                "returnType": str(info.return_type),
+                "startOffset": int((start - trace.start) * 1e9),
+                "duration": int((end - start) * 1e9),
+            })
+        return value
+
+
+resolver_timer = ResolverTimer()
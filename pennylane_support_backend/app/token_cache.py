@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of JWT payloads that already passed signature verification.
+
+    Entries are keyed by the SHA-256 digest of the raw token (the token itself
+    is never stored), expire at the token's `exp` minus `skew` seconds, and
+    are all dropped when the JWKS key set generation changes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        *,
+        skew: float = 30.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_size = max_size
+        self.skew = skew
+        self.enabled = enabled and max_size > 0
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str, generation: int) -> Optional[Dict[str, Any]]:
+        """Return the cached claims for `token`, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            self._check_generation_locked(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, payload = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return payload
+
+    def put(self, token: str, payload: Dict[str, Any], generation: int) -> None:
+        """Remember verified claims until the token's exp (minus skew)."""
+        if not self.enabled:
+            return
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            # Tokens without an expiry are always re-verified.
+            return
+        expires_at = float(exp) - self.skew
+        if expires_at <= self._clock():
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._check_generation_locked(generation)
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        snapshot["max_size"] = self.max_size
+        snapshot["enabled"] = self.enabled
+        return snapshot
+
+    def _check_generation_locked(self, generation: int) -> None:
+        if self._generation != generation:
+            if self._entries:
+                self._entries.clear()
+                self._stats["invalidations"] += 1
+            self._generation = generation
@@ -0,0 +1,114 @@
+"""add full-text search vectors and GIN indexes for conversations and challenges
+
+Revision ID: 5c1e7a9d2b40
+Revises: a05396b34043
+Create Date: 2026-10-18 11:02:17.540391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9d2b40'
+down_revision = 'a05396b34043'
+branch_labels = None
+depends_on = None
+
+
+CONVERSATION_DOCUMENT_FN = """
+CREATE OR REPLACE FUNCTION support_conversations_search_vector_refresh() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.topic, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(p.content, ' ') FROM conversation_posts p WHERE p.conversation_id = NEW.id), ''
+        )), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Statement-level triggers with transition tables, so a bulk insert of posts
+# re-aggregates each touched conversation once instead of once per post.
+# "SET topic = topic" fires the BEFORE UPDATE OF topic trigger above.
+POSTS_TOUCH_FN = """
+CREATE OR REPLACE FUNCTION conversation_posts_touch_search_vector() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE support_conversations c SET topic = c.topic
+         WHERE c.id IN (SELECT DISTINCT conversation_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE support_conversations c SET topic = c.topic
+         WHERE c.id IN (SELECT DISTINCT conversation_id FROM old_rows);
+    ELSE
+        UPDATE support_conversations c SET topic = c.topic
+         WHERE c.id IN (SELECT conversation_id FROM new_rows UNION SELECT conversation_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    # Conversations: tsvector maintained by triggers (it aggregates posts,
+    # which a generated column cannot do)
+    op.add_column('support_conversations', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(CONVERSATION_DOCUMENT_FN)
+    op.execute("""
+        CREATE TRIGGER support_conversations_search_vector
+        BEFORE INSERT OR UPDATE OF topic, category ON support_conversations
+        FOR EACH ROW EXECUTE FUNCTION support_conversations_search_vector_refresh()
+    """)
+    op.execute(POSTS_TOUCH_FN)
+    op.execute("""
+        CREATE TRIGGER conversation_posts_search_vector_ins
+        AFTER INSERT ON conversation_posts REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION conversation_posts_touch_search_vector()
+    """)
+    op.execute("""
+        CREATE TRIGGER conversation_posts_search_vector_upd
+        AFTER UPDATE ON conversation_posts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION conversation_posts_touch_search_vector()
+    """)
+    op.execute("""
+        CREATE TRIGGER conversation_posts_search_vector_del
+        AFTER DELETE ON conversation_posts REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION conversation_posts_touch_search_vector()
+    """)
+    # Backfill existing rows
+    op.execute("UPDATE support_conversations SET topic = topic")
+    op.create_index(
+        'ix_support_conversations_search_vector', 'support_conversations', ['search_vector'],
+        unique=False, postgresql_using='gin',
+    )
+
+    # Challenges: plain generated column
+    op.execute("""
+        ALTER TABLE challenges ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index(
+        'ix_challenges_search_vector', 'challenges', ['search_vector'],
+        unique=False, postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('ix_challenges_search_vector', table_name='challenges')
+    op.drop_column('challenges', 'search_vector')
+
+    op.drop_index('ix_support_conversations_search_vector', table_name='support_conversations')
+    op.execute("DROP TRIGGER IF EXISTS conversation_posts_search_vector_del ON conversation_posts")
+    op.execute("DROP TRIGGER IF EXISTS conversation_posts_search_vector_upd ON conversation_posts")
+    op.execute("DROP TRIGGER IF EXISTS conversation_posts_search_vector_ins ON conversation_posts")
+    op.execute("DROP FUNCTION IF EXISTS conversation_posts_touch_search_vector()")
+    op.execute("DROP TRIGGER IF EXISTS support_conversations_search_vector ON support_conversations")
+    op.execute("DROP FUNCTION IF EXISTS support_conversations_search_vector_refresh()")
+    op.drop_column('support_conversations', 'search_vector')
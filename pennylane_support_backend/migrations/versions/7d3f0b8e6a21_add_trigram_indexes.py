@@ -0,0 +1,38 @@
+"""add pg_trgm GIN indexes on challenge title, public_id and tag name
+
+Revision ID: 7d3f0b8e6a21
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-18 13:40:05.118274
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f0b8e6a21'
+down_revision = '5c1e7a9d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_challenges_title_trgm', 'challenges', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_challenges_public_id_trgm', 'challenges', ['public_id'], unique=False,
+        postgresql_using='gin', postgresql_ops={'public_id': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_tags_name_trgm', 'tags', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tags_name_trgm', table_name='tags')
+    op.drop_index('ix_challenges_public_id_trgm', table_name='challenges')
+    op.drop_index('ix_challenges_title_trgm', table_name='challenges')
+    # The extension is left installed; other objects may depend on it.
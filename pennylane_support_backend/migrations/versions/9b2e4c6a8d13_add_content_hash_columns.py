@@ -0,0 +1,32 @@
+"""add content_hash to challenges and support_conversations for incremental re-seeding
+
+Revision ID: 9b2e4c6a8d13
+Revises: 7d3f0b8e6a21
+Create Date: 2026-10-18 15:12:44.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4c6a8d13'
+down_revision = '7d3f0b8e6a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('challenges', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    with op.batch_alter_table('support_conversations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('support_conversations', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('challenges', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
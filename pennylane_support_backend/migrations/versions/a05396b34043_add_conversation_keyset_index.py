@@ -0,0 +1,26 @@
+"""add (created_at, id) index for keyset pagination of conversations
+
+Revision ID: a05396b34043
+Revises: e29f5e4afb0c
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a05396b34043'
+down_revision = 'e29f5e4afb0c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('support_conversations', schema=None) as batch_op:
+        batch_op.create_index('ix_support_conversations_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('support_conversations', schema=None) as batch_op:
+        batch_op.drop_index('ix_support_conversations_created_at_id')
@@ -0,0 +1,136 @@
+"""add materialized queue_stats and first-response tracking
+
+Revision ID: d7e3a1b9c5f2
+Revises: c4d8e2f1a7b3
+Create Date: 2026-10-18 21:14:52.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3a1b9c5f2'
+down_revision = 'c4d8e2f1a7b3'
+branch_labels = None
+depends_on = None
+
+
+# Adds one conversation row's contribution (sign = 1) to its three buckets,
+# or removes it (sign = -1).  There is no overall row, which every write
+# would contend on; totals are summed from the category rows when read.
+# See app/services/stats_service.py.
+BUMP_FN = """
+CREATE OR REPLACE FUNCTION queue_stats_bump(c support_conversations, sign integer) RETURNS void AS $$
+DECLARE
+    d_responded integer := CASE WHEN c.first_response_seconds IS NULL THEN 0 ELSE sign END;
+    d_seconds bigint := sign * coalesce(c.first_response_seconds, 0);
+BEGIN
+    INSERT INTO queue_stats AS s (dimension, bucket, status, conversations, responded, response_seconds)
+    VALUES ('category', coalesce(c.category, ''), c.status, sign, d_responded, d_seconds),
+           ('assignee', coalesce(c.assigned_to_user_id::text, ''), c.status, sign, d_responded, d_seconds),
+           ('challenge', coalesce(c.challenge_id::text, ''), c.status, sign, d_responded, d_seconds)
+    ON CONFLICT (dimension, bucket, status) DO UPDATE SET
+        conversations = s.conversations + EXCLUDED.conversations,
+        responded = s.responded + EXCLUDED.responded,
+        response_seconds = s.response_seconds + EXCLUDED.response_seconds;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+CONVERSATIONS_STATS_FN = """
+CREATE OR REPLACE FUNCTION support_conversations_queue_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM queue_stats_bump(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM queue_stats_bump(NEW, 1);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Opening post to the first post by another author (user id, else display
+# name): the asker's follow-ups are not a response.
+FIRST_RESPONSE = """
+    SELECT round(extract(epoch FROM r.created_at - o.created_at))::integer
+      FROM (SELECT created_at, coalesce(author_user_id::text, author_display_name, '') AS author
+              FROM conversation_posts WHERE conversation_id = c.id
+             ORDER BY created_at, id LIMIT 1) o
+      JOIN conversation_posts r
+        ON r.conversation_id = c.id AND coalesce(r.author_user_id::text, r.author_display_name, '') <> o.author
+     ORDER BY r.created_at, r.id LIMIT 1
+"""
+
+# Statement-level, like the search vector triggers: a bulk insert of posts
+# recomputes each touched conversation once.
+POSTS_FIRST_RESPONSE_FN = f"""
+CREATE OR REPLACE FUNCTION conversation_posts_first_response() RETURNS trigger AS $$
+BEGIN
+    UPDATE support_conversations c SET first_response_seconds = ({FIRST_RESPONSE})
+     WHERE c.id IN (SELECT DISTINCT conversation_id FROM changed_rows);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+TRACKED = "status, category, assigned_to_user_id, challenge_id, first_response_seconds"
+
+
+def upgrade():
+    op.add_column('support_conversations', sa.Column('first_response_seconds', sa.Integer(), nullable=True))
+    op.create_table(
+        'queue_stats',
+        sa.Column('dimension', sa.String(length=16), nullable=False),
+        sa.Column('bucket', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('conversations', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('responded', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('response_seconds', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'bucket', 'status'),
+    )
+
+    op.execute(BUMP_FN)
+    op.execute(CONVERSATIONS_STATS_FN)
+    op.execute("""
+        CREATE TRIGGER support_conversations_queue_stats_ins_del
+        AFTER INSERT OR DELETE ON support_conversations
+        FOR EACH ROW EXECUTE FUNCTION support_conversations_queue_stats()
+    """)
+    op.execute(f"""
+        CREATE TRIGGER support_conversations_queue_stats_upd
+        AFTER UPDATE OF {TRACKED} ON support_conversations
+        FOR EACH ROW WHEN (({', '.join('OLD.' + c for c in TRACKED.split(', '))})
+                           IS DISTINCT FROM ({', '.join('NEW.' + c for c in TRACKED.split(', '))}))
+        EXECUTE FUNCTION support_conversations_queue_stats()
+    """)
+    op.execute(POSTS_FIRST_RESPONSE_FN)
+    op.execute("""
+        CREATE TRIGGER conversation_posts_first_response_ins
+        AFTER INSERT ON conversation_posts REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION conversation_posts_first_response()
+    """)
+    op.execute("""
+        CREATE TRIGGER conversation_posts_first_response_del
+        AFTER DELETE ON conversation_posts REFERENCING OLD TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION conversation_posts_first_response()
+    """)
+
+    # Backfill: first replies for existing conversations, then the buckets
+    op.execute(f"UPDATE support_conversations c SET first_response_seconds = ({FIRST_RESPONSE})")
+    op.execute("TRUNCATE queue_stats")
+    op.execute("SELECT queue_stats_bump(c, 1) FROM support_conversations c")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS conversation_posts_first_response_del ON conversation_posts")
+    op.execute("DROP TRIGGER IF EXISTS conversation_posts_first_response_ins ON conversation_posts")
+    op.execute("DROP FUNCTION IF EXISTS conversation_posts_first_response()")
+    op.execute("DROP TRIGGER IF EXISTS support_conversations_queue_stats_upd ON support_conversations")
+    op.execute("DROP TRIGGER IF EXISTS support_conversations_queue_stats_ins_del ON support_conversations")
+    op.execute("DROP FUNCTION IF EXISTS support_conversations_queue_stats()")
+    op.execute("DROP FUNCTION IF EXISTS queue_stats_bump(support_conversations, integer)")
+    op.drop_table('queue_stats')
+    op.drop_column('support_conversations', 'first_response_seconds')
@@ -0,0 +1,37 @@
+"""mark posts written by the seed import so re-imports keep in-app replies
+
+Revision ID: e8a2c5d71f34
+Revises: d7e3a1b9c5f2
+Create Date: 2026-10-19 10:21:07.553918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a2c5d71f34'
+down_revision = 'd7e3a1b9c5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conversation_posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('imported', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Existing rows carry no marker.  Exported posts have no author and keep
+    # their export timestamps, which predate the conversation row the seed
+    # created for them; replies written in the app are never older than
+    # their conversation.
+    op.execute("""
+        UPDATE conversation_posts SET imported = true
+         WHERE author_user_id IS NULL
+           AND created_at < (SELECT c.created_at FROM support_conversations c
+                              WHERE c.id = conversation_posts.conversation_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('conversation_posts', schema=None) as batch_op:
+        batch_op.drop_column('imported')
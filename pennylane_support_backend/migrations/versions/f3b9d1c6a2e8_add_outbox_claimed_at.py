@@ -0,0 +1,26 @@
+"""add outbox_events.claimed_at for claim-then-deliver dispatching
+
+Revision ID: f3b9d1c6a2e8
+Revises: e8a2c5d71f34
+Create Date: 2026-10-19 14:02:45.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d1c6a2e8'
+down_revision = 'e8a2c5d71f34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
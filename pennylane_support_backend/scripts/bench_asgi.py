@@ -0,0 +1,104 @@
+"""
+Load test: the same GraphQL query against the WSGI and ASGI deployments at
+high concurrency.  Start both against the same seeded database, e.g.
+
+    gunicorn -w 4 --threads 8 -b :8000 wsgi:app
+    uvicorn asgi:app --workers 4 --port 8001
+
+    python scripts/bench_asgi.py --concurrency 200 --requests 5000 \\
+        wsgi=http://localhost:8000/graphql asgi=http://localhost:8001/graphql
+
+Each target gets the same number of requests from --concurrency keep-alive
+connections.  Paged fields are not response-cached, so every request
+reaches the database.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+QUERY = """
+query Bench($n: Int) {
+  challengesPaged(pageSize: $n) { items { title tags { name } } }
+  conversationsPaged(pageSize: $n) { items { topic posts { content } } }
+}
+"""
+
+
+def _worker(url: str, count: int, page_size: int, latencies: list, errors: list, lock: threading.Lock) -> None:
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = connection_class(parts.netloc, timeout=60)
+    mine = []
+    failed = 0
+    for _ in range(count):
+        body = json.dumps({"query": QUERY, "variables": {"n": page_size}})
+        start = time.perf_counter()
+        try:
+            conn.request("POST", parts.path or "/", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            payload = resp.read()
+            if resp.status != 200 or b'"errors"' in payload:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = connection_class(parts.netloc, timeout=60)
+        mine.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(mine)
+        errors.append(failed)
+
+
+def _run(url: str, concurrency: int, requests: int, page_size: int) -> dict:
+    latencies: list = []
+    errors: list = []
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+    threads = [
+        threading.Thread(target=_worker, args=(url, per_thread, page_size, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    cut = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": cut[49] * 1000,
+        "p95": cut[94] * 1000,
+        "p99": cut[98] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("targets", nargs="+", help="label=url of a /graphql endpoint")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000, help="per target")
+    parser.add_argument("--page-size", type=int, default=12)
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'target':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for target in args.targets:
+        label, _, url = target.partition("=")
+        url = url or label
+        _run(url, min(args.concurrency, args.warmup), args.warmup, args.page_size)
+        r = _run(url, args.concurrency, args.requests, args.page_size)
+        print(f"{label:<10} {r['rps']:>9.0f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
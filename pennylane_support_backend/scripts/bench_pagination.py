@@ -0,0 +1,108 @@
+"""
+Benchmark: page 1 vs a deep page for offset (conversationsPaged) and keyset
+(conversationsConnection) pagination.
+
+    python scripts/bench_pagination.py                      # in-memory SQLite
+    DATABASE_URL=postgresql://... python scripts/bench_pagination.py --no-seed
+
+Seeding inserts --pages * --page-size conversations; pass --no-seed to reuse
+an already populated database.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.graphql.pagination import encode_cursor  # noqa: E402
+from app.models.support import SupportConversation  # noqa: E402
+
+OFFSET_QUERY = """
+query($page: Int, $pageSize: Int) {
+  conversationsPaged(page: $page, pageSize: $pageSize) { items { id topic } }
+}
+"""
+
+KEYSET_QUERY = """
+query($first: Int, $after: String) {
+  conversationsConnection(first: $first, after: $after) {
+    edges { node { id topic } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+
+def _seed(rows: int) -> None:
+    base = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "identifier": f"BENCH_{i:08d}",
+            "topic": f"Benchmark topic {i}",
+            "category": "Bench",
+            "status": "OPEN",
+            "created_at": base + timedelta(seconds=i),
+            "updated_at": base + timedelta(seconds=i),
+        })
+        if len(batch) >= 5000:
+            db.session.execute(SupportConversation.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(SupportConversation.__table__.insert(), batch)
+    db.session.commit()
+
+
+def _time(client, query, variables, repeat: int) -> float:
+    body = json.dumps({"query": query, "variables": variables})
+    start = time.perf_counter()
+    for _ in range(repeat):
+        resp = client.post("/graphql", data=body, content_type="application/json")
+        assert "errors" not in resp.get_json(), resp.get_json()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _cursor_before_page(page: int, page_size: int):
+    if page <= 1:
+        return None
+    row = (
+        db.session.query(SupportConversation.created_at, SupportConversation.id)
+        .order_by(SupportConversation.created_at.desc(), SupportConversation.id.desc())
+        .offset((page - 1) * page_size - 1)
+        .limit(1)
+        .one()
+    )
+    return encode_cursor(row.created_at, row.id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    uri = os.getenv("DATABASE_URL", "sqlite:///:memory:")
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": uri})
+    with app.app_context():
+        if not args.no_seed:
+            db.create_all()
+            _seed(args.pages * args.page_size)
+        client = app.test_client()
+
+        print(f"{'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+        for page in (1, args.pages):
+            offset_ms = _time(client, OFFSET_QUERY, {"page": page, "pageSize": args.page_size}, args.repeat)
+            after = _cursor_before_page(page, args.page_size)
+            keyset_ms = _time(client, KEYSET_QUERY, {"first": args.page_size, "after": after}, args.repeat)
+            print(f"{page:>6} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: requests/sec on a @requires_auth endpoint with the verified
+token cache on and off.  Uses a throwaway RSA key and an in-memory JWKS, so
+no identity provider or database is needed.
+
+    python scripts/bench_token_cache.py --requests 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import rsa  # noqa: E402
+from jose import jwk, jwt  # noqa: E402
+
+from app import auth, create_app  # noqa: E402
+from app.jwks import JWKSCache  # noqa: E402
+from app.token_cache import VerifiedTokenCache  # noqa: E402
+
+
+def _setup(bits: int) -> str:
+    _pub, priv = rsa.newkeys(bits)
+    pem = priv.save_pkcs1().decode()
+    public_jwk = jwk.construct(pem, "RS256").public_key().to_dict()
+    public_jwk["kid"] = "bench"
+
+    auth.AUTH0_DOMAIN = "bench.local"
+    auth.API_IDENTIFIER = "https://bench.local/api"
+    auth.jwks_cache = JWKSCache("https://bench.local/jwks.json", lambda url: ({"keys": [public_jwk]}, None))
+    return jwt.encode(
+        {
+            "sub": "auth0|bench",
+            "aud": auth.API_IDENTIFIER,
+            "iss": "https://bench.local/",
+            "exp": int(time.time()) + 3600,
+        },
+        pem,
+        algorithm="RS256",
+        headers={"kid": "bench"},
+    )
+
+
+def _run(client, token: str, n: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get("/api/secure-data", headers=headers)
+        assert resp.status_code == 200, resp.status_code
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--bits", type=int, default=2048, help="RSA key size")
+    args = parser.parse_args()
+
+    token = _setup(args.bits)
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    client = app.test_client()
+
+    for label, size in (("cache off", 0), ("cache on", 1024)):
+        auth.token_cache = VerifiedTokenCache(max_size=size)
+        _run(client, token, 10)  # warm up
+        rps = _run(client, token, args.requests)
+        print(f"{label:>9}: {rps:10.1f} req/s  {auth.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
+import os
+
 import pytest
+from sqlalchemy import text
+
 from app import create_app
 from app.extensions import db as _db
+from app.telemetry import count_queries, query_budget
+from app.models.challenge import Challenge, ChallengeHint, LearningObjective, Tag
+from app.models.support import SupportConversation, ConversationPost
+from app.models.user import User
 
 @pytest.fixture(scope="session")
 def app():
@@ -17,3 +25,152 @@ def app():
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture
+def pg_app():
+    """
+    App on a scratch PostgreSQL database (TEST_POSTGRES_URL), with every
+    table dropped and recreated.  Tests using it should be marked `postgres`.
+    """
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("set TEST_POSTGRES_URL to run PostgreSQL tests")
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": url,
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        _db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        _db.session.commit()
+        _db.drop_all()
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """@pytest.mark.max_queries(n): fail if any GraphQL request runs more than n statements."""
+    marker = item.get_closest_marker("max_queries")
+    if marker is None:
+        return (yield)
+    with query_budget(marker.args[0]) as budget:
+        result = yield
+    if budget.violations:
+        pytest.fail(budget.report(), pytrace=False)
+    return result
+
+
+@pytest.fixture
+def sql_queries():
+    """Every SQL statement executed during the test (a telemetry.QueryCounter)."""
+    with count_queries() as counter:
+        yield counter
+
+
+@pytest.fixture(autouse=True)
+def _reset_caches():
+    """Cached totals, responses, documents and identities are process-wide; don't let them leak between tests."""
+    from app.counts import count_cache
+    from app.graphql.documents import document_cache
+    from app.identity import identity_cache
+    from app.response_cache import response_cache
+
+    count_cache.invalidate()
+    identity_cache.clear()
+    response_cache.clear()
+    document_cache.clear()
+    yield
+
+
+@pytest.fixture(scope="session")
+def rsa_private_pem():
+    """A small RSA key for signing test tokens (1024 bits keeps keygen fast)."""
+    import rsa
+
+    _pub, priv = rsa.newkeys(1024)
+    return priv.save_pkcs1().decode()
+
+
+@pytest.fixture
+def issue_token(monkeypatch, rsa_private_pem):
+    """
+    Point app.auth at a fake tenant whose JWKS is served from memory and
+    return a factory that signs tokens for it.
+    """
+    import time
+
+    from jose import jwk, jwt
+
+    from app import auth
+    from app.jwks import JWKSCache
+    from app.token_cache import VerifiedTokenCache
+
+    public_jwk = jwk.construct(rsa_private_pem, "RS256").public_key().to_dict()
+    public_jwk["kid"] = "test-key"
+
+    monkeypatch.setattr(auth, "AUTH0_DOMAIN", "tenant.test")
+    monkeypatch.setattr(auth, "API_IDENTIFIER", "https://api.test")
+    monkeypatch.setattr(
+        auth, "jwks_cache",
+        JWKSCache("https://tenant.test/.well-known/jwks.json", lambda url: ({"keys": [public_jwk]}, None)),
+    )
+    monkeypatch.setattr(auth, "token_cache", VerifiedTokenCache(max_size=128))
+
+    def _issue(sub="auth0|tester", roles=None, ttl=3600, **claims):
+        ns = auth.NAMESPACE.rstrip("/") + "/"
+        payload = {
+            "sub": sub,
+            "aud": "https://api.test",
+            "iss": "https://tenant.test/",
+            "exp": int(time.time()) + ttl,
+            f"{ns}roles": roles or [],
+            **claims,
+        }
+        return jwt.encode(payload, rsa_private_pem, algorithm="RS256", headers={"kid": "test-key"})
+
+    return _issue
+
+
+@pytest.fixture
+def seeded_client():
+    """Fresh in-memory database with conversations, posts and assignees."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        _db.create_all()
+        agents = [
+            User(username=f"agent{i}", email=f"agent{i}@example.com", auth0_id=f"auth0|{i}", roles=[])
+            for i in range(3)
+        ]
+        tags = [Tag(name="qml"), Tag(name="gates")]
+        _db.session.add_all(agents + tags)
+        _db.session.flush()
+        for c in range(4):
+            challenge = Challenge(
+                public_id=f"CH_{c}", title=f"Challenge {c}", category="Quantum",
+                points=c, assigned_support_user_id=agents[c % 3].id, tags=tags,
+            )
+            challenge.hints = [ChallengeHint(text="hint")]
+            challenge.learning_objectives = [LearningObjective(text="objective")]
+            _db.session.add(challenge)
+            _db.session.flush()
+            for n in range(6):
+                conv = SupportConversation(
+                    identifier=f"CONV_{c}_{n}", topic=f"Topic {c}/{n}", category="Help",
+                    challenge_id=challenge.id, assigned_to_user_id=agents[n % 3].id,
+                )
+                # asker, agent reply, asker
+                conv.posts = [ConversationPost(content=f"post {p}", author_display_name="agent" if p == 1 else "u")
+                              for p in range(3)]
+                _db.session.add(conv)
+        _db.session.commit()
+        yield app.test_client()
+        _db.session.remove()
+        _db.drop_all()
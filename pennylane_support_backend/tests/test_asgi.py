@@ -0,0 +1,213 @@
+import asyncio
+import contextlib
+import json
+from urllib.parse import urlencode
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from app.asgi import async_database_url, create_asgi_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.challenge import Challenge, ChallengeHint, Tag  # noqa: E402
+from app.models.support import ConversationPost, SupportConversation  # noqa: E402
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    # a file database: the sync and async engines must see the same rows
+    asgi_app = create_asgi_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'asgi.db'}",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "ASGI_ASYNC_QUERIES": True,
+    })
+    with asgi_app.flask_app.app_context():
+        db.create_all()
+        tags = [Tag(name="qml"), Tag(name="gates")]
+        for c in range(3):
+            challenge = Challenge(public_id=f"CH_{c}", title=f"Challenge {c}", category="Quantum", points=c, tags=tags)
+            challenge.hints = [ChallengeHint(text="hint")]
+            challenge.conversations = [
+                SupportConversation(identifier=f"CONV_{c}_{n}", topic=f"Topic {c}/{n}", category="Help",
+                                    posts=[ConversationPost(content="post", author_display_name="u")])
+                for n in range(2)
+            ]
+            db.session.add(challenge)
+        db.session.commit()
+    yield asgi_app
+    asyncio.run(asgi_app.engine.dispose())
+    with asgi_app.flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _call(asgi_app, method, path, body=None, headers=()):
+    content = json.dumps(body).encode() if body is not None else b""
+    messages = [{"type": "http.request", "body": content}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "path": path, "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode()), *headers],
+    }
+    asyncio.run(asgi_app(scope, receive, send))
+    start, *body_messages = sent
+    body = b"".join(m.get("body", b"") for m in body_messages)
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+def _graphql(asgi_app, query, variables=None, headers=()):
+    status, response_headers, body = _call(asgi_app, "POST", "/graphql", {"query": query, "variables": variables}, headers)
+    assert status == 200
+    payload = json.loads(body)
+    assert "errors" not in payload, payload
+    return response_headers, payload
+
+
+def _track_sessions(asgi_app):
+    """Count async sessions opened by the root resolvers and how many overlap."""
+    real_sessions = asgi_app.middleware.sessions
+    counts = {"opened": 0, "active": 0, "peak": 0}
+
+    @contextlib.asynccontextmanager
+    async def tracking_sessions():
+        async with real_sessions() as session:
+            counts["opened"] += 1
+            counts["active"] += 1
+            counts["peak"] = max(counts["peak"], counts["active"])
+            await asyncio.sleep(0.01)
+            try:
+                yield session
+            finally:
+                counts["active"] -= 1
+
+    asgi_app.middleware.sessions = tracking_sessions
+    return counts
+
+
+def test_database_urls_map_to_async_drivers():
+    assert async_database_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+    assert async_database_url("postgres://db/x") == "postgresql+asyncpg://db/x"
+    assert async_database_url("sqlite:///db.sqlite3") == "sqlite+aiosqlite:///db.sqlite3"
+    assert async_database_url("postgresql+asyncpg://db/x") == "postgresql+asyncpg://db/x"
+
+
+def test_list_queries_run_on_the_async_path_with_the_same_result(asgi_app):
+    query = """
+    query Page($n: Int) {
+      challengesPaged(pageSize: $n) { items { title tags { name } conversations { topic posts { content } } } }
+      conversationCategories
+    }
+    """
+    counts = _track_sessions(asgi_app)
+    headers, payload = _graphql(asgi_app, query, {"n": 2}, headers=[(b"origin", b"http://localhost:3000")])
+    assert counts["opened"] == 2
+    assert headers["access-control-allow-origin"] == "http://localhost:3000"
+    items = payload["data"]["challengesPaged"]["items"]
+    assert [i["title"] for i in items] == ["Challenge 2", "Challenge 1"]
+    assert all(len(i["conversations"]) == 2 and len(i["tags"]) == 2 for i in items)
+    assert payload["extensions"]["cost"]["requested"] > 0
+
+    flask_payload = asgi_app.flask_app.test_client().post(
+        "/graphql", json={"query": query, "variables": {"n": 2}},
+    ).get_json()
+    assert flask_payload["data"] == payload["data"]
+
+
+def test_sibling_root_fields_resolve_concurrently(asgi_app):
+    counts = _track_sessions(asgi_app)
+    _headers, payload = _graphql(asgi_app, "{ challenges { title } tags { name } conversationCategories }")
+    assert len(payload["data"]["challenges"]) == 3
+    assert counts["peak"] == 3
+
+
+def test_everything_else_falls_back_to_flask(asgi_app):
+    counts = _track_sessions(asgi_app)
+    # health check and a query with a relationship the async path doesn't eager-load
+    assert _call(asgi_app, "GET", "/")[2] == b"PennyLane Support API is up!"
+    headers, payload = _graphql(asgi_app, "{ assignedUsers { name assignedChallenges { title } } }")
+    assert payload["data"] == {"assignedUsers": []}
+    assert counts["opened"] == 0
+
+    # a mutation through Flask invalidates what the async path cached
+    query = '{ challenge(publicId: "CH_0") { conversations { topic } } }'
+    assert _graphql(asgi_app, query)[0]["x-cache"] == "MISS"
+    assert _graphql(asgi_app, query)[0]["x-cache"] == "HIT"
+    _headers, created = _graphql(
+        asgi_app,
+        'mutation { createConversation(challengePublicId: "CH_0", topic: "New") { ok } }',
+    )
+    assert created["data"]["createConversation"]["ok"] is True
+    headers, payload = _graphql(asgi_app, query)
+    assert headers["x-cache"] == "MISS"
+    assert len(payload["data"]["challenge"]["conversations"]) == 3
+
+
+def test_lifespan_disposes_the_engine(asgi_app):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+def test_subscriptions_stream_from_the_event_loop(asgi_app):
+    query = "subscription { conversationUpdated(id: 1) { topic posts { content } } }"
+
+    async def run():
+        chunks = asyncio.Queue()
+        gone = asyncio.Event()
+        requests = [{"type": "http.request", "body": b""}]
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await chunks.put(message)
+
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "path": "/graphql/stream",
+            "query_string": urlencode({"query": query}).encode(), "headers": [],
+        }
+        served = asyncio.ensure_future(asgi_app(scope, receive, send))
+        start = await chunks.get()
+        assert (start["status"], dict(start["headers"])[b"content-type"]) == (200, b"text/event-stream")
+        assert (await chunks.get())["body"] == b": ok\n\n"
+
+        client = asgi_app.flask_app.test_client()
+        await asyncio.to_thread(
+            client.post, "/graphql", json={"query": 'mutation { addPost(conversationId: 1, content: "live") { ok } }'},
+        )
+        frame = (await chunks.get())["body"].decode()
+        gone.set()
+        await served
+        return frame
+
+    frame = asyncio.run(run())
+    assert frame.startswith("event: next\ndata: ")
+    data = json.loads(frame.split("data: ", 1)[1])["data"]["conversationUpdated"]
+    assert data["posts"][-1] == {"content": "live"}
+
+
+def test_queries_go_through_flask_unless_async_queries_are_enabled(asgi_app):
+    asgi_app.async_queries = False
+    counts = _track_sessions(asgi_app)
+    _headers, payload = _graphql(asgi_app, "{ challenges { title } tags { name } }")
+    assert len(payload["data"]["challenges"]) == 3
+    assert counts["opened"] == 0
@@ -0,0 +1,126 @@
+import pytest
+
+from app.extensions import db
+from app.models.support import ConversationPost, SupportConversation
+from app.models.user import User
+from app.services import conversation_service as svc
+
+ASSIGN = """
+mutation($ids: [Int!]!) {
+  assignConversations(conversationIds: $ids) { ok results { conversationId ok error conversation { status } } }
+}
+"""
+STATUSES = """
+mutation($ids: [Int!]!, $status: String!) {
+  updateConversationStatuses(conversationIds: $ids, status: $status) { ok results { conversationId ok error } }
+}
+"""
+ADD_POSTS = """
+mutation($inputs: [PostInput!]!) {
+  addPosts(inputs: $inputs) { ok results { conversationId ok error post { content authorDisplayName } } }
+}
+"""
+
+
+def _admin(issue_token):
+    return {"Authorization": "Bearer " + issue_token(sub="auth0|agent0", roles=["support_admin"], name="Agent")}
+
+
+def _run(client, query, variables, headers=None):
+    payload = client.post("/graphql", json={"query": query, "variables": variables}, headers=headers or {}).get_json()
+    assert "errors" not in payload, payload
+    return next(iter(payload["data"].values()))
+
+
+def _ids(n):
+    return [c.id for c in db.session.query(SupportConversation).order_by(SupportConversation.id).limit(n)]
+
+
+@pytest.mark.max_queries(7)
+def test_assign_many_in_one_statement(seeded_client, issue_token, sql_queries):
+    ids = _ids(12)
+    result = _run(seeded_client, ASSIGN, {"ids": ids + [999999]}, _admin(issue_token))
+
+    assert result["ok"] is False
+    assert [r["conversationId"] for r in result["results"]] == ids + [999999]
+    assert all(r["ok"] and r["conversation"]["status"] == "ASSIGNED" for r in result["results"][:-1])
+    assert result["results"][-1] == {
+        "conversationId": 999999, "ok": False, "error": "Conversation not found", "conversation": None,
+    }
+    updates = [s for s in sql_queries.statements if s.lstrip().upper().startswith("UPDATE SUPPORT_CONVERSATIONS")]
+    assert len(updates) == 1
+
+    agent = User.query.filter_by(auth0_id="auth0|agent0").one()
+    assigned = db.session.query(SupportConversation).filter(SupportConversation.id.in_(ids))
+    assert {c.assigned_to_user_id for c in assigned} == {agent.id}
+
+
+def test_status_change_validates_and_requires_role(seeded_client, issue_token):
+    ids = _ids(3)
+    result = _run(seeded_client, STATUSES, {"ids": ids, "status": "RESOLVED"}, _admin(issue_token))
+    assert result["ok"] is True
+    assert {c.status for c in db.session.query(SupportConversation).filter(SupportConversation.id.in_(ids))} == {"RESOLVED"}
+
+    bad = seeded_client.post("/graphql", json={"query": STATUSES, "variables": {"ids": ids, "status": "DONE"}},
+                             headers=_admin(issue_token)).get_json()
+    assert "Status must be one of" in bad["errors"][0]
+
+    user = {"Authorization": "Bearer " + issue_token(sub="auth0|user", roles=[])}
+    denied = seeded_client.post("/graphql", json={"query": STATUSES, "variables": {"ids": ids, "status": "OPEN"}},
+                                headers=user).get_json()
+    assert denied["errors"]
+
+
+def test_add_posts_reports_each_item(seeded_client):
+    conv_id = _ids(1)[0]
+    before = ConversationPost.query.filter_by(conversation_id=conv_id).count()
+    result = _run(seeded_client, ADD_POSTS, {"inputs": [
+        {"conversationId": conv_id, "content": "one", "authorDisplayName": "Ada"},
+        {"conversationId": conv_id, "content": "   "},
+        {"conversationId": 999999, "content": "lost"},
+        {"conversationId": conv_id, "content": "two"},
+    ]})
+    assert [(r["ok"], r["error"]) for r in result["results"]] == [
+        (True, None), (False, "Reply content cannot be empty"), (False, "Conversation not found"), (True, None),
+    ]
+    assert result["results"][0]["post"] == {"content": "one", "authorDisplayName": "Ada"}
+    assert ConversationPost.query.filter_by(conversation_id=conv_id).count() == before + 2
+
+
+def test_batches_are_capped(seeded_client, monkeypatch):
+    monkeypatch.setattr(svc, "MAX_BULK_ITEMS", 2)
+    with pytest.raises(svc.ValidationError):
+        svc.update_conversation_statuses([1, 2, 3], "OPEN", roles=["support_admin"])
+
+
+def test_unexpected_failure_rolls_back(seeded_client, monkeypatch):
+    from app.graphql.mutations import conversation_mutations
+
+    conv_id = _ids(1)[0]
+    before = ConversationPost.query.filter_by(conversation_id=conv_id).count()
+
+    def broken_add_posts(items, current_user=None):
+        db.session.add(ConversationPost(conversation_id=conv_id, content="half-written"))
+        db.session.flush()
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(conversation_mutations, "svc_add_posts", broken_add_posts)
+    payload = seeded_client.post("/graphql", json={"query": ADD_POSTS, "variables": {"inputs": [
+        {"conversationId": conv_id, "content": "one"},
+    ]}}).get_json()
+    assert "Failed to add replies" in str(payload["errors"])
+    assert "database went away" not in str(payload["errors"])
+    assert ConversationPost.query.filter_by(conversation_id=conv_id).count() == before
+
+
+def test_single_status_change_shares_the_bulk_rules(seeded_client, issue_token):
+    single = "mutation($id: Int!, $status: String!) { updateConversationStatus(conversationId: $id, status: $status) { ok } }"
+    conv_id = _ids(1)[0]
+    assert _run(seeded_client, single, {"id": conv_id, "status": "CLOSED"}, _admin(issue_token)) == {"ok": True}
+    assert db.session.get(SupportConversation, conv_id).status == "CLOSED"
+    assert _run(seeded_client, single, {"id": 999999, "status": "OPEN"}, _admin(issue_token)) == {"ok": False}
+
+    bad = seeded_client.post("/graphql", json={"query": single, "variables": {"id": conv_id, "status": "DONE"}},
+                             headers=_admin(issue_token)).get_json()
+    assert "Status must be one of" in str(bad["errors"])
+    assert db.session.get(SupportConversation, conv_id).status == "CLOSED"
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models.support import SupportConversation
+
+
+@pytest.fixture
+def client():
+    """25 conversations; pairs share a created_at to exercise the id tiebreak."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        db.create_all()
+        base = datetime(2025, 1, 1, 12, 0, 0)
+        for i in range(25):
+            db.session.add(SupportConversation(
+                identifier=f"CONV_{i:03d}",
+                topic=f"Topic {i}",
+                category="Help" if i % 2 else "Billing",
+                status="OPEN",
+                created_at=base + timedelta(minutes=i // 2),
+            ))
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+CONNECTION = """
+query Conn($first: Int, $after: String, $last: Int, $before: String, $category: String) {
+  conversationsConnection(first: $first, after: $after, last: $last, before: $before, category: $category) {
+    edges { cursor node { identifier } }
+    pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+  }
+}
+"""
+
+
+def _connection(client, **variables):
+    resp = client.post(
+        "/graphql",
+        data=json.dumps({"query": CONNECTION, "variables": variables}),
+        content_type="application/json",
+    )
+    return resp.get_json()
+
+
+def _ids(conn):
+    return [e["node"]["identifier"] for e in conn["edges"]]
+
+
+def test_forward_pagination_visits_every_row_once_newest_first(client):
+    seen, after = [], None
+    while True:
+        conn = _connection(client, first=10, after=after)["data"]["conversationsConnection"]
+        seen.extend(_ids(conn))
+        if not conn["pageInfo"]["hasNextPage"]:
+            break
+        after = conn["pageInfo"]["endCursor"]
+
+    expected = [f"CONV_{i:03d}" for i in reversed(range(25))]
+    assert seen == expected
+
+
+def test_backward_pagination_from_before_cursor(client):
+    first_page = _connection(client, first=10)["data"]["conversationsConnection"]
+    second_page = _connection(client, first=10, after=first_page["pageInfo"]["endCursor"])["data"][
+        "conversationsConnection"
+    ]
+    back = _connection(client, last=4, before=second_page["pageInfo"]["startCursor"])["data"][
+        "conversationsConnection"
+    ]
+
+    assert _ids(back) == _ids(first_page)[-4:]
+    assert back["pageInfo"]["hasPreviousPage"] is True
+    assert back["pageInfo"]["hasNextPage"] is True
+
+
+def test_filters_apply_to_connection(client):
+    conn = _connection(client, first=50, category="Billing")["data"]["conversationsConnection"]
+    assert len(conn["edges"]) == 13
+    assert conn["pageInfo"]["hasNextPage"] is False
+
+
+def test_invalid_cursor_is_rejected(client):
+    payload = _connection(client, first=5, after="not-a-cursor")
+    assert payload["errors"] == ["Invalid cursor"]
@@ -0,0 +1,96 @@
+import json
+
+from sqlalchemy import event
+
+from app.counts import CountCache, normalize_filters, count_cache
+from app.extensions import db
+
+
+def _run(client, query, variables=None):
+    statements = []
+
+    def _before(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        resp = client.post(
+            "/graphql",
+            data=json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return statements, payload["data"]
+
+
+def _counts(statements):
+    return [s for s in statements if "count(*)" in s.lower()]
+
+
+def test_total_is_skipped_unless_selected(seeded_client):
+    statements, data = _run(seeded_client, "{ conversationsPaged(pageSize: 5) { hasNextPage items { id } } }")
+    assert _counts(statements) == []
+    assert data["conversationsPaged"]["hasNextPage"] is True
+
+    statements, data = _run(seeded_client, "{ conversationsPaged(pageSize: 50) { total hasNextPage } }")
+    assert len(_counts(statements)) == 1
+    assert data["conversationsPaged"] == {"total": 24, "hasNextPage": False}
+
+
+def test_total_is_cached_per_filter_and_invalidated_by_mutations(seeded_client):
+    query = '{ conversationsPaged(status: "OPEN", search: $search) { total } }'
+    query = "query($search: String) " + query
+    _run(seeded_client, query, {"search": "Topic"})
+    statements, data = _run(seeded_client, query, {"search": "TOPIC"})
+    assert _counts(statements) == []
+    assert data["conversationsPaged"]["total"] == 24
+
+    mutation = """
+    mutation { createConversation(challengePublicId: "CH_0", topic: "Topic new") { ok } }
+    """
+    _run(seeded_client, mutation)
+    statements, data = _run(seeded_client, query, {"search": "Topic"})
+    assert len(_counts(statements)) == 1
+    assert data["conversationsPaged"]["total"] == 25
+
+
+
+def test_total_is_invalidated_by_replies(seeded_client):
+    query = 'query($search: String) { conversationsPaged(search: $search) { total } }'
+    _, data = _run(seeded_client, query, {"search": "zebracorn"})
+    assert data["conversationsPaged"]["total"] == 0
+
+    _run(seeded_client, 'mutation { addPost(conversationId: 1, content: "a zebracorn appeared") { ok } }')
+    _, data = _run(seeded_client, query, {"search": "zebracorn"})
+    assert data["conversationsPaged"]["total"] == 1
+
+    _run(seeded_client, 'mutation { addPosts(inputs: [{conversationId: 2, content: "zebracorn again"}]) { ok } }')
+    _, data = _run(seeded_client, query, {"search": "zebracorn"})
+    assert data["conversationsPaged"]["total"] == 2
+
+def test_total_estimate_falls_back_to_exact_count_off_postgres(seeded_client):
+    _statements, data = _run(seeded_client, '{ challengesPaged(tag: "qml") { totalEstimate } }')
+    assert data["challengesPaged"]["totalEstimate"] == 4
+
+
+def test_count_cache_ttl_and_normalized_keys():
+    now = [0.0]
+    cache = CountCache(ttl=5, clock=lambda: now[0])
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 7
+
+    key = normalize_filters(status="OPEN", search="Foo", category="")
+    assert key == normalize_filters(search="foo", status="OPEN", category=None)
+    assert key != normalize_filters(search="foo", status="open", category=None)
+    assert cache.get_or_compute("conversations", key, compute) == 7
+    assert cache.get_or_compute("conversations", key, compute) == 7
+    now[0] += 6
+    cache.get_or_compute("conversations", key, compute)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
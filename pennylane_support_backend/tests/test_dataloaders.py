@@ -0,0 +1,72 @@
+import json
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def _count_selects(client, query, variables=None):
+    statements = []
+
+    def _before(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        resp = client.post(
+            "/graphql",
+            data=json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return len(statements), payload["data"]
+
+
+CONVERSATIONS_PAGED = """
+query Paged($pageSize: Int) {
+  conversationsPaged(page: 1, pageSize: $pageSize) {
+    items {
+      id
+      posts { content }
+      assignedSupport { name }
+      challenge { publicId }
+    }
+  }
+}
+"""
+
+
+def test_conversations_paged_query_count_is_independent_of_page_size(seeded_client):
+    small, small_data = _count_selects(seeded_client, CONVERSATIONS_PAGED, {"pageSize": 2})
+    large, large_data = _count_selects(seeded_client, CONVERSATIONS_PAGED, {"pageSize": 24})
+
+    assert len(small_data["conversationsPaged"]["items"]) == 2
+    items = large_data["conversationsPaged"]["items"]
+    assert len(items) == 24
+    assert all(len(i["posts"]) == 3 and i["assignedSupport"]["name"] for i in items)
+    # page (assignee/challenge joined) + posts
+    assert small == large == 2
+
+
+def test_challenge_children_are_batched(seeded_client):
+    query = """
+    {
+      challenges {
+        publicId
+        assignedSupport { name }
+        hints { text }
+        learningObjectives { text }
+        tags { name }
+        conversations { identifier }
+      }
+    }
+    """
+    count, data = _count_selects(seeded_client, query)
+    assert len(data["challenges"]) == 4
+    assert all(len(c["conversations"]) == 6 and len(c["tags"]) == 2 for c in data["challenges"])
+    # challenges (assignee joined) + hints + objectives + tags + conversations
+    assert count == 5
@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.db_pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolRegistry,
+    async_engine_options,
+    engine_options,
+)
+
+PG = "postgresql://u:p@db:5432/pennylane"
+
+
+def test_sqlite_keeps_flask_sqlalchemy_defaults():
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}) == {}
+
+
+def test_profile_defaults_and_overrides():
+    web = engine_options({"SQLALCHEMY_DATABASE_URI": PG})
+    assert web["poolclass"] is InstrumentedQueuePool
+    assert (web["pool_size"], web["max_overflow"], web["pool_pre_ping"]) == (5, 10, True)
+
+    worker = engine_options({"SQLALCHEMY_DATABASE_URI": PG, "DB_POOL_PROFILE": "worker", "DB_POOL_SIZE": 3})
+    assert (worker["pool_size"], worker["pool_timeout"]) == (3, 60)
+
+    with pytest.raises(ValueError):
+        engine_options({"SQLALCHEMY_DATABASE_URI": PG, "DB_POOL_PROFILE": "huge"})
+
+
+def test_pool_size_zero_disables_app_side_pooling():
+    options = engine_options({"SQLALCHEMY_DATABASE_URI": PG, "DB_POOL_SIZE": 0})
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+
+
+def test_statement_timeout_per_connection_unless_pgbouncer():
+    direct = engine_options({"SQLALCHEMY_DATABASE_URI": PG, "DB_STATEMENT_TIMEOUT_MS": 5000})
+    assert direct["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    # PgBouncer rejects startup options; the timeout is set per transaction instead
+    bouncer = engine_options({"SQLALCHEMY_DATABASE_URI": PG, "DB_STATEMENT_TIMEOUT_MS": 5000, "DB_PGBOUNCER": True})
+    assert "connect_args" not in bouncer
+
+
+def test_async_pgbouncer_mode_disables_prepared_statements():
+    url, options = async_engine_options({
+        "SQLALCHEMY_DATABASE_URI": "postgresql+asyncpg://u:p@db/pennylane", "DB_PGBOUNCER": True,
+    })
+    assert url.query["prepared_statement_cache_size"] == "0"
+    assert options["connect_args"] == {"statement_cache_size": 0}
+    assert options["poolclass"] is InstrumentedAsyncQueuePool
+
+    url, options = async_engine_options({
+        "SQLALCHEMY_DATABASE_URI": "postgresql+asyncpg://u:p@db/pennylane", "DB_STATEMENT_TIMEOUT_MS": 250,
+    })
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "250"}}
+
+
+def test_pool_instrumentation_counts_overflow_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.2,
+    )
+    registry = PoolRegistry()
+    registry.register("test", engine)
+
+    first = engine.connect()
+    second = engine.connect()          # beyond pool_size: an overflow connection
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()               # pool and overflow exhausted
+
+    threading.Timer(0.05, second.close).start()
+    third = engine.connect()           # waits for `second` to come back
+    third.close()
+    first.close()
+
+    stats = registry.snapshot()["test"]
+    assert stats["pool"] == "InstrumentedQueuePool"
+    assert stats["checkouts"] == 3
+    assert stats["overflow_checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 2
+    assert stats["wait_ms_max"] >= 40
+    assert stats["connects"] == 2
+    assert sum(stats["checkout_ms_buckets"].values()) == 3
+    assert stats["checked_out"] == 0
+
+    # engine.dispose() recreates the pool; counters carry over
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert registry.snapshot()["test"]["checkouts"] == 4
+
+
+def test_metrics_endpoint_reports_pools_and_caches():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    body = app.test_client().get("/api/metrics").get_json()
+    assert "default" in body["pools"]
+    assert set(body["caches"]) == {"counts", "responses", "documents", "identities"}
+
+
+def test_metrics_token():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "METRICS_TOKEN": "s3cret"})
+    client = app.test_client()
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_metrics_denied_without_token_outside_testing():
+    app = create_app({"TESTING": False, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    client = app.test_client()
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics/prometheus").status_code == 401
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from app.graphql import documents
+from app.graphql.documents import DocumentCache, PersistedQueryError, document_cache, query_hash, read_allowlist
+from app.graphql.schema import schema
+
+TAGS = "{ tags { name } }"
+
+
+def _post(client, body):
+    resp = client.post("/graphql", data=json.dumps(body), content_type="application/json")
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def _persisted(sha):
+    return {"persistedQuery": {"version": 1, "sha256Hash": sha}}
+
+
+def test_documents_are_parsed_and_validated_once(monkeypatch):
+    calls = {"parse": 0, "validate": 0}
+    real_parse, real_validate = documents.parse, documents.validate
+
+    def _parse(*args, **kwargs):
+        calls["parse"] += 1
+        return real_parse(*args, **kwargs)
+
+    def _validate(*args, **kwargs):
+        calls["validate"] += 1
+        return real_validate(*args, **kwargs)
+
+    monkeypatch.setattr(documents, "parse", _parse)
+    monkeypatch.setattr(documents, "validate", _validate)
+    cache = DocumentCache(max_size=8)
+
+    first = cache.document_from_string(schema, TAGS)
+    assert cache.document_from_string(schema, TAGS) is first
+    assert calls == {"parse": 1, "validate": 1}
+
+    # invalid documents keep their errors without revalidating
+    bad = cache.document_from_string(schema, "{ tags { nope } }")
+    for _ in range(2):
+        result = cache.document_from_string(schema, "{ tags { nope } }").execute()
+        assert result.invalid and "nope" in str(result.errors[0])
+    assert cache.document_from_string(schema, "{ tags { nope } }") is bad
+    assert calls == {"parse": 2, "validate": 2}
+    assert cache.stats()["hits"] == 4
+
+
+def test_lru_evicts_least_recently_used_and_its_hash():
+    cache = DocumentCache(max_size=2)
+    for q in ("{ tags { id } }", "{ tags { name } }"):
+        cache.document_from_string(schema, q)
+    cache.document_from_string(schema, "{ tags { id } }")  # touch
+    cache.document_from_string(schema, "{ challenges { id } }")
+
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+    assert cache.resolve(None, _persisted(query_hash("{ tags { id } }"))) == "{ tags { id } }"
+    with pytest.raises(PersistedQueryError) as exc:
+        cache.resolve(None, _persisted(query_hash("{ tags { name } }")))
+    assert exc.value.code == "PERSISTED_QUERY_NOT_FOUND"
+
+
+def test_automatic_persisted_query_round_trip(seeded_client):
+    sha = query_hash(TAGS)
+
+    miss = _post(seeded_client, {"extensions": _persisted(sha)})
+    assert miss["errors"] == [{"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]
+
+    registered = _post(seeded_client, {"query": TAGS, "extensions": _persisted(sha)})
+    assert sorted(t["name"] for t in registered["data"]["tags"]) == ["gates", "qml"]
+
+    hashed = _post(seeded_client, {"extensions": _persisted(sha)})
+    assert hashed["data"] == registered["data"]
+    assert document_cache.stats()["apq_hits"] == 1
+
+
+def test_hash_must_match_query(seeded_client):
+    payload = _post(seeded_client, {"query": TAGS, "extensions": _persisted("0" * 64)})
+    assert payload["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_HASH_MISMATCH"
+    assert "data" not in payload
+
+
+def test_allowlist_rejects_unknown_documents(seeded_client, monkeypatch, tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"operations": [{"id": query_hash(TAGS), "name": "Tags", "type": "query", "body": TAGS}]}))
+    monkeypatch.setattr(document_cache, "_allowed", None)
+    document_cache.load_allowlist(read_allowlist(str(manifest)))
+
+    # listed documents work by hash without ever being sent in full
+    assert "data" in _post(seeded_client, {"extensions": _persisted(query_hash(TAGS))})
+    assert "data" in _post(seeded_client, {"query": TAGS})
+
+    for body in (
+        {"query": "{ challenges { id } }"},
+        {"extensions": _persisted(query_hash("{ challenges { id } }"))},
+        {"query": "{ challenges { id } }", "extensions": _persisted(query_hash("{ challenges { id } }"))},
+    ):
+        payload = _post(seeded_client, body)
+        assert payload["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_ALLOWED"
+    assert document_cache.stats()["rejected"] == 3
+
+
+def test_allowlist_hash_mapping_is_checked(tmp_path):
+    path = tmp_path / "allow.json"
+    path.write_text(json.dumps({query_hash(TAGS): TAGS}))
+    assert read_allowlist(str(path)) == [TAGS]
+
+    path.write_text(json.dumps({"deadbeef": TAGS}))
+    with pytest.raises(ValueError):
+        read_allowlist(str(path))
@@ -0,0 +1,93 @@
+import json
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def _capture(client, query, variables=None):
+    """Run a GraphQL query and return (SELECT statements, data)."""
+    statements = []
+
+    def _before(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        resp = client.post(
+            "/graphql",
+            data=json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return statements, payload["data"]
+
+
+def test_paged_conversations_load_posts_and_assignees_up_front(seeded_client):
+    query = """
+    {
+      conversationsPaged(page: 1, pageSize: 12) {
+        items { posts { content } assignedSupport { name } }
+      }
+    }
+    """
+    statements, data = _capture(seeded_client, query)
+    items = data["conversationsPaged"]["items"]
+    assert len(items) == 12
+    assert all(len(i["posts"]) == 3 and i["assignedSupport"]["name"].startswith("agent") for i in items)
+    # page with assignee joined, posts via selectin
+    assert len(statements) == 2
+    assert "JOIN users" in statements[0]
+
+
+def test_unrequested_columns_are_not_loaded(seeded_client):
+    query = """
+    {
+      conversationsPaged(page: 1, pageSize: 5) {
+        items { identifier posts { content } }
+      }
+    }
+    """
+    statements, _data = _capture(seeded_client, query)
+    page_sql, posts_sql = statements
+    assert "support_conversations.identifier" in page_sql
+    assert "support_conversations.topic" not in page_sql
+    assert "conversation_posts.content" in posts_sql
+    assert "conversation_posts.author_display_name" not in posts_sql
+
+
+def test_fragments_and_nested_relationships_on_challenge(seeded_client):
+    query = """
+    query One($id: String!) {
+      challenge(publicId: $id) { ...Detail }
+    }
+    fragment Detail on ChallengeType {
+      title
+      hints { text }
+      conversations { topic posts { content } assignedSupport { name } }
+    }
+    """
+    statements, data = _capture(seeded_client, query, {"id": "CH_1"})
+    challenge = data["challenge"]
+    assert challenge["title"] == "Challenge 1"
+    assert len(challenge["conversations"]) == 6
+    assert all(len(c["posts"]) == 3 for c in challenge["conversations"])
+    # challenge, hints, conversations (+ assignee join), posts
+    assert len(statements) == 4
+
+
+def test_conversations_by_challenge_and_challenges_use_eager_loading(seeded_client):
+    by_challenge, data = _capture(
+        seeded_client,
+        '{ conversationsByChallenge(challengePublicId: "CH_2") { topic posts { content } } }',
+    )
+    assert len(data["conversationsByChallenge"]) == 6
+    assert len(by_challenge) == 2
+
+    challenges, data = _capture(seeded_client, "{ challenges { title tags { name } } }")
+    assert all(len(c["tags"]) == 2 for c in data["challenges"])
+    assert len(challenges) == 2
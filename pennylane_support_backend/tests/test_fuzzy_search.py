@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from sqlalchemy import event, text
+
+from app.extensions import db
+from app.models.challenge import Challenge, Tag
+from app.services.search_service import fuzzy_challenges, similarity, trigrams, word_similarity
+
+
+def _search(client, term, **extra):
+    args = ", ".join([f"term: {json.dumps(term)}"] + [f"{k}: {json.dumps(v)}" for k, v in extra.items()])
+    resp = client.post(
+        "/graphql",
+        data=json.dumps({"query": f"{{ searchChallenges({args}) {{ score challenge {{ publicId }} }} }}"}),
+        content_type="application/json",
+    )
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return [(h["challenge"]["publicId"], h["score"]) for h in payload["data"]["searchChallenges"]]
+
+
+@pytest.fixture
+def fuzzy_client(seeded_client):
+    Challenge.query.filter_by(public_id="CH_1").one().title = "Variational Classifier"
+    Challenge.query.filter_by(public_id="CH_2").one().title = "Grover Search on Three Qubits"
+    db.session.commit()
+    return seeded_client
+
+
+def test_trigrams_match_pg_trgm():
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert similarity("word", "word") == 1.0
+    assert similarity("", "word") == 0.0
+    assert word_similarity("grover", "Grover Search on Three Qubits") == 1.0
+
+
+def test_typo_in_title_finds_challenge(fuzzy_client):
+    hits = _search(fuzzy_client, "Variatonal Clasifier")
+    assert hits[0][0] == "CH_1"
+    assert 0 < hits[0][1] < 1
+
+
+def test_partial_title_word_and_public_id(fuzzy_client):
+    assert _search(fuzzy_client, "grovr")[0][0] == "CH_2"
+    assert _search(fuzzy_client, "CH_3", limit=1) == [("CH_3", 1.0)]
+
+
+def test_tag_names_match_every_tagged_challenge(fuzzy_client):
+    ids = [pid for pid, _ in _search(fuzzy_client, "gatse")]
+    assert sorted(ids) == ["CH_0", "CH_1", "CH_2", "CH_3"]
+
+
+def test_threshold_filters_weak_matches(fuzzy_client):
+    assert _search(fuzzy_client, "zzzz") == []
+    assert _search(fuzzy_client, "Variatonal", threshold=0.95) == []
+
+
+@pytest.mark.postgres
+def test_fuzzy_candidates_come_from_the_trigram_indexes(pg_app):
+    gates = Tag(name="gates")
+    db.session.add_all([
+        Challenge(public_id=f"CH_{i}", title=f"Grover Search {i}", category="algorithms", tags=[gates])
+        for i in range(20)
+    ])
+    db.session.commit()
+
+    statements = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        if "word_similarity" in statement:
+            statements.append((statement, params))
+
+    event.listen(db.engine, "before_cursor_execute", _capture)
+    try:
+        hits = fuzzy_challenges("grovr")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _capture)
+    assert hits
+
+    # Tiny tables favour sequential scans; with them off, the plan shows
+    # whether each lookup can use its index at all.
+    db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    (statement, params), = statements
+    plan = "\n".join(row[0] for row in db.session.connection().exec_driver_sql("EXPLAIN " + statement, params))
+    for index in ("ix_challenges_title_trgm", "ix_challenges_public_id_trgm", "ix_tags_name_trgm"):
+        assert index in plan, plan
@@ -1,4 +1,12 @@
 import json
+import logging
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.telemetry import query_budget
+
 
 def _post_graphql(client, query, variables=None, operation_name=None):
     return client.post(
@@ -7,6 +15,7 @@ def _post_graphql(client, query, variables=None, operation_name=None):
         content_type="application/json",
     )
 
+@pytest.mark.max_queries(2)
 def test_empty_challenges_paged(client):
     # Use camelCase for GraphQL argument names (Graphene auto-camelcases).
     query = """
@@ -24,6 +33,7 @@ def test_empty_challenges_paged(client):
     assert payload["data"]["challengesPaged"]["total"] == 0
     assert payload["data"]["challengesPaged"]["items"] == []
 
+@pytest.mark.max_queries(3)
 def test_sync_user_mutation(client):
     # Mutations and fields are camelCase in the GraphQL API.
     mutation = """
@@ -40,3 +50,48 @@ def test_sync_user_mutation(client):
     assert "data" in body and "errors" not in body
     data = body["data"]["syncUser"]
     assert data["ok"] is True
+
+
+# count + page + one batched query per relationship, independent of page size
+@pytest.mark.max_queries(4)
+@pytest.mark.parametrize("page_size", [2, 12])
+def test_conversation_queue_has_a_constant_query_count(seeded_client, page_size):
+    query = """
+    query Queue($n: Int) {
+      conversationsPaged(pageSize: $n) {
+        total
+        items { topic posts { content } challenge { title tags { name } } assignedSupport { name } }
+      }
+    }
+    """
+    body = _post_graphql(seeded_client, query, {"n": page_size}).get_json()
+    assert "errors" not in body, body
+    assert len(body["data"]["conversationsPaged"]["items"]) == page_size
+
+
+def test_budget_reports_the_offending_statements(client, sql_queries):
+    query = "query Two { challengesPaged(pageSize: 5) { total items { title } } }"
+    with query_budget(1) as budget:
+        _post_graphql(client, query)
+    assert len(sql_queries.selects()) == 2
+    assert len(budget.violations) == 1
+    assert "Two ran 2 SQL statements (budget 1)" in budget.violations[0]
+    assert "SELECT count(*)" in budget.violations[0]
+
+
+def test_repeated_statement_shapes_are_logged_in_debug(caplog):
+    app = create_app({
+        "TESTING": True, "DEBUG": True, "N_PLUS_ONE_WARN_THRESHOLD": 2,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
+    with app.app_context():
+        db.create_all()
+        query = "query Lookups { " + " ".join(
+            f'c{i}: challenge(publicId: "CH_{i}") {{ title }}' for i in range(3)
+        ) + " }"
+        with caplog.at_level(logging.WARNING, logger="app.telemetry"):
+            _post_graphql(app.test_client(), query)
+        db.session.remove()
+    warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert warnings[0].startswith("Possible N+1 in Lookups: 3 x SELECT")
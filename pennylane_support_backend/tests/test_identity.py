@@ -0,0 +1,108 @@
+import pytest
+from flask import g
+
+from app import auth
+from app.extensions import db
+from app.identity import IdentityCache, identity_cache
+from app.models.user import User
+
+ASSIGN = "mutation($id: Int!) { assignConversation(conversationId: $id) { ok } }"
+
+
+def _user_lookups(sql_queries):
+    return [s for s in sql_queries.statements if "WHERE users.auth0_id" in s]
+
+
+def test_cache_expires_and_evicts():
+    now = [0.0]
+    cache = IdentityCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, 2, 3)
+    now[0] = 11
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_requires_auth_resolves_and_upserts_once(app, issue_token, sql_queries):
+    @auth.requires_auth
+    def whoami():
+        return g.user_id
+
+    token = issue_token(sub="auth0|new-agent", email="agent@pennylane.ai", name="New Agent")
+    ids = []
+    for _ in range(3):
+        with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            ids.append(whoami())
+
+    user = db.session.get(User, ids[0])
+    assert ids == [user.id] * 3
+    assert (user.auth0_id, user.email, user.name) == ("auth0|new-agent", "agent@pennylane.ai", "New Agent")
+    assert len(_user_lookups(sql_queries)) == 1
+
+
+
+def test_forbidden_caller_is_not_upserted(app, issue_token):
+    @auth.requires_auth(required_role="support_admin")
+    def admin_only():
+        return g.user_id
+
+    token = issue_token(sub="auth0|outsider", roles=["viewer"])
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        with pytest.raises(auth.AuthError) as err:
+            admin_only()
+    assert err.value.status_code == 403
+    assert User.query.filter_by(auth0_id="auth0|outsider").count() == 0
+
+def test_services_use_the_resolved_identity(seeded_client, issue_token, sql_queries):
+    headers = {"Authorization": "Bearer " + issue_token(sub="auth0|1", roles=["support_admin"])}
+    for conv_id in (1, 2, 3):
+        payload = seeded_client.post("/graphql", json={"query": ASSIGN, "variables": {"id": conv_id}},
+                                     headers=headers).get_json()
+        assert payload["data"]["assignConversation"]["ok"] is True
+    assert len(_user_lookups(sql_queries)) == 1
+    agent = User.query.filter_by(auth0_id="auth0|1").one()
+    assert identity_cache.get("auth0|1") == agent.id
+
+
+def test_sync_user_drops_stale_mappings(seeded_client):
+    identity_cache.put("auth0|0", 1)
+    seeded_client.post("/graphql", json={"query": """
+      mutation { syncUser(email: "agent0@example.com", username: "agent0", auth0Id: "auth0|moved") { ok } }
+    """})
+    assert identity_cache.get("auth0|0") is None
+
+
+def test_new_subject_gets_a_free_username_and_email(app, issue_token):
+    @auth.requires_auth
+    def whoami():
+        return g.user_id
+
+    db.session.add(User(username="ada", email="ada@pennylane.ai", auth0_id="auth0|ada", roles=[]))
+    db.session.commit()
+    ids = []
+    for sub in ("auth0|other-ada", "auth0|third-ada"):
+        token = issue_token(sub=sub, nickname="ada", email="ada@pennylane.ai")
+        with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            ids.append(whoami())
+
+    users = [db.session.get(User, user_id) for user_id in ids]
+    assert [(u.auth0_id, u.username) for u in users] == [("auth0|other-ada", "ada-2"), ("auth0|third-ada", "ada-3")]
+    assert [u.email for u in users] == ["auth0_other-ada@example.com", "auth0_third-ada@example.com"]
+
+
+def test_upsert_leaves_the_request_session_alone(app, issue_token):
+    @auth.requires_auth
+    def whoami():
+        return g.user_id
+
+    pending = User(username="pending", email="pending@example.com", auth0_id="auth0|pending", roles=[])
+    db.session.add(pending)
+    token = issue_token(sub="auth0|new-agent")
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        whoami()
+    assert pending in db.session.new
+    db.session.rollback()
+    assert User.query.filter_by(auth0_id="auth0|new-agent").count() == 1
+    assert User.query.filter_by(auth0_id="auth0|pending").count() == 0
@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models.challenge import Challenge, ChallengeHint, ChallengeTag, LearningObjective
+from app.models.support import ConversationPost, SupportConversation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHALLENGES = os.path.join(ROOT, "pennylane_coding_challenges.json")
+CONVERSATIONS = os.path.join(ROOT, "pennylane_support_conversations.json")
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _seed(app, challenges=CHALLENGES, conversations=CONVERSATIONS, *extra):
+    result = app.test_cli_runner().invoke(args=["seed-json", str(challenges), str(conversations), *extra])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def _counts():
+    return {
+        model.__tablename__: model.query.count()
+        for model in (Challenge, ChallengeHint, LearningObjective, ChallengeTag, SupportConversation, ConversationPost)
+    }
+
+
+def test_reseeding_unchanged_export_is_a_no_op(app):
+    _seed(app)
+    before = _counts()
+    output = _seed(app)
+    assert _counts() == before
+    assert "Challenges: 0 upserted, 30 unchanged" in output
+    assert "Conversations: 0 upserted, 60 unchanged" in output
+
+
+def test_only_changed_items_have_children_replaced(app, tmp_path):
+    _seed(app)
+    before = _counts()
+
+    challenges = json.load(open(CHALLENGES, encoding="utf-8"))
+    challenges["coding_challenges"][0]["hints"] = ["a single new hint"]
+    conversations = json.load(open(CONVERSATIONS, encoding="utf-8"))
+    changed = conversations["support_conversations"][0]
+    dropped = len(changed["posts"]) - 1
+    changed["posts"] = changed["posts"][:1]
+    json.dump(challenges, open(tmp_path / "c.json", "w", encoding="utf-8"))
+    json.dump(conversations, open(tmp_path / "s.json", "w", encoding="utf-8"))
+
+    output = _seed(app, tmp_path / "c.json", tmp_path / "s.json")
+    assert "Challenges: 1 upserted, 29 unchanged" in output
+    assert "Conversations: 1 upserted, 59 unchanged" in output
+
+    after = _counts()
+    assert after["challenge_hints"] == before["challenge_hints"] - 2
+    assert after["learning_objectives"] == before["learning_objectives"]
+    assert after["challenge_tags"] == before["challenge_tags"]
+    assert after["conversation_posts"] == before["conversation_posts"] - dropped
+    first = Challenge.query.filter_by(public_id=challenges["coding_challenges"][0]["challenge_id"]).one()
+    assert [h.text for h in first.hints] == ["a single new hint"]
+
+
+def test_force_reimports_without_duplicating_children(app):
+    _seed(app)
+    before = _counts()
+    output = _seed(app, CHALLENGES, CONVERSATIONS, "--force")
+    assert "Challenges: 30 upserted, 0 unchanged" in output
+    assert _counts() == before
+
+
+def test_rows_seeded_before_hashing_only_get_their_hash(app):
+    _seed(app)
+    before = _counts()
+    post_ids = sorted(p.id for p in ConversationPost.query)
+    hint_ids = sorted(h.id for h in ChallengeHint.query)
+    # rows written before content hashes existed
+    db.session.query(Challenge).update({"content_hash": None})
+    db.session.query(SupportConversation).update({"content_hash": None})
+    db.session.commit()
+
+    _seed(app)
+    assert _counts() == before
+    assert sorted(p.id for p in ConversationPost.query) == post_ids
+    assert sorted(h.id for h in ChallengeHint.query) == hint_ids
+    assert Challenge.query.filter(Challenge.content_hash.is_(None)).count() == 0
+    assert SupportConversation.query.filter(SupportConversation.content_hash.is_(None)).count() == 0
+
+
+def test_reimport_keeps_replies_written_in_the_app(app):
+    _seed(app)
+    conv = SupportConversation.query.order_by(SupportConversation.id).first()
+    db.session.add(ConversationPost(conversation_id=conv.id, content="in-app reply", author_display_name="Agent"))
+    db.session.commit()
+    before = _counts()
+
+    _seed(app, CHALLENGES, CONVERSATIONS, "--force")
+    assert _counts() == before
+    assert ConversationPost.query.filter_by(conversation_id=conv.id, content="in-app reply").count() == 1
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from app import auth
+from app.jwks import JWKSCache, parse_max_age
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubFetcher:
+    """Counts fetches and serves whatever key set the test installs."""
+
+    def __init__(self, kids, max_age=None, delay=0.0):
+        self.kids = list(kids)
+        self.max_age = max_age
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, url):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return {"keys": [{"kid": k, "kty": "RSA"} for k in self.kids]}, self.max_age
+
+
+def test_parse_max_age():
+    assert parse_max_age("public, max-age=3600, must-revalidate") == 3600
+    assert parse_max_age("no-store") == 0
+    assert parse_max_age(None) is None
+    assert parse_max_age("public") is None
+
+
+def test_keys_are_cached_until_max_age_expires():
+    clock = FakeClock()
+    fetcher = StubFetcher(["k1"], max_age=300)
+    cache = JWKSCache("https://idp/jwks.json", fetcher, refresh_ahead=0, clock=clock)
+
+    for _ in range(5):
+        assert cache.get_key("k1")["kid"] == "k1"
+    assert fetcher.calls == 1
+
+    clock.now += 301
+    assert cache.get_key("k1") is not None
+    assert fetcher.calls == 2
+
+    stats = cache.stats()
+    assert stats["hits"] == 4
+    assert stats["misses"] == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    fetcher = StubFetcher(["k1"], delay=0.2)
+    cache = JWKSCache("https://idp/jwks.json", fetcher)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_key("k1"))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fetcher.calls == 1
+    assert len(results) == 10 and all(r["kid"] == "k1" for r in results)
+
+
+def test_unknown_kid_refetch_is_rate_limited():
+    clock = FakeClock()
+    fetcher = StubFetcher(["k1"])
+    cache = JWKSCache("https://idp/jwks.json", fetcher, min_refetch_interval=30, clock=clock)
+    cache.get_key("k1")
+
+    # Forged kids inside the interval never reach the provider
+    for _ in range(20):
+        assert cache.get_key("forged") is None
+    assert fetcher.calls == 1
+    assert cache.stats()["rate_limited"] == 20
+
+    # After the interval a rotated key is picked up by a single refetch
+    clock.now += 31
+    fetcher.kids = ["k1", "k2"]
+    generation = cache.generation
+    assert cache.get_key("k2")["kid"] == "k2"
+    assert fetcher.calls == 2
+    assert cache.generation == generation + 1
+
+
+def test_background_refresh_before_expiry():
+    clock = FakeClock()
+    fetcher = StubFetcher(["k1"], max_age=600)
+    cache = JWKSCache("https://idp/jwks.json", fetcher, refresh_ahead=60, clock=clock)
+    cache.get_key("k1")
+
+    clock.now += 570  # inside the refresh-ahead window, not yet expired
+    assert cache.get_key("k1") is not None
+    deadline = time.time() + 2
+    while fetcher.calls < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fetcher.calls == 2
+    assert cache.stats()["background_refreshes"] == 1
+
+
+def test_stale_keys_served_when_provider_fails():
+    clock = FakeClock()
+    fetcher = StubFetcher(["k1"], max_age=60)
+    cache = JWKSCache("https://idp/jwks.json", fetcher, refresh_ahead=0, clock=clock)
+    cache.get_key("k1")
+
+    def _boom(url):
+        raise OSError("provider down")
+
+    cache._fetcher = _boom
+    clock.now += 61
+    assert cache.get_key("k1")["kid"] == "k1"
+    assert cache.stats()["errors"] == 1
+
+
+@pytest.fixture
+def jwks_server():
+    body = json.dumps({"keys": [{"kid": "srv", "kty": "RSA"}]}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        hits = 0
+
+        def do_GET(self):
+            Handler.hits += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "public, max-age=4321")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json", Handler
+    server.shutdown()
+
+
+def test_download_jwks_honours_cache_control(jwks_server):
+    url, handler = jwks_server
+    clock = FakeClock()
+    cache = JWKSCache(url, auth._download_jwks, clock=clock)
+
+    assert cache.get_key("srv")["kid"] == "srv"
+    assert cache.get_key("srv")["kid"] == "srv"
+    assert handler.hits == 1
+    assert cache.stats()["expires_in"] == pytest.approx(4321)
+
+
+def test_slow_provider_times_out_and_stale_keys_serve(jwks_server, monkeypatch):
+    url, handler = jwks_server
+    clock = FakeClock()
+    cache = JWKSCache(url, auth._download_jwks, refresh_ahead=0, clock=clock)
+    cache.get_key("srv")
+
+    stall = threading.Event()
+    handler.do_GET = lambda self: stall.wait(5)
+    monkeypatch.setattr(auth, "FETCH_TIMEOUT", 0.2)
+    clock.now += 4322
+    started = time.time()
+    try:
+        assert cache.get_key("srv")["kid"] == "srv"
+    finally:
+        stall.set()
+    assert time.time() - started < 2
+    assert cache.stats()["errors"] == 1
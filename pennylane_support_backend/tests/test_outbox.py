@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, outbox
+from app.extensions import db
+from app.models.challenge import Challenge
+from app.models.outbox import OutboxEvent
+from app.services.conversation_service import add_post, create_conversation
+
+
+@pytest.fixture
+def outbox_app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Challenge(public_id="CH_0", title="Challenge", category="Quantum", points=1))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(autouse=True)
+def registered(monkeypatch):
+    """Fresh handler registry with a no-op for the conversation topics, so their events are written."""
+    monkeypatch.setattr(outbox, "_handlers", defaultdict(list))
+    outbox.handler("post_added", "conversation_updated", "queue_changed")(lambda ev: None)
+    return outbox._handlers
+
+
+def _dispatcher(handlers, **kwargs):
+    return outbox.Dispatcher(db.session, handlers=handlers, **kwargs)
+
+
+def test_only_topics_with_handlers_are_written(outbox_app, registered):
+    del registered["queue_changed"]
+    create_conversation("CH_0", "Outbox", first_post="hello")
+    assert [row.topic for row in OutboxEvent.query.order_by(OutboxEvent.id)] == ["post_added", "conversation_updated"]
+
+
+def test_events_are_written_in_the_same_transaction(outbox_app):
+    conv = create_conversation("CH_0", "Outbox", first_post="hello")
+    add_post(conv.id, "reply")
+    topics = [row.topic for row in OutboxEvent.query.order_by(OutboxEvent.id)]
+    assert topics == ["post_added", "conversation_updated", "queue_changed", "post_added", "conversation_updated"]
+
+    from app.events import conversation_changed, publish
+    publish(db.session, *conversation_changed(conv, "OPEN"))
+    db.session.rollback()
+    assert OutboxEvent.query.count() == 5
+
+
+def test_dispatcher_delivers_and_deletes(outbox_app):
+    create_conversation("CH_0", "Outbox", first_post="hello")
+    seen = []
+    dispatcher = _dispatcher({"post_added": [seen.append]}, batch_size=2)
+    assert dispatcher.run_once() == 2
+    assert dispatcher.run_once() == 1
+    assert dispatcher.run_once() == 0
+    assert [ev.kind for ev in seen] == ["post_added"]
+    assert OutboxEvent.query.count() == 0
+    assert dispatcher.stats["delivered"] == 3
+
+
+def test_failures_back_off_then_park(outbox_app):
+    create_conversation("CH_0", "Outbox")  # conversation_updated + queue_changed
+
+    def broken(ev):
+        raise RuntimeError("search index down")
+
+    dispatcher = _dispatcher({"queue_changed": [broken]}, max_attempts=2, backoff=30)
+    dispatcher.run_once()
+    row = OutboxEvent.query.one()
+    assert (row.topic, row.attempts, row.failed_at) == ("queue_changed", 1, None)
+    assert row.last_error == "RuntimeError: search index down"
+    assert row.available_at > datetime.utcnow() + timedelta(seconds=20)
+    assert dispatcher.run_once() == 0  # not due yet
+
+    OutboxEvent.query.update({"available_at": datetime.utcnow()})
+    db.session.commit()
+    dispatcher.run_once()
+    row = OutboxEvent.query.one()
+    assert row.attempts == 2 and row.failed_at is not None
+    assert dispatcher.run_once() == 0
+
+    assert outbox.replay_failed(db.session) == 1
+    assert _dispatcher({}).run_once() == 1
+    assert OutboxEvent.query.count() == 0
+
+
+def test_handlers_run_after_the_claim_is_committed(outbox_app):
+    create_conversation("CH_0", "Outbox", first_post="hello")
+    seen = []
+
+    def check(ev):
+        # no transaction (and so no row lock) is held while handlers run
+        seen.append(db.session().in_transaction())
+        row = OutboxEvent.query.filter_by(topic="post_added").one()
+        assert row.claimed_at is not None and row.available_at > datetime.utcnow() + timedelta(seconds=200)
+
+    assert _dispatcher({"post_added": [check]}, claim_timeout=300).run_once() == 3
+    assert seen == [False]
+    assert OutboxEvent.query.count() == 0
+
+
+def test_claims_of_a_dead_dispatcher_are_redelivered(outbox_app, monkeypatch):
+    create_conversation("CH_0", "Outbox")
+    crashed = _dispatcher({}, claim_timeout=60)
+    assert len(crashed._claim(db.session)) == 2  # claimed, then never delivered
+    assert _dispatcher({}).run_once() == 0
+
+    later = datetime.utcnow() + timedelta(seconds=61)
+    monkeypatch.setattr(outbox, "_utcnow", lambda: later)
+    assert _dispatcher({}).run_once() == 2
+    assert OutboxEvent.query.count() == 0
+
+
+def test_parked_events_are_pruned_after_retention(outbox_app):
+    create_conversation("CH_0", "Outbox")
+    now = datetime.utcnow()
+    rows = OutboxEvent.query.order_by(OutboxEvent.id).all()
+    rows[0].failed_at = now - timedelta(days=8)
+    rows[1].failed_at = now - timedelta(days=1)
+    db.session.commit()
+    kept = rows[1].id
+    dispatcher = _dispatcher({}, retention=timedelta(days=7))
+    assert dispatcher.prune() == 1
+    assert [row.id for row in OutboxEvent.query] == [kept]
+    assert _dispatcher({}, retention=None).prune() == 0
+
+
+def test_retry_delay_is_capped():
+    dispatcher = outbox.Dispatcher(None, backoff=2, max_backoff=60)
+    assert [dispatcher.retry_delay(n) for n in (1, 2, 3, 10)] == [2, 4, 8, 60]
+
+
+def test_run_outbox_command(outbox_app):
+    create_conversation("CH_0", "Outbox")
+    result = outbox_app.test_cli_runner().invoke(args=["run-outbox", "--once"])
+    assert result.exit_code == 0, result.output
+    assert "2 delivered" in result.output
+    assert OutboxEvent.query.count() == 0
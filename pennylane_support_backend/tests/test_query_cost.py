@@ -0,0 +1,88 @@
+import json
+
+from graphql.language.parser import parse
+from sqlalchemy import event
+
+from app.extensions import db
+from app.graphql.complexity import QueryLimits
+from app.graphql.schema import schema
+
+ABUSIVE = """
+{
+  challenges {
+    conversations { posts { content } }
+    assignedSupport { assignedChallenges { conversations { posts { content } } } }
+  }
+}
+"""
+
+
+def _measure(query, variables=None, **limits):
+    return QueryLimits(**limits).measure(schema, parse(query), variables=variables)
+
+
+def _post(client, query, variables=None):
+    selects = []
+
+    def _before(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        resp = client.post(
+            "/graphql",
+            data=json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+    return resp.get_json(), selects
+
+
+def test_lists_multiply_by_page_size_or_the_default():
+    # 20 challenges x (1 + 20 tags x 1)
+    assert _measure("{ challenges { title tags { name } } }").cost == 20 * 21
+    assert _measure("{ challenges { title } }", default_list_size=5).cost == 5
+
+    paged = "query P($n: Int) { conversationsPaged(pageSize: $n) { items { topic posts { content } } total } }"
+    # page object + n items x (1 + 20 posts) + COUNT weight
+    assert _measure(paged, {"n": 3}).cost == 1 + 3 * 21 + 10
+    # the argument's schema default (12) applies when the variable is unset
+    assert _measure(paged).cost == 1 + 12 * 21 + 10
+    assert _measure(paged, {"n": 3}).depth == 4
+
+
+def test_fragments_count_and_introspection_is_free():
+    query = """
+    { challenge(publicId: "CH_1") { ...F } __schema { types { name fields { name } } } }
+    fragment F on ChallengeType { hints { text } conversations { id } }
+    """
+    assert _measure(query) == (3, 1 + 20 + 20)
+
+
+def test_over_budget_query_is_rejected_before_resolvers_run(seeded_client):
+    payload, selects = _post(seeded_client, ABUSIVE)
+
+    assert selects == []
+    assert "data" not in payload
+    assert any("Query cost" in e and "exceeds the maximum of 10000" in e for e in payload["errors"])
+    cost = payload["extensions"]["cost"]
+    assert cost["requested"] > cost["maximum"] == 10000
+    assert cost["depth"] == 6
+
+
+def test_depth_limit(seeded_client, monkeypatch):
+    from app.graphql.documents import document_cache
+
+    monkeypatch.setattr(document_cache, "limits", QueryLimits(max_depth=3, max_cost=0))
+    document_cache.clear()  # cached documents carry the limits they were built with
+    payload, selects = _post(seeded_client, '{ challenge(publicId: "CH_1") { conversations { posts { content } } } }')
+    assert selects == []
+    assert payload["errors"] == ["Query depth 4 exceeds the maximum of 3"]
+
+
+def test_accepted_queries_report_their_cost(seeded_client):
+    payload, _ = _post(seeded_client, "query P($n: Int) { challengesPaged(pageSize: $n) { items { title } } }", {"n": 2})
+    assert len(payload["data"]["challengesPaged"]["items"]) == 2
+    assert payload["extensions"] == {"cost": {"requested": 3, "maximum": 10000, "depth": 3, "maximumDepth": 10}}
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.stats import QueueStat
+from app.models.support import ConversationPost, SupportConversation
+from app.services import conversation_service as svc
+from app.services import stats_service
+
+QUEUE_STATS = """
+{
+  queueStats {
+    conversations responded avgFirstResponseSeconds
+    byStatus { key conversations }
+    byCategory { key conversations statuses { status count } }
+    byAssignee { key conversations assignee { username } }
+    byChallenge { key conversations challenge { publicId } }
+  }
+}
+"""
+
+
+def _stats(client):
+    payload = client.post("/graphql", json={"query": QUEUE_STATS}).get_json()
+    assert "errors" not in payload, payload
+    return payload["data"]["queueStats"]
+
+
+def _rows():
+    return sorted(
+        (r.dimension, r.bucket, r.status, r.conversations, r.responded, r.response_seconds)
+        for r in db.session.query(QueueStat).filter(QueueStat.conversations > 0)
+    )
+
+
+@pytest.mark.max_queries(3)
+def test_dashboard_is_one_read_plus_labels(seeded_client):
+    stats = _stats(seeded_client)
+
+    assert stats["conversations"] == 24
+    assert stats["byStatus"] == [{"key": "OPEN", "conversations": 24}]
+    assert stats["byCategory"] == [{"key": "Help", "conversations": 24, "statuses": [{"status": "OPEN", "count": 24}]}]
+    assert sorted(b["assignee"]["username"] for b in stats["byAssignee"]) == ["agent0", "agent1", "agent2"]
+    assert [b["conversations"] for b in stats["byChallenge"]] == [6, 6, 6, 6]
+    # seeded posts share a timestamp: every conversation answered in 0s
+    assert stats["responded"] == 24 and stats["avgFirstResponseSeconds"] == 0
+
+
+def test_service_and_bulk_writes_keep_stats_current(seeded_client):
+    ids = [c.id for c in db.session.query(SupportConversation).order_by(SupportConversation.id).limit(5)]
+    svc.update_conversation_statuses(ids[:3], "RESOLVED", roles=["support_admin"])
+    svc.update_conversation_statuses(ids[2:], "CLOSED", roles=["support_admin"])
+    conv = svc.create_conversation("CH_0", "New one", category="Billing", first_post="hello")
+
+    stats = _stats(seeded_client)
+    assert {b["key"]: b["conversations"] for b in stats["byStatus"]} == {"OPEN": 20, "RESOLVED": 2, "CLOSED": 3}
+    billing = next(b for b in stats["byCategory"] if b["key"] == "Billing")
+    assert billing["statuses"] == [{"status": "OPEN", "count": 1}]
+    assert stats["responded"] == 24  # the new conversation has no reply yet
+
+    incremental = _rows()
+    stats_service.rebuild()
+    assert _rows() == incremental
+
+    db.session.delete(db.session.get(SupportConversation, conv.id))
+    db.session.commit()
+    assert _stats(seeded_client)["conversations"] == 24
+
+
+def test_first_response_time_from_posts(seeded_client):
+    opened = datetime(2026, 3, 1, 9, 0, 0)
+    conv = svc.create_conversation("CH_1", "Timed", category="Timing")
+    db.session.add(ConversationPost(conversation_id=conv.id, content="question", author_display_name="ada",
+                                    created_at=opened))
+    db.session.commit()
+    assert db.session.get(SupportConversation, conv.id).first_response_seconds is None
+
+    db.session.add(ConversationPost(conversation_id=conv.id, content="answer", author_display_name="agent",
+                                    created_at=opened + timedelta(minutes=5)))
+    db.session.add(ConversationPost(conversation_id=conv.id, content="thanks", author_display_name="ada",
+                                    created_at=opened + timedelta(hours=1)))
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(SupportConversation, conv.id).first_response_seconds == 300
+
+    timing = next(b for b in stats_service.queue_stats(["category"])["category"] if b.key == "Timing")
+    assert (timing.responded, timing.avg_first_response_seconds) == (1, 300)
+
+
+def test_asker_follow_ups_are_not_a_first_response(seeded_client):
+    opened = datetime(2026, 3, 1, 9, 0, 0)
+    conv = svc.create_conversation("CH_1", "Impatient", category="Timing")
+    for minutes, author in ((0, "ada"), (2, "ada"), (10, "agent")):
+        db.session.add(ConversationPost(conversation_id=conv.id, content=f"post by {author}", author_display_name=author,
+                                        created_at=opened + timedelta(minutes=minutes)))
+        db.session.commit()
+        db.session.expire_all()
+        seconds = db.session.get(SupportConversation, conv.id).first_response_seconds
+        # the asker's second post is no reply; the agent's, 10 minutes in, is
+        assert seconds == (600 if author == "agent" else None)
+
+    incremental = _rows()
+    stats_service.rebuild()
+    assert _rows() == incremental
+    assert db.session.get(SupportConversation, conv.id).first_response_seconds == 600
+
+
+def test_totals_are_summed_from_category_rows(seeded_client):
+    svc.create_conversation("CH_0", "Other", category="Billing")
+    assert {r[0] for r in _rows()} == {"category", "assignee", "challenge"}
+    stats = _stats(seeded_client)
+    assert stats["conversations"] == 25 and stats["responded"] == 24
+    assert stats["byStatus"] == [{"key": "OPEN", "conversations": 25}]
+
+
+def test_rebuild_command_repairs_drift(seeded_client):
+    expected = _rows()
+    db.session.query(QueueStat).delete()
+    db.session.query(SupportConversation).update({"first_response_seconds": None}, synchronize_session=False)
+    db.session.commit()
+
+    result = seeded_client.application.test_cli_runner().invoke(args=["rebuild-queue-stats"])
+    assert result.exit_code == 0, result.output
+    assert "Queue stats:" in result.output
+    assert _rows() == expected
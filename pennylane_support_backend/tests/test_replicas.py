@@ -0,0 +1,170 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import create_app
+from app.extensions import db
+from app.models.challenge import Challenge, Tag
+from app.models.support import SupportConversation
+from app.replicas import ReplicaSet, WriteWindows
+from app.response_cache import bulk_tags, response_cache
+
+PAGE = "{ conversationsPaged(pageSize: 50) { items { topic } } }"
+
+
+def _seed(session, name):
+    challenge = Challenge(public_id="CH_0", title="Challenge", category="Quantum", points=1, tags=[Tag(name="qml")])
+    session.add(challenge)
+    session.flush()
+    session.add(SupportConversation(identifier=f"CONV_{name}", topic=name, challenge_id=challenge.id))
+    session.commit()
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """A primary and two replicas, each holding one conversation named after it."""
+    urls = [f"sqlite:///{tmp_path / f'replica{i}.db'}" for i in range(2)]
+    for i, url in enumerate(urls):
+        engine = create_engine(url)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            _seed(session, f"replica-{i}")
+        engine.dispose()
+
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "SQLALCHEMY_REPLICA_URIS": urls,
+    })
+    with app.app_context():
+        db.create_all()
+        _seed(db.session, "primary")
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    for engine in app.extensions["replicas"].engines:
+        engine.dispose()
+
+
+def _topics(client, query=PAGE, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    payload = client.post("/graphql", json={"query": query}, headers=headers).get_json()
+    assert "errors" not in payload, payload
+    return [item["topic"] for item in payload["data"]["conversationsPaged"]["items"]]
+
+
+def test_replica_set_round_robin_and_recovery():
+    now = [0.0]
+    replicas = ReplicaSet(["a", "b"], retry_after=30, clock=lambda: now[0])
+    assert [replicas.pick() for _ in range(4)] == ["a", "b", "a", "b"]
+
+    replicas.mark_down("a")
+    assert [replicas.pick() for _ in range(3)] == ["b", "b", "b"]
+    replicas.mark_down("b")
+    assert replicas.pick() is None
+    assert replicas.stats()["healthy"] == 0
+
+    now[0] = 31
+    assert {replicas.pick(), replicas.pick()} == {"a", "b"}
+
+
+def test_failed_health_check_takes_replica_out_of_rotation():
+    def ping(replica):
+        if replica == "a":
+            raise ConnectionError("down")
+
+    now = [0.0]
+    replicas = ReplicaSet(["a", "b"], ping=ping, check_interval=10, clock=lambda: now[0])
+    now[0] = 10  # both are due a probe
+    assert [replicas.pick() for _ in range(3)] == ["b", "b", "b"]
+    assert replicas.stats()["failures"] == 1
+
+
+def test_write_windows_expire_and_stay_bounded():
+    now = [0.0]
+    windows = WriteWindows(5, max_entries=2, clock=lambda: now[0])
+    windows.open("a")
+    assert windows.is_open("a") and not windows.is_open("b")
+    now[0] = 4
+    windows.open("b")
+    windows.open("c")  # over max_entries: the oldest goes
+    assert not windows.is_open("a")
+    now[0] = 6
+    assert windows.is_open("b") and windows.is_open("c")
+    now[0] = 9
+    assert not windows.is_open("b")
+
+
+def test_write_windows_on_redis_are_shared_keys_with_a_ttl():
+    class Client:
+        def __init__(self):
+            self.keys = {}
+
+        def set(self, key, value, px=None):
+            self.keys[key] = px
+
+        def exists(self, key):
+            return int(key in self.keys)
+
+    client = Client()
+    windows = WriteWindows(2.5, client=client)
+    windows.open("auth0|writer")
+    assert client.keys == {"read-primary:auth0|writer": 2500}
+    assert windows.is_open("auth0|writer") and not windows.is_open("auth0|other")
+
+
+def test_queries_are_spread_over_replicas(replicated):
+    client = replicated.test_client()
+    seen = {_topics(client)[0] for _ in range(4)}
+    assert seen == {"replica-0", "replica-1"}
+
+
+def test_mutations_write_to_primary_and_reads_stick_to_the_writer(replicated, issue_token):
+    writer = issue_token(sub="auth0|writer")
+    response = replicated.test_client().post("/graphql", headers={"Authorization": f"Bearer {writer}"}, json={
+        "query": 'mutation { createConversation(challengePublicId: "CH_0", topic: "mine") { ok } }',
+    })
+    assert response.get_json()["data"]["createConversation"]["ok"] is True
+    assert "Set-Cookie" not in response.headers
+
+    # the writer sees its own write although the replicas never get it,
+    # from a fresh client too: the window is kept server-side by subject
+    for _ in range(3):
+        assert sorted(_topics(replicated.test_client(), token=writer)) == ["mine", "primary"]
+
+    # other users and anonymous callers keep reading from replicas
+    assert _topics(replicated.test_client(), token=issue_token(sub="auth0|other"))[0].startswith("replica-")
+    assert _topics(replicated.test_client())[0].startswith("replica-")
+
+
+def test_cache_misses_read_from_replicas_outside_the_lag_window(replicated):
+    client = replicated.test_client()
+    router = replicated.extensions["replicas"]
+    query = {"query": "{ challenges { title } }"}
+    assert client.post("/graphql", json=query).get_json()["data"]["challenges"] == [{"title": "Challenge"}]
+    assert router.replicas.stats()["reads"] == 1
+
+    # right after an invalidation the entry is refilled from the primary
+    response_cache.invalidate(*bulk_tags("Challenge"))
+    response = client.post("/graphql", json=query)
+    assert response.headers["X-Cache"] == "MISS"
+    assert router.replicas.stats()["reads"] == 1
+
+
+def test_broken_replica_falls_back_to_primary(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "SQLALCHEMY_REPLICA_URIS": [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"],
+    })
+    with app.app_context():
+        db.create_all()
+        _seed(db.session, "primary")
+        client = app.test_client()
+        assert _topics(client) == ["primary"]
+        stats = app.extensions["replicas"].replicas.stats()
+        assert (stats["failures"], stats["healthy"]) == (1, 0)
+        # while it is down, queries go straight to the primary
+        assert _topics(client) == ["primary"]
+        assert app.extensions["replicas"].replicas.stats()["fallbacks"] == 1
+        db.session.remove()
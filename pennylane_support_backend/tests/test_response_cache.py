@@ -0,0 +1,158 @@
+import fnmatch
+import json
+import os
+
+import pytest
+
+from app.models.support import SupportConversation
+from app.response_cache import RedisBackend, response_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _post(client, query, variables=None, headers=None):
+    resp = client.post(
+        "/graphql",
+        data=json.dumps({"query": query, "variables": variables}),
+        content_type="application/json",
+        headers=headers or {},
+    )
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return resp.headers.get("X-Cache"), payload["data"]
+
+
+CHALLENGE = """
+query One($id: String!) {
+  challenge(publicId: $id) { id title conversations { id status } }
+}
+"""
+
+
+def _conversation_in(challenge_public_id):
+    return next(c for c in SupportConversation.query.all() if c.challenge.public_id == challenge_public_id)
+
+
+def test_read_only_queries_are_served_from_cache(seeded_client):
+    assert _post(seeded_client, "{ tags { name } }")[0] == "MISS"
+    state, data = _post(seeded_client, "{\n  tags {\n    name\n  }\n}")  # same document, other whitespace
+    assert state == "HIT"
+    assert sorted(t["name"] for t in data["tags"]) == ["gates", "qml"]
+
+
+def test_other_queries_and_mutations_bypass_the_cache(seeded_client):
+    state, _ = _post(seeded_client, "{ conversationsPaged { items { id } } }")
+    assert state is None
+    state, _ = _post(seeded_client, "{ tags { name } conversationsPaged { items { id } } }")
+    assert state is None
+
+
+def test_add_post_invalidates_only_entries_showing_that_conversation(seeded_client):
+    for pid in ("CH_1", "CH_2"):
+        assert _post(seeded_client, CHALLENGE, {"id": pid})[0] == "MISS"
+
+    conv_id = _conversation_in("CH_1").id
+    _post(seeded_client, 'mutation($id: Int!) { addPost(conversationId: $id, content: "hi") { ok } }', {"id": conv_id})
+
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_1"})[0] == "MISS"
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_2"})[0] == "HIT"
+
+
+def test_entries_without_ids_are_invalidated_by_any_row_change(seeded_client):
+    query = '{ challenge(publicId: "CH_2") { title conversations { status } } }'
+    _post(seeded_client, query)
+    conv_id = _conversation_in("CH_1").id
+    _post(seeded_client, 'mutation($id: Int!) { addPost(conversationId: $id, content: "hi") { ok } }', {"id": conv_id})
+    assert _post(seeded_client, query)[0] == "MISS"
+
+
+def test_create_conversation_refreshes_categories(seeded_client):
+    _, data = _post(seeded_client, "{ conversationCategories }")
+    assert data["conversationCategories"] == ["Help"]
+    _post(seeded_client, """
+      mutation { createConversation(challengePublicId: "CH_0", topic: "New", category: "Billing") { ok } }
+    """)
+    state, data = _post(seeded_client, "{ conversationCategories }")
+    assert state == "MISS"
+    assert data["conversationCategories"] == ["Billing", "Help"]
+
+
+def test_status_update_invalidates_and_role_is_part_of_the_key(seeded_client, issue_token):
+    admin = {"Authorization": "Bearer " + issue_token(sub="auth0|admin", roles=["support_admin"])}
+    conv = _conversation_in("CH_3")
+
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_3"})[0] == "MISS"
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_3"}, headers=admin)[0] == "MISS"
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_3"}, headers=admin)[0] == "HIT"
+
+    _post(seeded_client, """
+      mutation($id: Int!) { updateConversationStatus(conversationId: $id, status: "RESOLVED") { ok } }
+    """, {"id": conv.id}, headers=admin)
+
+    state, data = _post(seeded_client, CHALLENGE, {"id": "CH_3"})
+    assert state == "MISS"
+    assert {"id": str(conv.id), "status": "RESOLVED"} in data["challenge"]["conversations"]
+
+
+def test_seed_cli_invalidates_challenge_entries(seeded_client):
+    _post(seeded_client, "{ challenges { title } }")
+    result = seeded_client.application.test_cli_runner().invoke(
+        args=["seed-challenges", os.path.join(ROOT, "pennylane_coding_challenges.json")]
+    )
+    assert result.exit_code == 0, result.output
+    state, data = _post(seeded_client, "{ challenges { title } }")
+    assert state == "MISS"
+    assert len(data["challenges"]) == 34
+
+
+class FakeRedis:
+    """Just enough of redis-py for RedisBackend."""
+
+    def __init__(self):
+        self.values, self.sets = {}, {}
+
+    def get(self, key):
+        value = self.values.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        return sum(1 for k in keys if self.values.pop(k, None) is not None or self.sets.pop(k, None) is not None)
+
+    def scan_iter(self, match):
+        return [k for k in list(self.values) + list(self.sets) if fnmatch.fnmatch(k, match)]
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(response_cache, "backend", RedisBackend(fake))
+    return fake
+
+
+def test_redis_backend_round_trip(seeded_client, redis_cache):
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_0"})[0] == "MISS"
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_0"})[0] == "HIT"
+    assert any(k.startswith("gqlcache:tag:Challenge:") for k in redis_cache.sets)
+
+    conv_id = _conversation_in("CH_0").id
+    _post(seeded_client, 'mutation($id: Int!) { addPost(conversationId: $id, content: "hi") { ok } }', {"id": conv_id})
+    assert _post(seeded_client, CHALLENGE, {"id": "CH_0"})[0] == "MISS"
+
+    response_cache.clear()
+    assert redis_cache.values == {} and redis_cache.sets == {}
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from app.extensions import db
+from app.models.support import ConversationPost, SupportConversation
+from app.services.search_service import to_fts5_query
+
+
+def _gql(client, query, variables=None):
+    resp = client.post(
+        "/graphql",
+        data=json.dumps({"query": query, "variables": variables}),
+        content_type="application/json",
+    )
+    payload = resp.get_json()
+    assert "errors" not in payload, payload
+    return payload["data"]
+
+
+@pytest.fixture
+def search_client(seeded_client):
+    conv = SupportConversation.query.filter_by(identifier="CONV_2_3").one()
+    conv.posts.append(ConversationPost(content="The Hadamard gate keeps failing", author_display_name="u"))
+    other = SupportConversation.query.filter_by(identifier="CONV_1_0").one()
+    other.topic = "Hadamard Hadamard question"
+    db.session.commit()
+    return seeded_client
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("hadamard gate", '("hadamard" AND "gate")'),
+    ('"phase kickback"', '("phase kickback")'),
+    ("grover or shor", '("grover") OR ("shor")'),
+    ("qubit -noise", '(("qubit")) NOT "noise"'),
+    ('x") OR *', '("x")'),
+    ("  ", None),
+])
+def test_to_fts5_query(term, expected):
+    assert to_fts5_query(term) == expected
+
+
+def test_paged_search_matches_post_content(search_client):
+    data = _gql(search_client, '{ conversationsPaged(search: "hadamard") { total items { identifier } } }')
+    ids = {i["identifier"] for i in data["conversationsPaged"]["items"]}
+    assert ids == {"CONV_2_3", "CONV_1_0"}
+    assert data["conversationsPaged"]["total"] == 2
+
+
+def test_search_conversations_ranks_and_highlights(search_client):
+    data = _gql(search_client, """
+    { searchConversations(term: "hadamard", limit: 5) {
+        rank snippet conversation { identifier }
+    } }
+    """)
+    hits = data["searchConversations"]
+    assert [h["conversation"]["identifier"] for h in hits] == ["CONV_1_0", "CONV_2_3"]
+    assert hits[0]["rank"] >= hits[1]["rank"]
+    assert all("<mark>" in h["snippet"].lower() for h in hits)
+
+
+def test_search_follows_post_edits_and_deletes(search_client):
+    post = ConversationPost.query.filter_by(content="The Hadamard gate keeps failing").one()
+    post.content = "Resolved now"
+    db.session.commit()
+    data = _gql(search_client, '{ searchConversations(term: "hadamard") { conversation { identifier } } }')
+    assert [h["conversation"]["identifier"] for h in data["searchConversations"]] == ["CONV_1_0"]
+
+    db.session.delete(post)
+    db.session.commit()
+    data = _gql(search_client, '{ searchConversations(term: "resolved") { conversation { identifier } } }')
+    assert data["searchConversations"] == []
+
+
+def test_challenge_search(seeded_client):
+    data = _gql(seeded_client, '{ challenges(search: "\\"challenge 2\\"") { publicId } }')
+    assert [c["publicId"] for c in data["challenges"]] == ["CH_2"]
+    data = _gql(seeded_client, '{ challengesPaged(search: "nothing-here") { items { publicId } } }')
+    assert data["challengesPaged"]["items"] == []
+
+
+@pytest.mark.postgres
+def test_challenge_insert_leaves_generated_search_vector_to_postgres(pg_app):
+    from app.models.challenge import Challenge
+
+    db.session.add(Challenge(public_id="PG_1", title="Grover search", description="Amplitude amplification", category="Q"))
+    db.session.commit()
+
+    vector = db.session.query(Challenge.search_vector).filter_by(public_id="PG_1").scalar()
+    assert "grover" in vector and "amplif" in vector
@@ -0,0 +1,108 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from app.cli import _copy_csv
+from app.extensions import db
+from app.models.challenge import Challenge, ChallengeHint, ChallengeTag, LearningObjective
+from app.models.support import ConversationPost
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHALLENGES = os.path.join(ROOT, "pennylane_coding_challenges.json")
+CONVERSATIONS = os.path.join(ROOT, "pennylane_support_conversations.json")
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_copy_csv_distinguishes_null_from_empty_string():
+    buf = _copy_csv(
+        [{"id": 1, "text": None, "note": "", "quoted": 'say "hi"\nbye', "at": datetime(2025, 1, 2, 3, 4, 5)}],
+        ["id", "text", "note", "quoted", "at"],
+    )
+    assert buf.read() == '"1",,"","say ""hi""\nbye","2025-01-02T03:04:05"\n'
+
+
+@pytest.mark.parametrize("engine", ["insert", "copy"])
+def test_seed_json_reports_rows_per_second(app, engine):
+    result = app.test_cli_runner().invoke(args=[
+        "seed-json", CHALLENGES, CONVERSATIONS,
+        "--chunk", "7", "--engine", engine,
+    ])
+    assert result.exit_code == 0, result.output
+    assert ("falling back to insert" in result.output) == (engine == "copy")
+    for table in ("challenges", "challenge_hints", "learning_objectives", "support_conversations", "conversation_posts"):
+        assert f"  {table}: " in result.output
+    assert "rows/s" in result.output
+    assert Challenge.query.count() == 30
+    assert ChallengeHint.query.count() == 90
+    assert ConversationPost.query.count() == 182
+
+
+def test_unknown_engine_is_rejected(app):
+    result = app.test_cli_runner().invoke(args=[
+        "seed-challenges", CHALLENGES, "--engine", "bogus",
+    ])
+    assert result.exit_code != 0
+    assert "Invalid value for '--engine'" in result.output
+
+
+def test_parallel_seed_matches_sequential_seed(app):
+    result = app.test_cli_runner().invoke(args=[
+        "seed-json", CHALLENGES, CONVERSATIONS, "--chunk", "7", "--workers", "2",
+    ])
+    assert result.exit_code == 0, result.output
+    assert "Phases:" in result.output
+    for phase in ("parse+transform", "diff", "tags", "challenges", "children", "conversations", "posts"):
+        assert f"  {phase}: " in result.output
+    assert Challenge.query.count() == 30
+    assert ChallengeHint.query.count() == 90
+    assert ConversationPost.query.count() == 182
+
+
+def _row_counts():
+    return {
+        model.__tablename__: model.query.count()
+        for model in (Challenge, ChallengeHint, LearningObjective, ChallengeTag, ConversationPost)
+    }
+
+
+@pytest.mark.postgres
+def test_concurrent_child_writers_match_sequential_load_on_postgres(pg_app):
+    runner = pg_app.test_cli_runner()
+    result = runner.invoke(args=["seed-json", CHALLENGES, CONVERSATIONS, "--chunk", "7"])
+    assert result.exit_code == 0, result.output
+    sequential = _row_counts()
+
+    result = runner.invoke(args=["seed-json", CHALLENGES, CONVERSATIONS, "--chunk", "7", "--force", "--workers", "3"])
+    assert result.exit_code == 0, result.output
+    assert _row_counts() == sequential
+    assert sequential["challenge_hints"] == 90 and sequential["conversation_posts"] == 182
+
+
+@pytest.mark.postgres
+def test_copy_import_rerun_keeps_row_counts_on_postgres(pg_app):
+    runner = pg_app.test_cli_runner()
+    args = ["seed-json", CHALLENGES, CONVERSATIONS, "--chunk", "7", "--engine", "copy"]
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+    assert "falling back" not in result.output
+    first = _row_counts()
+
+    for extra in ([], ["--force"]):
+        result = runner.invoke(args=args + extra)
+        assert result.exit_code == 0, result.output
+        assert _row_counts() == first
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from app import create_app
+from app.cli import _iter_json_array, _seed_conversations_from_json
+from app.extensions import db
+from app.models.support import ConversationPost, SupportConversation
+
+POSTS_PER_CONVERSATION = 10
+MEMORY_CAP = 32 * 1024 * 1024  # bytes of Python heap, independent of file size
+CHUNK_SIZE = 100
+
+
+def _write_dump(path, n_posts):
+    """Stream a support_conversations dump to disk without building it in memory."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"exported_at": "2025-01-01", "support_conversations": [')
+        for i in range(n_posts // POSTS_PER_CONVERSATION):
+            if i:
+                f.write(",")
+            json.dump({
+                "identifier": f"CONV_{i:07d}",
+                "topic": f"Topic {i}",
+                "category": "Help",
+                "posts": [
+                    {"user": "u", "content": f"post {i}/{p}", "timestamp": "2025-01-01T00:00:00Z"}
+                    for p in range(POSTS_PER_CONVERSATION)
+                ],
+            }, f)
+        f.write("]}")
+
+
+@pytest.mark.parametrize("doc, expected", [
+    ('{"meta": {"k": [9]}, "k": [1, {"a": [2, 3]}, "x", 1e3], "tail": null}', [1, {"a": [2, 3]}, "x", 1000.0]),
+    ('{"k": []}', []),
+    ("{}", []),
+    ('{"other": 123456789}', []),
+])
+def test_iter_json_array_across_buffer_boundaries(doc, expected):
+    for read_size in (1, 2, 7, 1 << 16):
+        assert list(_iter_json_array(io.StringIO(doc), "k", read_size)) == expected
+
+
+def test_iter_json_array_rejects_truncated_input():
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO('{"k": [{"a": 1}, {"b"'), "k", 4))
+
+
+def _import_peak(tmp_path, n_posts, chunk_size=CHUNK_SIZE):
+    """Import a generated dump of `n_posts` posts; returns the peak traced heap in bytes."""
+    tmp_path = tmp_path / str(n_posts)
+    tmp_path.mkdir()
+    dump = tmp_path / "conversations.json"
+    _write_dump(dump, n_posts)
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'import.db'}",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    })
+    with app.app_context():
+        db.create_all()
+        tracemalloc.start()
+        try:
+            _seed_conversations_from_json(str(dump), chunk_size)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert ConversationPost.query.count() == n_posts
+        assert SupportConversation.query.count() == n_posts // POSTS_PER_CONVERSATION
+        db.session.remove()
+    return peak
+
+
+def test_import_memory_is_bounded_by_chunk_size(tmp_path):
+    # 10x the input must not mean 10x the heap (a json.load of the whole dump would)
+    small = _import_peak(tmp_path, 2_000)
+    large = _import_peak(tmp_path, 20_000)
+    assert large < small * 2, f"peak {small / 1e6:.1f} MB for 2k posts, {large / 1e6:.1f} MB for 20k"
+
+
+@pytest.mark.skipif(not os.getenv("RUN_SLOW_TESTS"), reason="set RUN_SLOW_TESTS=1 (imports 1M posts, a few minutes)")
+def test_import_one_million_posts_under_memory_cap(tmp_path):
+    peak = _import_peak(tmp_path, 1_000_000, chunk_size=1000)
+    assert peak < MEMORY_CAP, f"peak {peak / 1e6:.1f} MB"
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from app import events
+from app.events import QUEUE_CHANGED, Event, bus_for, conversation_changed
+from app.extensions import db
+from app.models.support import SupportConversation
+from app.services.conversation_service import add_post, create_conversation
+
+
+def _next_frame(body):
+    """The next `event: next` payload, skipping comment lines."""
+    for chunk in body:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith("event: next"):
+            return json.loads(text.split("data: ", 1)[1])
+
+
+def _open(client, query, variables=None):
+    response = client.get(
+        "/graphql/stream",
+        query_string={"query": query, "variables": json.dumps(variables or {})},
+        buffered=False,
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    body = iter(response.response)
+    assert next(body) == b": ok\n\n"
+    return response, body
+
+
+def test_bus_selection():
+    assert type(bus_for("sqlite://")) is events.EventBus
+    assert type(bus_for("postgresql://u@db/app")) is events.PostgresEventBus
+    assert type(bus_for("postgresql://u@db/app", "local")) is events.EventBus
+    with pytest.raises(ValueError):
+        bus_for("sqlite://", "kafka")
+
+
+def test_events_are_sent_on_commit_only(app):
+    received = []
+    unsubscribe = events.event_bus.subscribe(received.append)
+    try:
+        conv = db.session.query(SupportConversation).first() or create_conversation("CH_X", "setup")
+        received.clear()
+        events.publish(db.session, *conversation_changed(conv, "OPEN"))
+        db.session.rollback()
+        assert received == []
+
+        create_conversation("CH_X", "hello", first_post="hi")
+        kinds = [e.kind for e in received]
+        assert kinds == ["post_added", "conversation_updated", "queue_changed"]
+        assert received[-1].previous_status is None and received[-1].status == "OPEN"
+    finally:
+        unsubscribe()
+    assert Event.from_json(received[0].to_json()) == received[0]
+
+
+def test_post_added_stream(seeded_client):
+    response, body = _open(
+        seeded_client,
+        "subscription($id: Int!) { postAdded(conversationId: $id) { content authorDisplayName } }",
+        {"id": 1},
+    )
+    try:
+        add_post(2, "other conversation")  # filtered out
+        add_post(1, "first!", author_display_name="Ada")
+        assert _next_frame(body) == {"data": {"postAdded": {"content": "first!", "authorDisplayName": "Ada"}}}
+    finally:
+        response.close()
+    assert events.event_bus.stats()["subscribers"] == 0
+
+
+def test_queue_changed_stream(seeded_client):
+    query = """
+    subscription { queueChanged(status: "OPEN") { status previousStatus conversation { topic posts { content } } } }
+    """
+    response, body = _open(seeded_client, query)
+    try:
+        seeded_client.post("/graphql", json={
+            "query": 'mutation { createConversation(challengePublicId: "CH_0", topic: "new", firstPost: "help") { ok } }',
+        })
+        assert _next_frame(body)["data"]["queueChanged"] == {
+            "status": "OPEN", "previousStatus": None,
+            "conversation": {"topic": "new", "posts": [{"content": "help"}]},
+        }
+    finally:
+        response.close()
+
+
+def test_rejects_queries_and_bad_documents(seeded_client):
+    response = seeded_client.get("/graphql/stream", query_string={"query": "{ tags { name } }"})
+    assert response.status_code == 400
+    response = seeded_client.post("/graphql/stream", json={"query": "subscription { nope }"})
+    assert response.status_code == 400 and response.get_json()["errors"]
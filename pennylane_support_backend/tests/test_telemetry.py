@@ -0,0 +1,90 @@
+from app import telemetry
+from app.telemetry import TRACING_HEADER, Counter, Histogram
+
+PAGE = """
+query Queue { conversationsPaged(pageSize: 3) { items { topic posts { content } } } }
+"""
+
+
+def test_histogram_and_counter_text_format():
+    latency = Histogram("demo_seconds", "Demo.", ("op",), buckets=(0.1, 1))
+    latency.observe(0.05, op="a")
+    latency.observe(0.5, op="a")
+    errors = Counter("demo_errors_total", "Errors.", ("error",))
+    errors.inc(error='Bad"Thing')
+
+    lines = latency.render() + errors.render()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{op="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{op="a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{op="a",le="+Inf"} 2' in lines
+    assert 'demo_seconds_count{op="a"} 2' in lines
+    assert 'demo_errors_total{error="Bad\\"Thing"} 1' in lines
+
+
+def test_operations_record_latency_and_sql(seeded_client):
+    before = telemetry.operation_seconds.count(operation="Queue", type="query")
+    sql_before = telemetry.sql_queries.count(operation="Queue")
+    seeded_client.post("/graphql", json={"query": PAGE})
+
+    assert telemetry.operation_seconds.count(operation="Queue", type="query") == before + 1
+    assert telemetry.sql_queries.count(operation="Queue") == sql_before + 1
+    assert telemetry.field_seconds.count(field="Query.conversationsPaged") >= 1
+    # scalar fields are not timed unless the request is traced
+    assert telemetry.field_seconds.count(field="SupportConversationType.topic") == 0
+
+
+def test_errors_are_counted_by_class(seeded_client):
+    before = telemetry.errors_total.value(error="GraphQLError")
+    payload = seeded_client.post("/graphql", json={"query": "{ nope }"}).get_json()
+    assert payload["errors"]
+    assert telemetry.errors_total.value(error="GraphQLError") == before + 1
+
+
+def test_tracing_header_is_ignored_unless_enabled(seeded_client):
+    response = seeded_client.post("/graphql", json={"query": "{ tags { name } }"}, headers={TRACING_HEADER: "1"})
+    assert "tracing" not in response.get_json().get("extensions", {})
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_tracing_header_adds_apollo_tracing(seeded_client):
+    seeded_client.application.config["GRAPHQL_TRACING"] = True
+    plain = seeded_client.post("/graphql", json={"query": PAGE}).get_json()
+    assert "tracing" not in plain.get("extensions", {})
+
+    payload = seeded_client.post("/graphql", json={"query": PAGE}, headers={TRACING_HEADER: "1"}).get_json()
+    tracing = payload["extensions"]["tracing"]
+    assert tracing["version"] == 1 and tracing["duration"] > 0
+    assert tracing["sql"]["queries"] >= 1
+    paths = [r["path"] for r in tracing["execution"]["resolvers"]]
+    assert ["conversationsPaged"] in paths
+    assert ["conversationsPaged", "items", 0, "topic"] in paths
+    assert payload["data"] == plain["data"]
+
+
+def test_traced_requests_bypass_the_response_cache(seeded_client):
+    seeded_client.application.config["GRAPHQL_TRACING"] = True
+    query = "{ tags { name } }"
+    seeded_client.post("/graphql", json={"query": query})
+    response = seeded_client.post("/graphql", json={"query": query}, headers={TRACING_HEADER: "1"})
+    assert "X-Cache" not in response.headers
+    assert "tracing" in response.get_json()["extensions"]
+
+
+def test_jwt_verification_is_timed(client, issue_token):
+    before = telemetry.jwt_verify_seconds.count()
+    response = client.get("/api/secure-data", headers={"Authorization": f"Bearer {issue_token()}"})
+    assert response.status_code == 200
+    assert telemetry.jwt_verify_seconds.count() == before + 1
+
+
+def test_prometheus_endpoint(seeded_client):
+    seeded_client.post("/graphql", json={"query": PAGE})
+    response = seeded_client.get("/api/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'graphql_operation_seconds_count{operation="Queue",type="query"}' in body
+    assert "# TYPE graphql_request_sql_queries histogram" in body
+    assert 'db_pool_checkouts{pool="default"}' in body
+    assert 'cache_hits{cache="responses"}' in body
@@ -0,0 +1,93 @@
+from flask import g
+
+from app import auth
+from app.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_after_put_and_expiry_at_exp_minus_skew():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_size=4, skew=30, clock=clock)
+    payload = {"sub": "a", "exp": clock.now + 100}
+
+    assert cache.get("tok", generation=1) is None
+    cache.put("tok", payload, generation=1)
+    assert cache.get("tok", generation=1) == payload
+
+    clock.now += 71  # past exp - skew
+    assert cache.get("tok", generation=1) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expired"] == 1
+
+
+def test_lru_eviction_keeps_recently_used_tokens():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_size=2, skew=0, clock=clock)
+    for tok in ("t1", "t2"):
+        cache.put(tok, {"exp": clock.now + 60}, generation=1)
+    cache.get("t1", generation=1)
+    cache.put("t3", {"exp": clock.now + 60}, generation=1)
+
+    assert cache.get("t2", generation=1) is None
+    assert cache.get("t1", generation=1) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_key_rotation_drops_all_entries():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_size=4, skew=0, clock=clock)
+    cache.put("tok", {"exp": clock.now + 60}, generation=1)
+
+    assert cache.get("tok", generation=2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_tokens_without_exp_and_disabled_cache_are_not_stored():
+    cache = VerifiedTokenCache(max_size=4)
+    cache.put("tok", {"sub": "a"}, generation=1)
+    assert cache.stats()["size"] == 0
+
+    disabled = VerifiedTokenCache(max_size=0)
+    disabled.put("tok", {"sub": "a", "exp": 2**40}, generation=1)
+    assert disabled.get("tok", generation=1) is None
+    assert disabled.stats()["enabled"] is False
+
+
+def test_requires_auth_verifies_a_token_once(app, issue_token, monkeypatch):
+    calls = []
+    real_verify = auth._verify_token
+
+    def counting_verify(token):
+        calls.append(token)
+        return real_verify(token)
+
+    monkeypatch.setattr(auth, "_verify_token", counting_verify)
+
+    @auth.requires_auth(required_role="support_admin")
+    def protected():
+        return g.current_user["sub"], list(g.roles)
+
+    token = issue_token(sub="auth0|agent", roles=["support_admin"])
+    for _ in range(3):
+        with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            assert protected() == ("auth0|agent", ["support_admin"])
+
+    assert len(calls) == 1
+    assert auth.token_cache.stats()["hits"] == 2
+
+
+def test_secure_data_endpoint_accepts_cached_token(client, issue_token):
+    token = issue_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/secure-data", headers=headers).status_code == 200
+    assert client.get("/api/secure-data", headers=headers).status_code == 200
+    assert auth.jwks_cache.stats()["fetches"] == 1